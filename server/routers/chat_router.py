@@ -3,7 +3,7 @@ import json
 import traceback
 import uuid
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, UploadFile, File
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, UploadFile, File
 from fastapi.responses import StreamingResponse
 from langchain.messages import AIMessageChunk, HumanMessage, AIMessage
 from langgraph.types import Command
@@ -12,7 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from src.storage.db.models import User, MessageFeedback, Message, Conversation
-from src.storage.conversation import ConversationManager
+from src.storage.conversation import ConversationManager, pagination, rollups
 from src.storage.db.manager import db_manager
 from server.routers.auth_router import get_admin_user
 from server.utils.auth_middleware import get_db, get_required_user
@@ -577,13 +577,13 @@ async def chat_agent(
 
                 full_msg = None
                 accumulated_content = []
+                guard_matcher = content_guard.create_stream_matcher() if conf.enable_content_guard else None
                 langgraph_config = {"configurable": input_context}
                 async for msg, metadata in agent.stream_messages(messages, input_context=input_context):
                     if isinstance(msg, AIMessageChunk):
                         accumulated_content.append(msg.content)
 
-                        content_for_check = "".join(accumulated_content[-10:])
-                        if conf.enable_content_guard and await content_guard.check_with_keywords(content_for_check):
+                        if guard_matcher and guard_matcher.feed(msg.content):
                             logger.warning("Sensitive content detected in stream")
                             full_msg = AIMessage(content="".join(accumulated_content))
                             await save_partial_message(conv_manager, thread_id, full_msg, "content_guard_blocked")
@@ -611,10 +611,12 @@ async def chat_agent(
                 if not full_msg and accumulated_content:
                     full_msg = AIMessage(content="".join(accumulated_content))
 
+                # 关键词已由流式匹配器覆盖全文，结束时只需补充 LLM 审查
                 if (
                     conf.enable_content_guard
+                    and content_guard.llm_model
                     and hasattr(full_msg, "content")
-                    and await content_guard.check(full_msg.content)
+                    and await content_guard.check_with_llm(full_msg.content)
                 ):
                     logger.warning("Sensitive content detected in final message")
                     await save_partial_message(conv_manager, thread_id, full_msg, "content_guard_blocked")
@@ -1070,20 +1072,36 @@ async def create_thread(
 
 @chat.get("/threads", response_model=list[ThreadResponse])
 async def list_threads(
-    agent_id: str, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_required_user)
+    agent_id: str,
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=500),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_required_user),
 ):
-    """获取用户的所有对话线程 (使用新存储系统)"""
+    """获取用户的对话线程 (使用新存储系统)
+
+    不传 limit 时返回全部线程；分页时下一页游标通过响应头 X-Next-Cursor 返回
+    """
     assert agent_id, "agent_id 不能为空"
 
     logger.debug(f"agent_id: {agent_id}")
 
     # Use new storage system
     conv_manager = ConversationManager(db)
-    conversations = await conv_manager.list_conversations(
-        user_id=str(current_user.id),
-        agent_id=agent_id,
-        status="active",
-    )
+    try:
+        conversations = await conv_manager.list_conversations(
+            user_id=str(current_user.id),
+            agent_id=agent_id,
+            status="active",
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor := pagination.next_cursor(conversations, limit):
+        response.headers["X-Next-Cursor"] = next_cursor
 
     return [
         {
@@ -1288,6 +1306,7 @@ async def submit_message_feedback(
         )
 
         db.add(new_feedback)
+        await rollups.record_feedback(db, conversation.agent_id, feedback_data.rating)
         await db.commit()
         await db.refresh(new_feedback)
 
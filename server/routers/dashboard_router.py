@@ -9,15 +9,15 @@ Provides centralized dashboard APIs for monitoring system-wide statistics.
 import traceback
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 from sqlalchemy import String, cast, distinct, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from server.routers.auth_router import get_admin_user
 from server.utils.auth_middleware import get_db
-from src.storage.conversation import ConversationManager
-from src.storage.db.models import User
+from src.storage.conversation import ConversationManager, pagination, rollups
+from src.storage.db.models import DashboardRollup, User
 from src.utils.datetime_utils import UTC, ensure_shanghai, shanghai_now, utc_now
 from src.utils.logging_config import logger
 
@@ -107,15 +107,20 @@ class ConversationDetailResponse(BaseModel):
 
 @dashboard.get("/conversations", response_model=list[ConversationListItem])
 async def get_all_conversations(
+    response: Response,
     user_id: str | None = None,
     agent_id: str | None = None,
     status: str = "active",
     limit: int = 100,
     offset: int = 0,
+    cursor: str | None = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_admin_user),
 ):
-    """获取所有对话（管理员权限）"""
+    """获取所有对话（管理员权限）
+
+    支持 keyset 分页：传入上一页响应头 X-Next-Cursor 的值作为 cursor（此时忽略 offset）
+    """
     from src.storage.db.models import Conversation, ConversationStats
 
     try:
@@ -132,12 +137,19 @@ async def get_all_conversations(
         if status != "all":
             query = query.filter(Conversation.status == status)
 
-        # Order and paginate
-        query = query.order_by(Conversation.updated_at.desc()).limit(limit).offset(offset)
+        # Order and paginate (keyset when a cursor is given, offset kept for compatibility)
+        if cursor:
+            query = query.filter(pagination.keyset_before(Conversation.updated_at, Conversation.id, cursor))
+        elif offset:
+            query = query.offset(offset)
+        query = query.order_by(Conversation.updated_at.desc(), Conversation.id.desc()).limit(limit)
 
         result = await db.execute(query)
         results = result.all()
 
+        if next_cursor := pagination.next_cursor([conv for conv, _ in results], limit):
+            response.headers["X-Next-Cursor"] = next_cursor
+
         return [
             {
                 "thread_id": conv.thread_id,
@@ -151,6 +163,8 @@ async def get_all_conversations(
             }
             for conv, stats in results
         ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting conversations: {e}")
         logger.error(traceback.format_exc())
@@ -233,50 +247,59 @@ async def get_user_activity_stats(
 ):
     """获取用户活动统计（管理员权限）"""
     try:
-        from src.storage.db.models import User, Conversation
-
         now = utc_now()
 
+        # 活跃度来自按小时聚合的 active_users（维度为对话的 user_id）。
         # Conversations may store either the numeric user primary key or the login user_id string.
         # Join condition accounts for both representations.
         user_join_condition = or_(
-            Conversation.user_id == User.user_id,
-            Conversation.user_id == cast(User.id, String),
+            DashboardRollup.dimension == User.user_id,
+            DashboardRollup.dimension == cast(User.id, String),
         )
 
+        def active_users_query(start):
+            return (
+                select(func.count(distinct(User.id)))
+                .select_from(DashboardRollup)
+                .join(User, user_join_condition)
+                .filter(
+                    DashboardRollup.metric == rollups.ACTIVE_USERS,
+                    DashboardRollup.bucket >= rollups.hour_bucket(start),
+                    User.is_deleted == 0,
+                )
+            )
+
         # 基础用户统计（排除已删除用户）
         total_users_result = await db.execute(select(func.count(User.id)).filter(User.is_deleted == 0))
         total_users = total_users_result.scalar() or 0
 
         # 不同时间段的活跃用户数（基于对话活动，排除已删除用户）
-        active_users_24h_result = await db.execute(
-            select(func.count(distinct(User.id)))
-            .select_from(Conversation)
-            .join(User, user_join_condition)
-            .filter(Conversation.updated_at >= now - timedelta(days=1), User.is_deleted == 0)
-        )
+        active_users_24h_result = await db.execute(active_users_query(now - timedelta(days=1)))
         active_users_24h = active_users_24h_result.scalar() or 0
 
-        active_users_30d_result = await db.execute(
-            select(func.count(distinct(User.id)))
-            .select_from(Conversation)
+        active_users_30d_result = await db.execute(active_users_query(now - timedelta(days=30)))
+        active_users_30d = active_users_30d_result.scalar() or 0
+
+        # 最近7天每日活跃用户（排除已删除用户），一次取出小时级 (bucket, user) 后按天窗口去重
+        hourly_users_result = await db.execute(
+            select(DashboardRollup.bucket, User.id)
+            .select_from(DashboardRollup)
             .join(User, user_join_condition)
-            .filter(Conversation.updated_at >= now - timedelta(days=30), User.is_deleted == 0)
+            .filter(
+                DashboardRollup.metric == rollups.ACTIVE_USERS,
+                DashboardRollup.bucket >= rollups.hour_bucket(now - timedelta(days=7)),
+                User.is_deleted == 0,
+            )
+            .distinct()
         )
-        active_users_30d = active_users_30d_result.scalar() or 0
-        # 最近7天每日活跃用户（排除已删除用户）
+        hourly_users = hourly_users_result.all()
+
         daily_active_users = []
         for i in range(7):
             day_start = now - timedelta(days=i + 1)
             day_end = now - timedelta(days=i)
-
-            active_count_result = await db.execute(
-                select(func.count(distinct(User.id)))
-                .select_from(Conversation)
-                .join(User, user_join_condition)
-                .filter(Conversation.updated_at >= day_start, Conversation.updated_at < day_end, User.is_deleted == 0)
-            )
-            active_count = active_count_result.scalar() or 0
+            window_start, window_end = rollups.hour_bucket(day_start), rollups.hour_bucket(day_end)
+            active_count = len({uid for bucket, uid in hourly_users if window_start <= bucket < window_end})
 
             daily_active_users.append({"date": day_start.strftime("%Y-%m-%d"), "active_users": active_count})
 
@@ -305,48 +328,32 @@ async def get_tool_call_stats(
 ):
     """获取工具调用统计（管理员权限）"""
     try:
-        from src.storage.db.models import ToolCall
-
         now = utc_now()
 
-        # 基础工具调用统计
-        total_calls_result = await db.execute(select(func.count(ToolCall.id)))
-        total_calls = total_calls_result.scalar() or 0
+        # 基础工具调用统计（读取小时聚合）
+        calls_by_tool = await rollups.sum_metric_by_dimension(db, rollups.TOOL_CALLS)
+        total_calls = sum(calls_by_tool.values())
 
-        successful_calls_result = await db.execute(select(func.count(ToolCall.id)).filter(ToolCall.status == "success"))
-        successful_calls = successful_calls_result.scalar() or 0
+        successful_calls = await rollups.sum_metric(db, rollups.TOOL_SUCCESS)
         failed_calls = total_calls - successful_calls
         success_rate = round((successful_calls / total_calls * 100), 2) if total_calls > 0 else 0
 
         # 最常用工具
-        most_used_tools_result = await db.execute(
-            select(ToolCall.tool_name, func.count(ToolCall.id).label("count"))
-            .group_by(ToolCall.tool_name)
-            .order_by(func.count(ToolCall.id).desc())
-            .limit(10)
-        )
-        most_used_tools = most_used_tools_result.all()
+        most_used_tools = sorted(calls_by_tool.items(), key=lambda item: item[1], reverse=True)[:10]
         most_used_tools = [{"tool_name": name, "count": count} for name, count in most_used_tools]
 
         # 工具错误分布
-        tool_errors_result = await db.execute(
-            select(ToolCall.tool_name, func.count(ToolCall.id).label("error_count"))
-            .filter(ToolCall.status == "error")
-            .group_by(ToolCall.tool_name)
-        )
-        tool_errors = tool_errors_result.all()
-        tool_error_distribution = {name: count for name, count in tool_errors}
+        tool_errors = await rollups.sum_metric_by_dimension(db, rollups.TOOL_ERROR)
+        tool_error_distribution = {name: count for name, count in tool_errors.items() if count > 0}
 
         # 最近7天每日工具调用数
+        hourly_calls = await rollups.hourly_totals(db, rollups.TOOL_CALLS, now - timedelta(days=7))
         daily_tool_calls = []
         for i in range(7):
             day_start = now - timedelta(days=i + 1)
             day_end = now - timedelta(days=i)
-
-            daily_count_result = await db.execute(
-                select(func.count(ToolCall.id)).filter(ToolCall.created_at >= day_start, ToolCall.created_at < day_end)
-            )
-            daily_count = daily_count_result.scalar() or 0
+            window_start, window_end = rollups.hour_bucket(day_start), rollups.hour_bucket(day_end)
+            daily_count = sum(count for bucket, count in hourly_calls.items() if window_start <= bucket < window_end)
 
             daily_tool_calls.append({"date": day_start.strftime("%Y-%m-%d"), "call_count": daily_count})
 
@@ -508,7 +515,7 @@ async def get_agent_analytics(
 ):
     """获取智能体分析（管理员权限）"""
     try:
-        from src.storage.db.models import Conversation, MessageFeedback, Message, ToolCall
+        from src.storage.db.models import Conversation
 
         # 获取所有智能体
         agents_result = await db.execute(
@@ -521,24 +528,15 @@ async def get_agent_analytics(
         total_agents = len(agents)
         agent_conversation_counts = [{"agent_id": agent_id, "conversation_count": count} for agent_id, count in agents]
 
-        # 智能体满意度统计
+        # 智能体满意度统计（反馈与工具调用按智能体预聚合，避免逐个智能体联表计数）
+        feedbacks_by_agent = await rollups.sum_metric_by_dimension(db, rollups.FEEDBACKS)
+        likes_by_agent = await rollups.sum_metric_by_dimension(db, rollups.FEEDBACK_LIKES)
+        tool_calls_by_agent = await rollups.sum_metric_by_dimension(db, rollups.AGENT_TOOL_CALLS)
+
         agent_satisfaction = []
         for agent_id, _ in agents:
-            total_feedbacks_result = await db.execute(
-                select(func.count(MessageFeedback.id))
-                .join(Message, MessageFeedback.message_id == Message.id)
-                .join(Conversation, Message.conversation_id == Conversation.id)
-                .filter(Conversation.agent_id == agent_id)
-            )
-            total_feedbacks = total_feedbacks_result.scalar() or 0
-
-            positive_feedbacks_result = await db.execute(
-                select(func.count(MessageFeedback.id))
-                .join(Message, MessageFeedback.message_id == Message.id)
-                .join(Conversation, Message.conversation_id == Conversation.id)
-                .filter(Conversation.agent_id == agent_id, MessageFeedback.rating == "like")
-            )
-            positive_feedbacks = positive_feedbacks_result.scalar() or 0
+            total_feedbacks = feedbacks_by_agent.get(agent_id, 0)
+            positive_feedbacks = likes_by_agent.get(agent_id, 0)
 
             satisfaction_rate = round((positive_feedbacks / total_feedbacks * 100), 2) if total_feedbacks > 0 else 100
 
@@ -549,13 +547,7 @@ async def get_agent_analytics(
         # 智能体工具使用统计
         agent_tool_usage = []
         for agent_id, _ in agents:
-            tool_usage_count_result = await db.execute(
-                select(func.count(ToolCall.id))
-                .join(Message, ToolCall.message_id == Message.id)
-                .join(Conversation, Message.conversation_id == Conversation.id)
-                .filter(Conversation.agent_id == agent_id)
-            )
-            tool_usage_count = tool_usage_count_result.scalar() or 0
+            tool_usage_count = tool_calls_by_agent.get(agent_id, 0)
 
             agent_tool_usage.append({"agent_id": agent_id, "tool_usage_count": tool_usage_count})
 
@@ -604,7 +596,7 @@ async def get_dashboard_stats(
     current_user: User = Depends(get_admin_user),
 ):
     """获取基础统计（管理员权限）"""
-    from src.storage.db.models import Conversation, Message, MessageFeedback
+    from src.storage.db.models import Conversation
 
     try:
         # Basic counts
@@ -616,20 +608,14 @@ async def get_dashboard_stats(
         )
         active_conversations = active_conversations_result.scalar() or 0
 
-        total_messages_result = await db.execute(select(func.count(Message.id)))
-        total_messages = total_messages_result.scalar() or 0
+        total_messages = await rollups.sum_metric(db, rollups.MESSAGES)
 
         total_users_result = await db.execute(select(func.count(User.id)).filter(User.is_deleted == 0))
         total_users = total_users_result.scalar() or 0
 
-        # Feedback statistics
-        total_feedbacks_result = await db.execute(select(func.count(MessageFeedback.id)))
-        total_feedbacks = total_feedbacks_result.scalar() or 0
-
-        like_count_result = await db.execute(
-            select(func.count(MessageFeedback.id)).filter(MessageFeedback.rating == "like")
-        )
-        like_count = like_count_result.scalar() or 0
+        # Feedback statistics (from rollups)
+        total_feedbacks = await rollups.sum_metric(db, rollups.FEEDBACKS)
+        like_count = await rollups.sum_metric(db, rollups.FEEDBACK_LIKES)
 
         # Calculate satisfaction rate
         satisfaction_rate = round((like_count / total_feedbacks * 100), 2) if total_feedbacks > 0 else 100
@@ -672,12 +658,18 @@ class FeedbackListItem(BaseModel):
 
 @dashboard.get("/feedbacks", response_model=list[FeedbackListItem])
 async def get_all_feedbacks(
+    response: Response,
     rating: str | None = None,
     agent_id: str | None = None,
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_admin_user),
 ):
-    """获取所有反馈记录（管理员权限）"""
+    """获取反馈记录（管理员权限）
+
+    不传 limit 时返回全部记录；分页时下一页游标通过响应头 X-Next-Cursor 返回
+    """
     from src.storage.db.models import MessageFeedback, Message, Conversation, User
 
     try:
@@ -699,12 +691,20 @@ async def get_all_feedbacks(
         if agent_id:
             query = query.filter(Conversation.agent_id == agent_id)
 
-        # Order by creation time (most recent first)
-        query = query.order_by(MessageFeedback.created_at.desc())
+        # Order by creation time (most recent first), keyset-paginated on (created_at, id)
+        if cursor:
+            query = query.filter(pagination.keyset_before(MessageFeedback.created_at, MessageFeedback.id, cursor))
+        query = query.order_by(MessageFeedback.created_at.desc(), MessageFeedback.id.desc())
+        if limit:
+            query = query.limit(limit)
 
         results = await db.execute(query)
         results = results.all()
 
+        feedbacks = [feedback for feedback, *_ in results]
+        if next_cursor := pagination.next_cursor(feedbacks, limit, sort_attr="created_at"):
+            response.headers["X-Next-Cursor"] = next_cursor
+
         # Debug logging (privacy-safe)
         logger.info(f"Found {len(results)} feedback records")
         # Removed sensitive user data from logs for privacy compliance
@@ -725,6 +725,8 @@ async def get_all_feedbacks(
             }
             for feedback, message, conversation, user in results
         ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting feedbacks: {e}")
         logger.error(traceback.format_exc())
@@ -756,7 +758,7 @@ async def get_call_timeseries_stats(
 ):
     """获取调用分析时间序列统计（管理员权限）"""
     try:
-        from src.storage.db.models import Conversation, Message, ToolCall
+        from src.storage.db.models import Conversation
 
         # 计算时间范围（使用北京时间 UTC+8）
         now = utc_now()
@@ -766,7 +768,7 @@ async def get_call_timeseries_stats(
             intervals = 14
             # 包含当前小时：从13小时前开始
             start_time = now - timedelta(hours=intervals - 1)
-            group_format = func.strftime("%Y-%m-%d %H:00", func.datetime(Message.created_at, "+8 hours"))
+            group_format = func.strftime("%Y-%m-%d %H:00", func.datetime(DashboardRollup.bucket, "+8 hours"))
             base_local_time = ensure_shanghai(start_time)
         elif time_range == "14weeks":
             intervals = 14
@@ -775,28 +777,27 @@ async def get_call_timeseries_stats(
             local_start = local_start - timedelta(days=local_start.weekday())
             local_start = local_start.replace(hour=0, minute=0, second=0, microsecond=0)
             start_time = local_start.astimezone(UTC)
-            group_format = func.strftime("%Y-%W", func.datetime(Message.created_at, "+8 hours"))
+            group_format = func.strftime("%Y-%W", func.datetime(DashboardRollup.bucket, "+8 hours"))
             base_local_time = local_start
         else:  # 14days (default)
             intervals = 14
             # 包含当前天：从13天前开始
             start_time = now - timedelta(days=intervals - 1)
-            group_format = func.strftime("%Y-%m-%d", func.datetime(Message.created_at, "+8 hours"))
+            group_format = func.strftime("%Y-%m-%d", func.datetime(DashboardRollup.bucket, "+8 hours"))
             base_local_time = ensure_shanghai(start_time)
 
-        # 根据类型查询数据
+        # 根据类型查询数据（models/tokens/tools 读取小时聚合，agents 读取对话表）
+        rollup_start = rollups.hour_bucket(start_time)
         if type == "models":
-            # 模型调用统计（基于消息数量，按模型分组）
-            # 从message的extra_metadata中提取模型信息
+            # 模型调用统计（assistant 消息数，按模型分组；未知模型维度为空）
             query_result = await db.execute(
                 select(
                     group_format.label("date"),
-                    func.count(Message.id).label("count"),
-                    func.json_extract(Message.extra_metadata, "$.response_metadata.model_name").label("category"),
+                    func.sum(DashboardRollup.value).label("count"),
+                    func.nullif(DashboardRollup.dimension, "").label("category"),
                 )
-                .filter(Message.role == "assistant", Message.created_at >= start_time)
-                .filter(Message.extra_metadata.isnot(None))
-                .group_by(group_format, func.json_extract(Message.extra_metadata, "$.response_metadata.model_name"))
+                .filter(DashboardRollup.metric == rollups.MODEL_CALLS, DashboardRollup.bucket >= rollup_start)
+                .group_by(group_format, DashboardRollup.dimension)
                 .order_by(group_format)
             )
             query = query_result.all()
@@ -824,76 +825,37 @@ async def get_call_timeseries_stats(
             query = query_result.all()
         elif type == "tokens":
             # Token消耗统计（区分input/output tokens）
-            # 先查询input tokens
-            from sqlalchemy import literal
-
-            input_query_result = await db.execute(
-                select(
-                    group_format.label("date"),
-                    func.sum(
-                        func.coalesce(func.json_extract(Message.extra_metadata, "$.usage_metadata.input_tokens"), 0)
-                    ).label("count"),
-                    literal("input_tokens").label("category"),
-                )
-                .filter(
-                    Message.created_at >= start_time,
-                    Message.extra_metadata.isnot(None),
-                    func.json_extract(Message.extra_metadata, "$.usage_metadata").isnot(None),
-                )
-                .group_by(group_format)
-                .order_by(group_format)
-            )
-            input_query = input_query_result.all()
-
-            # 查询output tokens
-            output_query_result = await db.execute(
+            query_result = await db.execute(
                 select(
                     group_format.label("date"),
-                    func.sum(
-                        func.coalesce(func.json_extract(Message.extra_metadata, "$.usage_metadata.output_tokens"), 0)
-                    ).label("count"),
-                    literal("output_tokens").label("category"),
+                    func.sum(DashboardRollup.value).label("count"),
+                    DashboardRollup.metric.label("category"),
                 )
                 .filter(
-                    Message.created_at >= start_time,
-                    Message.extra_metadata.isnot(None),
-                    func.json_extract(Message.extra_metadata, "$.usage_metadata").isnot(None),
+                    DashboardRollup.metric.in_([rollups.INPUT_TOKENS, rollups.OUTPUT_TOKENS]),
+                    DashboardRollup.bucket >= rollup_start,
                 )
-                .group_by(group_format)
+                .group_by(group_format, DashboardRollup.metric)
                 .order_by(group_format)
             )
-            output_query = output_query_result.all()
-
-            # 合并两个查询结果
-            input_results = input_query
-            output_results = output_query
-            results = input_results + output_results
+            query = query_result.all()
         elif type == "tools":
             # 工具调用统计（按工具名称分组）
-            # 为工具调用创建独立的时间格式化器
-            if time_range == "14hours":
-                tool_group_format = func.strftime("%Y-%m-%d %H:00", func.datetime(ToolCall.created_at, "+8 hours"))
-            elif time_range == "14weeks":
-                tool_group_format = func.strftime("%Y-%W", func.datetime(ToolCall.created_at, "+8 hours"))
-            else:  # 14days
-                tool_group_format = func.strftime("%Y-%m-%d", func.datetime(ToolCall.created_at, "+8 hours"))
-
             query_result = await db.execute(
                 select(
-                    tool_group_format.label("date"),
-                    func.count(ToolCall.id).label("count"),
-                    ToolCall.tool_name.label("category"),
+                    group_format.label("date"),
+                    func.sum(DashboardRollup.value).label("count"),
+                    DashboardRollup.dimension.label("category"),
                 )
-                .filter(ToolCall.created_at >= start_time)
-                .group_by(tool_group_format, ToolCall.tool_name)
-                .order_by(tool_group_format)
+                .filter(DashboardRollup.metric == rollups.TOOL_CALLS, DashboardRollup.bucket >= rollup_start)
+                .group_by(group_format, DashboardRollup.dimension)
+                .order_by(group_format)
             )
             query = query_result.all()
         else:
             raise HTTPException(status_code=422, detail=f"Invalid type: {type}")
 
-        if type != "tokens":
-            results = query
+        results = query
 
         # 处理堆叠数据格式
         # 首先收集所有类别
@@ -971,10 +933,7 @@ async def get_call_timeseries_stats(
         # 计算统计指标
         if type == "tools":
             # 对于工具调用，显示所有时间的总数（与ToolStatsComponent保持一致）
-            from src.storage.db.models import ToolCall
-
-            total_count_result = await db.execute(select(func.count(ToolCall.id)))
-            total_count = total_count_result.scalar() or 0
+            total_count = await rollups.sum_metric(db, rollups.TOOL_CALLS)
         else:
             # 其他类型使用时间序列数据的总和
             total_count = sum(item["total"] for item in data)
@@ -15,6 +15,7 @@ from server.utils.auth_middleware import get_superadmin_user, get_db
 from server.utils.auth_utils import AuthUtils
 from server.utils.common_utils import log_operation
 from server.utils.user_utils import is_valid_phone_number
+from src import knowledge_base
 
 # 创建路由器
 department = APIRouter(prefix="/departments", tags=["department"])
@@ -218,6 +219,7 @@ async def update_department(
 
     await db.commit()
     await db.refresh(department)
+    knowledge_base.invalidate_access_cache()
 
     # 记录操作
     await log_operation(db, current_user.id, "更新部门", f"更新部门: {department.name}", request)
@@ -260,6 +262,7 @@ async def delete_department(
     department_name = department.name
     await db.delete(department)
     await db.commit()
+    knowledge_base.invalidate_access_cache()
 
     # 记录操作
     await log_operation(db, current_user.id, "删除部门", f"删除部门: {department_name}", request)
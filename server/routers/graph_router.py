@@ -1,3 +1,4 @@
+import asyncio
 import traceback
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query
@@ -60,8 +61,8 @@ async def get_graphs(current_user: User = Depends(get_admin_user)):
     try:
         graphs = []
 
-        # 1. 获取默认 Neo4j 图谱信息 (Upload 类型)
-        neo4j_info = graph_base.get_graph_info()
+        # 1. 获取默认 Neo4j 图谱信息 (Upload 类型)，同步驱动查询放到线程中执行，避免阻塞事件循环
+        neo4j_info = await asyncio.to_thread(graph_base.get_graph_info)
         if neo4j_info:
             # 直接使用 Upload 适配器的默认 metadata
             from src.knowledge.adapters.upload import UploadGraphAdapter
@@ -190,7 +191,7 @@ async def get_graph_stats(
             return {"success": True, "data": stats_data}
         else:
             # Neo4j stats (直接管理的图谱)
-            info = graph_base.get_graph_info(graph_name=db_id)
+            info = await asyncio.to_thread(graph_base.get_graph_info, graph_name=db_id)
             if not info:
                 raise HTTPException(status_code=404, detail="Graph info not found")
 
@@ -235,7 +236,7 @@ async def get_neo4j_node(
 async def get_neo4j_info(current_user: User = Depends(get_admin_user)):
     """获取Neo4j图数据库信息"""
     try:
-        graph_info = graph_base.get_graph_info()
+        graph_info = await asyncio.to_thread(graph_base.get_graph_info)
         if graph_info is None:
             raise HTTPException(status_code=400, detail="图数据库获取出错")
         return {"success": True, "data": graph_info}
@@ -9,9 +9,10 @@ from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, Reques
 from fastapi.responses import FileResponse
 from starlette.responses import StreamingResponse
 
-from server.services.tasker import TaskContext, tasker
+from server.services.tasker import TaskContext, batch_priority, tasker
 from server.utils.auth_middleware import get_admin_user
 from src import config, knowledge_base
+from src.knowledge.base import FileStatus
 from src.knowledge.indexing import SUPPORTED_FILE_EXTENSIONS, is_supported_file_extension, process_file_to_markdown
 from src.knowledge.utils import calculate_content_hash
 from src.models.embed import test_all_embedding_models_status, test_embedding_model_status
@@ -22,6 +23,11 @@ from src.utils import logger
 
 knowledge = APIRouter(prefix="/knowledge", tags=["knowledge"])
 
+# 批量入库时每批提交的文档数量（LightRAG 会在批内并行处理文档）
+INDEX_BATCH_SIZE = 8
+# 文档处理任务每处理多少个文件保存一次断点（中断恢复后最多重做这么多个文件）
+INGEST_CHECKPOINT_INTERVAL = 20
+
 
 # =============================================================================
 # === Helper Functions ===
@@ -169,6 +175,337 @@ Please generate a reasonable mindmap structure with English category names."""
         logger.error(f"Failed to auto-generate mindmap for {db_id}: {e}")
 
 
+def _get_file_meta(db_id: str, file_id: str) -> dict:
+    return knowledge_base.get_kb(db_id).files_meta.get(file_id) or {}
+
+
+def _task_file_ids(db_id: str, task_id: str) -> list[str]:
+    """本任务添加的文件记录，按添加顺序排列，断点恢复时各阶段的游标对应同一列表"""
+    files_meta = knowledge_base.get_kb(db_id).files_meta
+    task_files = [(file_id, meta) for file_id, meta in list(files_meta.items()) if meta.get("task_id") == task_id]
+    task_files.sort(key=lambda entry: entry[1].get("created_at") or "")
+    return [file_id for file_id, _ in task_files]
+
+
+async def _remove_orphan_file_records(db_id: str, task_id: str, recorded_count: int) -> None:
+    """删除上次断点之后、中断之前添加的文件记录（断点之前成功添加的前 recorded_count 个保留），恢复时重新添加"""
+    orphan_ids = _task_file_ids(db_id, task_id)[recorded_count:]
+    for file_id in orphan_ids:
+        await knowledge_base.delete_file(db_id, file_id)
+    if orphan_ids:
+        logger.info(f"Removed {len(orphan_ids)} orphan file records of interrupted ingest task in {db_id}")
+
+
+def _collect_file_results(db_id: str, file_ids: list[str], failed_items: list[dict]) -> list[dict]:
+    """任务结束时由文件记录的状态汇总每个文件的处理结果，断点中只记录无法由文件状态体现的失败项"""
+    failed_file_ids = {failed.get("file_id") for failed in failed_items}
+    results = list(failed_items)
+    for file_id in file_ids:
+        if file_id in failed_file_ids:
+            continue
+        file_meta = _get_file_meta(db_id, file_id)
+        status = file_meta.get("status")
+        if status == FileStatus.ERROR_PARSING:
+            results.append(
+                {
+                    "item": file_meta.get("path"),
+                    "status": "failed",
+                    "error": f"解析失败: {file_meta.get('error', '')}",
+                    "error_type": "parse_failed",
+                }
+            )
+        elif status == FileStatus.ERROR_INDEXING:
+            results.append(
+                {
+                    "item": file_meta.get("path"),
+                    "status": "failed",
+                    "error": f"入库失败: {file_meta.get('error', '')}",
+                    "error_type": "index_failed",
+                }
+            )
+        elif file_meta:
+            results.append(dict(file_meta))
+    return results
+
+
+async def run_ingest_task(context: TaskContext):
+    """知识库文档处理任务（添加记录 -> 解析 -> 可选入库）
+
+    断点只保存阶段与游标；本任务添加的文件记录带有 task_id，各阶段的文件列表与最终结果都由文件记录推导，
+    服务重启后从断点继续，已完成的文件不会重复处理。
+    """
+    payload = context.payload
+    db_id = payload["db_id"]
+    items = payload["items"]
+    params = payload["params"]
+    content_type = payload.get("content_type", "file")
+    operator_id = payload.get("operator_id")
+
+    # 自动入库参数
+    auto_index = params.get("auto_index", False)
+    indexing_params = {
+        "chunk_size": params.get("chunk_size", 1000),
+        "chunk_overlap": params.get("chunk_overlap", 200),
+        "qa_separator": params.get("qa_separator", ""),
+    }
+
+    checkpoint = context.checkpoint
+    phase = checkpoint.get("phase", 1)
+    cursor = checkpoint.get("cursor", 0)
+    # 没有文件记录可体现的失败项（添加记录失败、入库参数更新失败），正常情况下很少
+    failed_items: list[dict] = checkpoint.get("failed_items", [])
+
+    async def save_checkpoint(next_phase: int, next_cursor: int) -> None:
+        await context.save_checkpoint(
+            {
+                "phase": next_phase,
+                "cursor": next_cursor,
+                "failed_items": failed_items,
+            }
+        )
+
+    if checkpoint:
+        # 触发中断遗留的 parsing/indexing 状态修复，使这些文件可被重新处理
+        knowledge_base.get_database_info(db_id)
+        if phase == 1:
+            # 断点之前的文件中，添加失败的都记录在 failed_items 中，其余各对应一条文件记录
+            await _remove_orphan_file_records(db_id, context.task_id, cursor - len(failed_items))
+        await context.set_message(f"从断点恢复：第 {phase} 阶段")
+    else:
+        await context.set_message("任务初始化")
+        await context.set_progress(5.0, "准备处理文档")
+        await save_checkpoint(1, 0)
+
+    total = len(items)
+
+    try:
+        # ========== 第一阶段：批量添加文件记录 ==========
+        if phase == 1:
+            await context.set_message("第一阶段：添加文件记录")
+            for idx in range(cursor, total):
+                item = items[idx]
+                await context.raise_if_cancelled()
+
+                # 第一阶段进度：5% ~ 30%
+                progress = 5.0 + ((idx + 1) / total) * 25.0
+                await context.set_progress(progress, f"[1/2] 添加记录 {idx + 1}/{total}")
+
+                try:
+                    # 1. Add file record (UPLOADED)
+                    await knowledge_base.add_file_record(
+                        db_id, item, params=params, operator_id=operator_id, task_id=context.task_id
+                    )
+                except Exception as add_error:
+                    logger.error(f"添加文件记录失败 {item}: {add_error}")
+                    error_type = "timeout" if isinstance(add_error, TimeoutError) else "add_failed"
+                    error_msg = "添加超时" if isinstance(add_error, TimeoutError) else "添加记录失败"
+                    failed_items.append(
+                        {
+                            "item": item,
+                            "status": "failed",
+                            "error": f"{error_msg}: {str(add_error)}",
+                            "error_type": error_type,
+                        }
+                    )
+
+                if (idx + 1) % INGEST_CHECKPOINT_INTERVAL == 0:
+                    await save_checkpoint(1, idx + 1)
+
+            phase, cursor = 2, 0
+            await save_checkpoint(phase, cursor)
+
+        # ========== 第二阶段：批量解析文件 ==========
+        if phase == 2:
+            await context.set_message("第二阶段：解析文件")
+            # 计算解析阶段的进度范围
+            parse_progress_range = 30.0 if not auto_index else 25.0
+            added = _task_file_ids(db_id, context.task_id)
+
+            for idx in range(cursor, len(added)):
+                file_id = added[idx]
+                await context.raise_if_cancelled()
+
+                # 第二阶段进度：25%~55% 或 30%~60%
+                progress = parse_progress_range + ((idx + 1) / len(added)) * 30.0
+                await context.set_progress(progress, f"[2/2] 解析文件 {idx + 1}/{len(added)}")
+
+                try:
+                    # 2. Parse file (PARSING -> PARSED)；断点之后、中断之前已解析完成的文件直接复用结果
+                    if _get_file_meta(db_id, file_id).get("status") != FileStatus.PARSED:
+                        await knowledge_base.parse_file(db_id, file_id, operator_id=operator_id)
+                except Exception as parse_error:
+                    # 失败状态与原因记录在文件元数据（ERROR_PARSING）中，结束时统一汇总
+                    logger.error(f"解析文件失败 (file_id={file_id}): {parse_error}")
+
+                if (idx + 1) % INGEST_CHECKPOINT_INTERVAL == 0:
+                    await save_checkpoint(2, idx + 1)
+
+            phase, cursor = 3, 0
+            await save_checkpoint(phase, cursor)
+
+        # ========== 第三阶段：自动入库 ==========
+        if phase == 3 and auto_index:
+            await context.set_message("第三阶段：自动入库")
+            # 解析成功的文件（恢复时已入库或入库失败的文件仍保留在列表中，保证游标对应同一列表）
+            indexable_statuses = {
+                FileStatus.PARSED,
+                FileStatus.INDEXING,
+                FileStatus.INDEXED,
+                FileStatus.ERROR_INDEXING,
+            }
+            index_ids = [
+                file_id
+                for file_id in _task_file_ids(db_id, context.task_id)
+                if _get_file_meta(db_id, file_id).get("status") in indexable_statuses
+            ]
+            total_parsed = len(index_ids)
+
+            for start in range(cursor, total_parsed, INDEX_BATCH_SIZE):
+                await context.raise_if_cancelled()
+                batch = index_ids[start : start + INDEX_BATCH_SIZE]
+
+                # 第三阶段进度：55%~95% 或 60%~95%
+                progress = 55.0 + ((start + len(batch)) / total_parsed) * 40.0
+                await context.set_progress(progress, f"[3/3] 入库文件 {start + len(batch)}/{total_parsed}")
+
+                # 1. 更新入库参数
+                batch_file_ids = []
+                for file_id in batch:
+                    try:
+                        await knowledge_base.update_file_params(
+                            db_id, file_id, indexing_params, operator_id=operator_id
+                        )
+                        batch_file_ids.append(file_id)
+                    except Exception as index_error:
+                        item = _get_file_meta(db_id, file_id).get("path")
+                        logger.error(f"自动入库失败 {item} (file_id={file_id}): {index_error}")
+                        failed_items.append(
+                            {
+                                "item": item,
+                                "file_id": file_id,
+                                "status": "failed",
+                                "error": f"入库失败: {str(index_error)}",
+                                "error_type": "index_failed",
+                            }
+                        )
+
+                # 2. 批量执行入库（重复入库是幂等的，中断的批次恢复后整批重做；失败状态记录在文件元数据中）
+                if batch_file_ids:
+                    await knowledge_base.index_files(db_id, batch_file_ids, operator_id=operator_id)
+
+                await save_checkpoint(3, start + len(batch))
+
+    except asyncio.CancelledError:
+        await context.set_progress(100.0, "任务已取消")
+        raise
+    except Exception as task_error:
+        # 处理整体任务的其他异常（如内存不足、网络错误等）
+        logger.exception(f"Task processing failed: {task_error}")
+        await context.set_progress(100.0, f"任务处理失败: {str(task_error)}")
+        # 注意：不需要手动标记未处理的文件为失败，因为：
+        # 1. 已处理文件的状态（成功/失败）都记录在文件元数据中
+        # 2. 未处理的文件不会出现在任务结果中，前端会正确显示
+        # 3. 用户可以重新提交未处理的文件
+        raise
+
+    processed_items = _collect_file_results(db_id, _task_file_ids(db_id, context.task_id), failed_items)
+
+    item_type = "URL" if content_type == "url" else "文件"
+    # Check for failed status (including ERROR_PARSING)
+    failed_count = len([_p for _p in processed_items if "error" in _p or _p.get("status") == "failed"])
+
+    summary = {
+        "db_id": db_id,
+        "item_type": item_type,
+        "submitted": len(processed_items),
+        "failed": failed_count,
+    }
+    message = f"{item_type}处理完成，失败 {failed_count} 个" if failed_count else f"{item_type}处理完成"
+    await context.set_result(summary | {"items": processed_items})
+    await context.set_progress(100.0, message)
+
+    # Auto-generate mindmap if files were successfully processed
+    success_count = len(processed_items) - failed_count
+    if success_count > 0:
+        try:
+            logger.info(f"Auto-generating mindmap for database {db_id} after processing {success_count} files")
+            asyncio.create_task(_auto_generate_mindmap(db_id))
+        except Exception as mindmap_error:
+            logger.warning(f"Failed to trigger auto mindmap generation: {mindmap_error}")
+            # Don't fail the main task if mindmap generation fails
+
+    return summary | {"items": processed_items}
+
+
+async def run_index_task(context: TaskContext):
+    """文档入库任务，每批入库后保存断点，服务重启后从下一批继续
+
+    断点只保存游标和参数更新失败的文件，入库结果在结束时由文件元数据的状态汇总。
+    """
+    payload = context.payload
+    db_id = payload["db_id"]
+    file_ids = payload["file_ids"]
+    params = payload.get("params") or {}
+    operator_id = payload.get("operator_id")
+
+    checkpoint = context.checkpoint
+    total = len(file_ids)
+    # 参数更新失败的文件（不参与入库）
+    failed_items: list[dict] = checkpoint.get("failed_items", [])
+
+    try:
+        if checkpoint:
+            knowledge_base.get_database_info(db_id)
+            cursor = checkpoint["cursor"]
+        else:
+            await context.set_message("任务初始化")
+            await context.set_progress(5.0, "准备入库文档")
+
+            # Update params if provided
+            if params:
+                for file_id in file_ids:
+                    try:
+                        await knowledge_base.update_file_params(db_id, file_id, params, operator_id=operator_id)
+                    except Exception as e:
+                        logger.error(f"Failed to update params for {file_id}: {e}")
+                        failed_items.append(
+                            {"file_id": file_id, "status": "failed", "error": f"参数更新失败: {str(e)}"}
+                        )
+            cursor = 0
+
+        # Skip files that failed param update
+        param_update_failed = {failed["file_id"] for failed in failed_items}
+        pending_ids = [file_id for file_id in file_ids if file_id not in param_update_failed]
+
+        for start in range(cursor, len(pending_ids), INDEX_BATCH_SIZE):
+            await context.raise_if_cancelled()
+            batch = pending_ids[start : start + INDEX_BATCH_SIZE]
+
+            progress = 5.0 + ((start + len(batch)) / total) * 90.0
+            await context.set_progress(progress, f"正在入库第 {start + 1}-{start + len(batch)}/{total} 个文档")
+
+            await knowledge_base.index_files(db_id, batch, operator_id=operator_id)
+            await context.save_checkpoint({"cursor": start + len(batch), "failed_items": failed_items})
+
+    except Exception as e:
+        logger.exception(f"Index task failed: {e}")
+        raise
+
+    processed_items = list(failed_items)
+    for file_id in pending_ids:
+        file_meta = _get_file_meta(db_id, file_id)
+        if file_meta.get("status") == FileStatus.ERROR_INDEXING:
+            processed_items.append({"file_id": file_id, "status": "failed", "error": file_meta.get("error", "")})
+        else:
+            processed_items.append(dict(file_meta) or {"file_id": file_id, "status": "failed", "error": "文件不存在"})
+
+    failed_count = len([p for p in processed_items if "error" in p])
+    message = f"入库完成，失败 {failed_count} 个"
+    await context.set_result({"items": processed_items})
+    await context.set_progress(100.0, message)
+    return {"items": processed_items}
+
+
 # =============================================================================
 # === API Endpoints ===
 # =============================================================================
@@ -316,6 +653,12 @@ async def update_database_info(
             llm_info,
             additional_params=additional_params,  # Pass the dict to the manager
         )
+
+        # 检索工具名取自知识库名称，重命名后需要重新加载所有智能体
+        from src.agents import agent_manager
+
+        await agent_manager.reload_all()
+
         return {"message": "更新成功", "database": database}
     except Exception as e:
         logger.error(f"更新数据库失败 {e}, {traceback.format_exc()}")
@@ -379,13 +722,6 @@ async def add_documents(
     logger.debug(f"Add documents for db_id {db_id}: {items} {params=}")
 
     content_type = params.get("content_type", "file")
-    # 自动入库参数
-    auto_index = params.get("auto_index", False)
-    indexing_params = {
-        "chunk_size": params.get("chunk_size", 1000),
-        "chunk_overlap": params.get("chunk_overlap", 200),
-        "qa_separator": params.get("qa_separator", ""),
-    }
 
     # 禁止 URL 解析与入库
     if content_type == "url":
@@ -401,148 +737,6 @@ async def add_documents(
             except ValueError as e:
                 raise HTTPException(status_code=403, detail=str(e))
 
-    async def run_ingest(context: TaskContext):
-        await context.set_message("任务初始化")
-        await context.set_progress(5.0, "准备处理文档")
-
-        total = len(items)
-        processed_items = []
-
-        # 存储第一阶段成功添加的文件记录 {item: (file_id, file_meta)}
-        added_files = {}
-
-        try:
-            # ========== 第一阶段：批量添加文件记录 ==========
-            await context.set_message("第一阶段：添加文件记录")
-            for idx, item in enumerate(items, 1):
-                await context.raise_if_cancelled()
-
-                # 第一阶段进度：5% ~ 30%
-                progress = 5.0 + (idx / total) * 25.0
-                await context.set_progress(progress, f"[1/2] 添加记录 {idx}/{total}")
-
-                try:
-                    # 1. Add file record (UPLOADED)
-                    file_meta = await knowledge_base.add_file_record(
-                        db_id, item, params=params, operator_id=current_user.id
-                    )
-                    file_id = file_meta["file_id"]
-                    added_files[item] = (file_id, file_meta)
-                except Exception as add_error:
-                    logger.error(f"添加文件记录失败 {item}: {add_error}")
-                    error_type = "timeout" if isinstance(add_error, TimeoutError) else "add_failed"
-                    error_msg = "添加超时" if isinstance(add_error, TimeoutError) else "添加记录失败"
-                    processed_items.append(
-                        {
-                            "item": item,
-                            "status": "failed",
-                            "error": f"{error_msg}: {str(add_error)}",
-                            "error_type": error_type,
-                        }
-                    )
-
-            # ========== 第二阶段：批量解析文件 ==========
-            await context.set_message("第二阶段：解析文件")
-            parse_success_count = 0
-            # 计算解析阶段的进度范围
-            parse_progress_range = 30.0 if not auto_index else 25.0
-
-            for idx, (item, (file_id, add_file_meta)) in enumerate(added_files.items(), 1):
-                await context.raise_if_cancelled()
-
-                # 第二阶段进度：25%~55% 或 30%~60%
-                progress = parse_progress_range + (idx / len(added_files)) * 30.0
-                await context.set_progress(progress, f"[2/2] 解析文件 {idx}/{len(added_files)}")
-
-                try:
-                    # 2. Parse file (PARSING -> PARSED)
-                    file_meta = await knowledge_base.parse_file(db_id, file_id, operator_id=current_user.id)
-                    processed_items.append(file_meta)
-                    parse_success_count += 1
-                except Exception as parse_error:
-                    logger.error(f"解析文件失败 {item} (file_id={file_id}): {parse_error}")
-                    error_type = "timeout" if isinstance(parse_error, TimeoutError) else "parse_failed"
-                    error_msg = "解析超时" if isinstance(parse_error, TimeoutError) else "解析失败"
-                    processed_items.append(
-                        {
-                            "item": item,
-                            "status": "failed",
-                            "error": f"{error_msg}: {str(parse_error)}",
-                            "error_type": error_type,
-                        }
-                    )
-
-            # ========== 第三阶段：自动入库 ==========
-            if auto_index:
-                await context.set_message("第三阶段：自动入库")
-                parsed_files = [(item, data) for item, data in added_files.items() if data[1].get("status") == "parsed"]
-                total_parsed = len(parsed_files)
-
-                for idx, (item, (file_id, file_meta)) in enumerate(parsed_files, 1):
-                    await context.raise_if_cancelled()
-
-                    # 第三阶段进度：55%~95% 或 60%~95%
-                    progress = 55.0 + (idx / total_parsed) * 40.0
-                    await context.set_progress(progress, f"[3/3] 入库文件 {idx}/{total_parsed}")
-
-                    try:
-                        # 1. 更新入库参数
-                        await knowledge_base.update_file_params(
-                            db_id, file_id, indexing_params, operator_id=current_user.id
-                        )
-                        # 2. 执行入库
-                        result = await knowledge_base.index_file(db_id, file_id, operator_id=current_user.id)
-                        processed_items.append(result)
-                    except Exception as index_error:
-                        logger.error(f"自动入库失败 {item} (file_id={file_id}): {index_error}")
-                        processed_items.append(
-                            {
-                                "item": item,
-                                "status": "failed",
-                                "error": f"入库失败: {str(index_error)}",
-                                "error_type": "index_failed",
-                            }
-                        )
-
-        except asyncio.CancelledError:
-            await context.set_progress(100.0, "任务已取消")
-            raise
-        except Exception as task_error:
-            # 处理整体任务的其他异常（如内存不足、网络错误等）
-            logger.exception(f"Task processing failed: {task_error}")
-            await context.set_progress(100.0, f"任务处理失败: {str(task_error)}")
-            # 注意：不需要手动标记未处理的文件为失败，因为：
-            # 1. 内层异常处理已记录所有处理过的文件（成功/失败）
-            # 2. 未处理的文件没有进入 processed_items，前端会正确显示
-            # 3. 用户可以重新提交未处理的文件
-            raise
-
-        item_type = "URL" if content_type == "url" else "文件"
-        # Check for failed status (including ERROR_PARSING)
-        failed_count = len([_p for _p in processed_items if "error" in _p or _p.get("status") == "failed"])
-
-        summary = {
-            "db_id": db_id,
-            "item_type": item_type,
-            "submitted": len(processed_items),
-            "failed": failed_count,
-        }
-        message = f"{item_type}处理完成，失败 {failed_count} 个" if failed_count else f"{item_type}处理完成"
-        await context.set_result(summary | {"items": processed_items})
-        await context.set_progress(100.0, message)
-        
-        # Auto-generate mindmap if files were successfully processed
-        success_count = len(processed_items) - failed_count
-        if success_count > 0:
-            try:
-                logger.info(f"Auto-generating mindmap for database {db_id} after processing {success_count} files")
-                asyncio.create_task(_auto_generate_mindmap(db_id))
-            except Exception as mindmap_error:
-                logger.warning(f"Failed to trigger auto mindmap generation: {mindmap_error}")
-                # Don't fail the main task if mindmap generation fails
-        
-        return summary | {"items": processed_items}
-
     try:
         database = knowledge_base.get_database_info(db_id)
         task = await tasker.enqueue(
@@ -553,8 +747,11 @@ async def add_documents(
                 "items": items,
                 "params": params,
                 "content_type": content_type,
+                "operator_id": current_user.id,
             },
-            coroutine=run_ingest,
+            handler="server.routers.knowledge_router:run_ingest_task",
+            priority=batch_priority(len(items)),
+            local_only=True,
         )
         return {
             "message": "任务已提交，请在任务中心查看进度",
@@ -608,6 +805,7 @@ async def parse_documents(db_id: str, file_ids: list[str] = Body(...), current_u
             task_type="knowledge_parse",
             payload={"db_id": db_id, "file_ids": file_ids},
             coroutine=run_parse,
+            priority=batch_priority(len(file_ids)),
         )
         return {"message": "解析任务已提交", "status": "queued", "task_id": task.id}
     except Exception as e:
@@ -627,64 +825,15 @@ async def index_documents(
     # extract operator_id safely before background task
     operator_id = current_user.id
 
-    async def run_index(context: TaskContext):
-        await context.set_message("任务初始化")
-        await context.set_progress(5.0, "准备入库文档")
-
-        total = len(file_ids)
-        processed_items = []
-
-        # Track files that failed param update
-        param_update_failed = set()
-
-        try:
-            # Update params if provided
-            if params:
-                for file_id in file_ids:
-                    try:
-                        await knowledge_base.update_file_params(db_id, file_id, params, operator_id=operator_id)
-                    except Exception as e:
-                        logger.error(f"Failed to update params for {file_id}: {e}")
-                        param_update_failed.add(file_id)
-                        processed_items.append(
-                            {"file_id": file_id, "status": "failed", "error": f"参数更新失败: {str(e)}"}
-                        )
-
-            for idx, file_id in enumerate(file_ids, 1):
-                await context.raise_if_cancelled()
-
-                # Skip files that failed param update
-                if file_id in param_update_failed:
-                    logger.debug(f"Skipping {file_id} due to param update failure")
-                    continue
-
-                progress = 5.0 + (idx / total) * 90.0
-                await context.set_progress(progress, f"正在入库第 {idx}/{total} 个文档")
-
-                try:
-                    result = await knowledge_base.index_file(db_id, file_id, operator_id=operator_id)
-                    processed_items.append(result)
-                except Exception as e:
-                    logger.error(f"Index failed for {file_id}: {e}")
-                    processed_items.append({"file_id": file_id, "status": "failed", "error": str(e)})
-
-        except Exception as e:
-            logger.exception(f"Index task failed: {e}")
-            raise
-
-        failed_count = len([p for p in processed_items if "error" in p])
-        message = f"入库完成，失败 {failed_count} 个"
-        await context.set_result({"items": processed_items})
-        await context.set_progress(100.0, message)
-        return {"items": processed_items}
-
     try:
         database = knowledge_base.get_database_info(db_id)
         task = await tasker.enqueue(
             name=f"文档入库 ({database['name']})",
             task_type="knowledge_index",
-            payload={"db_id": db_id, "file_ids": file_ids, "params": params},
-            coroutine=run_index,
+            payload={"db_id": db_id, "file_ids": file_ids, "params": params, "operator_id": operator_id},
+            handler="server.routers.knowledge_router:run_index_task",
+            priority=batch_priority(len(file_ids)),
+            local_only=True,
         )
         return {"message": "入库任务已提交", "status": "queued", "task_id": task.id}
     except Exception as e:
@@ -15,6 +15,7 @@ from src.services.mcp_service import (
     toggle_tool_enabled,
     update_mcp_server,
 )
+from src.services.mcp_tool_wrapper import get_tool_call_metrics, reset_tool_call_metrics
 from src.storage.db.models import User
 from src.utils import logger
 from server.utils.auth_middleware import get_admin_user, get_db
@@ -39,6 +40,7 @@ class CreateMcpServerRequest(BaseModel):
     sse_read_timeout: int | None = Field(None, description="SSE 读取超时（秒）")
     tags: list | None = Field(None, description="标签数组")
     icon: str | None = Field(None, description="图标（emoji）")
+    cacheable_tools: list | None = Field(None, description="可缓存结果的工具名称列表（幂等、只读工具）")
 
 
 class UpdateMcpServerRequest(BaseModel):
@@ -52,6 +54,7 @@ class UpdateMcpServerRequest(BaseModel):
     sse_read_timeout: int | None = Field(None, description="SSE 读取超时（秒）")
     tags: list | None = Field(None, description="标签数组")
     icon: str | None = Field(None, description="图标（emoji）")
+    cacheable_tools: list | None = Field(None, description="可缓存结果的工具名称列表（幂等、只读工具）")
 
 
 # =============================================================================
@@ -118,6 +121,7 @@ async def create_mcp_server_route(
             sse_read_timeout=request.sse_read_timeout,
             tags=request.tags,
             icon=request.icon,
+            cacheable_tools=request.cacheable_tools,
             created_by=current_user.username,
         )
         return {"success": True, "data": server.to_dict()}
@@ -172,6 +176,7 @@ async def update_mcp_server_route(
             sse_read_timeout=request.sse_read_timeout,
             tags=request.tags,
             icon=request.icon,
+            cacheable_tools=request.cacheable_tools,
             updated_by=current_user.username,
         )
         return {"success": True, "data": server.to_dict()}
@@ -376,3 +381,31 @@ async def toggle_mcp_server_tool_route(
     except Exception as e:
         logger.error(f"Failed to toggle MCP server tool: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# =============================================================================
+# === MCP 工具调用指标 ===
+# =============================================================================
+
+
+@mcp.get("/{name}/metrics")
+async def get_mcp_server_metrics(
+    name: str,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """获取 MCP 服务器各工具的调用指标（延迟直方图、错误率、缓存命中）"""
+    await get_server_or_404(db, name)
+    return {"success": True, "data": get_tool_call_metrics(name)}
+
+
+@mcp.delete("/{name}/metrics")
+async def reset_mcp_server_metrics(
+    name: str,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """重置 MCP 服务器的工具调用指标"""
+    await get_server_or_404(db, name)
+    reset_tool_call_metrics(name)
+    return {"success": True, "message": f"服务器 '{name}' 的调用指标已重置"}
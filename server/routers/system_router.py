@@ -6,6 +6,7 @@ import yaml
 from fastapi import APIRouter, Body, Depends, HTTPException
 
 from src.storage.db.models import User
+from server.services.tasker import tasker
 from server.utils.auth_middleware import get_admin_user
 from src import config
 from src.models.chat import test_chat_model_status, test_all_chat_models_status
@@ -40,6 +41,7 @@ async def update_config_single(key=Body(...), value=Body(...), current_user: Use
     """更新单个配置项"""
     config[key] = value
     config.save()
+    await _apply_runtime_config({key})
     return config.dump_config()
 
 
@@ -48,9 +50,16 @@ async def update_config_batch(items: dict = Body(...), current_user: User = Depe
     """批量更新配置项"""
     config.update(items)
     config.save()
+    await _apply_runtime_config(set(items))
     return config.dump_config()
 
 
+async def _apply_runtime_config(keys: set[str]) -> None:
+    """使需要运行时生效的配置项立即生效"""
+    if "tasker_worker_count" in keys:
+        await tasker.resize(config.tasker_worker_count)
+
+
 @system.post("/config/docs")
 async def toggle_api_docs(
     enabled: bool = Body(..., embed=True),
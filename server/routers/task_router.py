@@ -17,6 +17,12 @@ async def list_tasks(
     return await tasker.list_tasks(status=status, limit=limit)
 
 
+@tasks.get("/metrics")
+async def get_task_metrics(current_user: User = Depends(get_admin_user)):
+    """Queue depth, running tasks and wait-time metrics of the task scheduler."""
+    return await tasker.get_metrics()
+
+
 @tasks.get("/{task_id}")
 async def get_task(task_id: str, current_user: User = Depends(get_admin_user)):
     """Retrieve a single task by id."""
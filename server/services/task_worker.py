@@ -0,0 +1,228 @@
+"""独立的任务 worker 进程
+
+从 tasks 表领取 backend=process 的任务并执行，进度、结果与状态直接写回 tasks 表，
+取消标记通过心跳轮询同步，任务代码使用的 TaskContext API 与进程内执行完全一致。
+
+用法：python -m server.services.task_worker --worker-id <id> [--concurrency N]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import time
+from typing import Any
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.orm import aliased
+
+from server.services.tasker import (
+    TASK_PROGRESS_PERSIST_INTERVAL,
+    TASK_WORKER_HEARTBEAT_INTERVAL,
+    Task,
+    _iso_to_utc_naive,
+    _utc_timestamp,
+    execute_task,
+    resolve_handler,
+)
+from src.config import config
+from src.storage.db.manager import db_manager
+from src.storage.db.models import TaskRecord
+from src.utils.datetime_utils import utc_now
+from src.utils.logging_config import logger
+
+POLL_INTERVAL = 1.0
+
+
+def _now_naive():
+    return utc_now().replace(tzinfo=None)
+
+
+def _fair_key(table) -> Any:
+    """与 `Tasker._fair_key` 一致的 SQL 表达式：created_by/db_id"""
+    created_by = func.coalesce(func.json_extract(table.payload, "$.created_by"), "")
+    db_id = func.coalesce(func.json_extract(table.payload, "$.db_id"), "")
+    return created_by.concat("/").concat(db_id)
+
+
+def _claim_candidate() -> Any:
+    """选出下一个可领取的任务 id，调度规则与进程内 `Tasker._pop_runnable` 保持一致：
+
+    - 依次按 high/normal/low 优先级通道调度；
+    - 跳过已达到 `tasker_type_concurrency` 上限的任务类型（按所有 worker 正在运行的任务计数）；
+    - 同一通道内优先领取正在运行任务最少的 fair_key（用户/知识库），近似轮询。
+    """
+    pending = aliased(TaskRecord)
+    running = aliased(TaskRecord)
+
+    def running_count(*conditions: Any) -> Any:
+        return (
+            select(func.count())
+            .select_from(running)
+            .where(running.backend == "process", running.status == "running", *conditions)
+            .scalar_subquery()
+        )
+
+    filters = [pending.backend == "process", pending.status == "pending"]
+    for task_type, limit in config.tasker_type_concurrency.items():
+        if limit:
+            filters.append(or_(pending.type != task_type, running_count(running.type == task_type) < limit))
+
+    priority_order = case({"high": 0, "normal": 1, "low": 2}, value=pending.priority, else_=1)
+    fair_load = running_count(_fair_key(running) == _fair_key(pending))
+    return (
+        select(pending.id)
+        .where(*filters)
+        .order_by(priority_order, fair_load, pending.created_at)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+class WorkerTaskStore:
+    """worker 进程内的任务状态存储，提供 TaskContext 所需的 `_update_task` / `_is_cancel_requested` 接口"""
+
+    def __init__(self, worker_id: str):
+        self.worker_id = worker_id
+        self._tasks: dict[str, Task] = {}
+        self._pending_fields: dict[str, dict[str, Any]] = {}
+        self._last_persisted: dict[str, float] = {}
+
+    async def claim_next(self) -> Task | None:
+        """原子地领取一个待执行任务
+
+        候选选择与状态更新在同一条 UPDATE 中完成（SQLite 写入串行），多个 worker 并发领取也只有一个成功，
+        且类型并发上限在所有 worker 之间生效。
+        """
+        now = _now_naive()
+        async with db_manager.get_async_session_context() as session:
+            result = await session.execute(
+                update(TaskRecord)
+                .where(TaskRecord.id == _claim_candidate(), TaskRecord.status == "pending")
+                .values(worker_id=self.worker_id, status="running", started_at=now, heartbeat_at=now, updated_at=now)
+                .returning(TaskRecord.id)
+            )
+            task_id = result.scalar_one_or_none()
+            if task_id is None:
+                return None
+            record = (await session.execute(select(TaskRecord).where(TaskRecord.id == task_id))).scalar_one()
+            task = Task.from_dict(record.to_dict())
+
+        self._tasks[task.id] = task
+        return task
+
+    async def _update_task(self, task_id: str, **fields: Any) -> None:
+        task = self._tasks.get(task_id)
+        if not task:
+            return
+        values: dict[str, Any] = {}
+        for key, value in fields.items():
+            if value is None:
+                continue
+            if key == "progress":
+                value = max(0.0, min(value, 100.0))
+            setattr(task, key, value)
+            values[key] = _iso_to_utc_naive(value) if key in ("started_at", "completed_at") else value
+        task.updated_at = _utc_timestamp()
+        self._pending_fields.setdefault(task_id, {}).update(values)
+
+        state_changed = any(
+            fields.get(k) is not None for k in ("status", "error", "started_at", "completed_at", "checkpoint")
+        )
+        if state_changed or time.monotonic() - self._last_persisted.get(task_id, 0.0) >= TASK_PROGRESS_PERSIST_INTERVAL:
+            await self._flush(task_id)
+
+    async def _flush(self, task_id: str) -> None:
+        values = self._pending_fields.pop(task_id, None)
+        if not values:
+            return
+        self._last_persisted[task_id] = time.monotonic()
+        values["updated_at"] = _now_naive()
+        values["heartbeat_at"] = values["updated_at"]
+        async with db_manager.get_async_session_context() as session:
+            # 仅更新仍归属本 worker 的任务，避免心跳超时被重新分配后覆盖新 worker 的进度
+            await session.execute(
+                update(TaskRecord)
+                .where(TaskRecord.id == task_id, TaskRecord.worker_id == self.worker_id)
+                .values(**values)
+            )
+
+    def _is_cancel_requested(self, task_id: str) -> bool:
+        task = self._tasks.get(task_id)
+        return bool(task and task.cancel_requested)
+
+    async def heartbeat(self) -> None:
+        """刷新心跳、补写节流的进度，并同步 API 侧设置的取消标记"""
+        task_ids = list(self._tasks)
+        if not task_ids:
+            return
+        for task_id in task_ids:
+            await self._flush(task_id)
+        async with db_manager.get_async_session_context() as session:
+            await session.execute(
+                update(TaskRecord)
+                .where(TaskRecord.id.in_(task_ids), TaskRecord.worker_id == self.worker_id)
+                .values(heartbeat_at=_now_naive())
+            )
+            result = await session.execute(
+                select(TaskRecord.id).where(TaskRecord.id.in_(task_ids), TaskRecord.cancel_requested == 1)
+            )
+            for task_id in result.scalars().all():
+                if task_id in self._tasks:
+                    self._tasks[task_id].cancel_requested = True
+
+    async def release(self, task_id: str) -> None:
+        await self._flush(task_id)
+        self._tasks.pop(task_id, None)
+        self._last_persisted.pop(task_id, None)
+
+
+async def _run_slot(store: WorkerTaskStore) -> None:
+    while True:
+        try:
+            task = await store.claim_next()
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Failed to claim task: {}", exc)
+            task = None
+        if task is None:
+            await asyncio.sleep(POLL_INTERVAL)
+            continue
+
+        logger.info("Worker {} picked task {} ({})", store.worker_id, task.id, task.name)
+        try:
+            await execute_task(store, task.id, resolve_handler(task.handler))
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Task {} failed: {}", task.id, exc)
+            await store._update_task(task.id, status="failed", progress=100.0, message="任务执行失败", error=str(exc))
+        finally:
+            await store.release(task.id)
+
+
+async def _heartbeat_loop(store: WorkerTaskStore) -> None:
+    while True:
+        await asyncio.sleep(TASK_WORKER_HEARTBEAT_INTERVAL)
+        try:
+            await store.heartbeat()
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Worker heartbeat failed: {}", exc)
+
+
+async def run_worker(worker_id: str, concurrency: int = 1) -> None:
+    store = WorkerTaskStore(worker_id)
+    logger.info("Task worker {} started (concurrency={})", worker_id, concurrency)
+    await asyncio.gather(_heartbeat_loop(store), *[_run_slot(store) for _ in range(max(1, concurrency))])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Task worker process")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_worker(args.worker_id, args.concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,65 @@
 import asyncio
+import importlib
 import json
+import socket
+import sys
 import os
+import time
 import uuid
 from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any
 from collections.abc import Awaitable, Callable
-from collections import Counter
+from collections import Counter, OrderedDict, defaultdict, deque
+
+from sqlalchemy import delete, select, update
 
 from src.config import config
+from src.storage.db.manager import db_manager
+from src.storage.db.models import TaskRecord
 from src.utils.logging_config import logger
-from src.utils.datetime_utils import utc_isoformat
+from src.utils.datetime_utils import coerce_any_to_utc_datetime, utc_isoformat, utc_now
 
 TaskCoroutine = Callable[["TaskContext"], Awaitable[Any]]
 TERMINAL_STATUSES = {"success", "failed", "cancelled"}
 
+# 仅进度/消息/中间结果变化时，单个任务最多每隔该秒数落库一次；状态变化立即落库
+TASK_PROGRESS_PERSIST_INTERVAL = float(os.getenv("TASK_PROGRESS_PERSIST_INTERVAL") or 2.0)
+# 已结束任务的保留策略：超过保留天数或超过最大条数的记录归档到 archive.jsonl 后删除
+TASK_RETENTION_DAYS = int(os.getenv("TASK_RETENTION_DAYS") or 30)
+TASK_MAX_FINISHED_RECORDS = int(os.getenv("TASK_MAX_FINISHED_RECORDS") or 2000)
+TASK_MAINTENANCE_INTERVAL = 3600
+# worker 进程心跳间隔与失联判定（秒）
+TASK_WORKER_HEARTBEAT_INTERVAL = 5
+TASK_WORKER_HEARTBEAT_TIMEOUT = int(os.getenv("TASK_WORKER_HEARTBEAT_TIMEOUT") or 120)
+
+# 优先级通道（依次调度）；同一通道内按 fair_key（用户/知识库）轮询
+TASK_PRIORITIES = ("high", "normal", "low")
+# 小批量任务优先执行，大批量任务降级，避免大规模重建索引长时间阻塞单文件上传
+SMALL_BATCH_SIZE = 5
+LARGE_BATCH_SIZE = 200
+
+
+def batch_priority(size: int) -> str:
+    """根据任务包含的文件数推断优先级"""
+    if size <= SMALL_BATCH_SIZE:
+        return "high"
+    if size >= LARGE_BATCH_SIZE:
+        return "low"
+    return "normal"
+
 
 def _utc_timestamp() -> str:
     return utc_isoformat()
 
 
+def _iso_to_utc_naive(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    return coerce_any_to_utc_datetime(value).replace(tzinfo=None)
+
+
 @dataclass
 class Task:
     id: str
@@ -36,6 +76,13 @@ class Task:
     result: Any | None = None
     error: str | None = None
     cancel_requested: bool = False
+    priority: str = "normal"
+    # 可导入的处理函数（"module:function"）；backend 为 process 时由独立 worker 进程执行
+    handler: str | None = None
+    backend: str = "local"
+    worker_id: str | None = None
+    # 可恢复任务（带 handler）的断点数据，服务重启后从此处继续执行
+    checkpoint: dict[str, Any] | None = None
 
     def to_dict(self) -> dict[str, Any]:
         data = asdict(self)
@@ -45,6 +92,7 @@ class Task:
         data = asdict(self)
         data.pop("payload", None)
         data.pop("result", None)
+        data.pop("checkpoint", None)
         return data
 
     @classmethod
@@ -64,14 +112,43 @@ class Task:
             result=data.get("result"),
             error=data.get("error"),
             cancel_requested=data.get("cancel_requested", False),
+            priority=data.get("priority") or "normal",
+            handler=data.get("handler"),
+            backend=data.get("backend") or "local",
+            worker_id=data.get("worker_id"),
+            checkpoint=data.get("checkpoint"),
         )
 
 
+@dataclass
+class _QueuedTask:
+    task_id: str
+    task_type: str
+    fair_key: str
+    coroutine: TaskCoroutine
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
 class TaskContext:
     def __init__(self, tasker: "Tasker", task_id: str):
         self._tasker = tasker
         self.task_id = task_id
 
+    @property
+    def payload(self) -> dict[str, Any]:
+        task = self._tasker._tasks.get(self.task_id)
+        return task.payload if task else {}
+
+    @property
+    def checkpoint(self) -> dict[str, Any]:
+        """上次保存的断点数据；首次执行时为空字典"""
+        task = self._tasker._tasks.get(self.task_id)
+        return (task.checkpoint if task else None) or {}
+
+    async def save_checkpoint(self, checkpoint: dict[str, Any]) -> None:
+        """保存断点（立即落库）。仅对以 handler 提交的任务有意义，重启后会带着断点重新执行"""
+        await self._tasker._update_task(self.task_id, checkpoint=checkpoint)
+
     async def set_progress(self, progress: float, message: str | None = None) -> None:
         await self._tasker._update_task(
             self.task_id,
@@ -93,25 +170,98 @@ class TaskContext:
             raise asyncio.CancelledError("Task was cancelled")
 
 
+def resolve_handler(handler: str) -> TaskCoroutine:
+    """解析 "module:function" 形式的任务处理函数"""
+    module_name, _, func_name = handler.partition(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+async def execute_task(store: Any, task_id: str, coroutine: TaskCoroutine) -> None:
+    """执行单个任务并维护其状态；store 为 Tasker（进程内）或 worker 进程中的任务存储"""
+
+    async def mark_cancelled(message: str) -> None:
+        await store._update_task(
+            task_id, status="cancelled", progress=100.0, message=message, completed_at=_utc_timestamp()
+        )
+
+    task = store._tasks.get(task_id)
+    if not task:
+        return
+    if task.cancel_requested:
+        await mark_cancelled("Task was cancelled before execution")
+        return
+    if task.checkpoint:
+        await store._update_task(task_id, status="running", message="从断点恢复执行", started_at=_utc_timestamp())
+    else:
+        await store._update_task(
+            task_id, status="running", progress=0.0, message="任务开始执行", started_at=_utc_timestamp()
+        )
+    context = TaskContext(store, task_id)
+    try:
+        result = await coroutine(context)
+        if store._is_cancel_requested(task_id):
+            await mark_cancelled("Task cancelled during execution")
+            return
+        await store._update_task(
+            task_id,
+            status="success",
+            progress=100.0,
+            message="任务已完成",
+            result=result,
+            completed_at=_utc_timestamp(),
+        )
+    except asyncio.CancelledError:
+        await mark_cancelled("任务被取消")
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Task {} failed: {}", task_id, exc)
+        await store._update_task(
+            task_id,
+            status="failed",
+            progress=100.0,
+            message="任务执行失败",
+            error=str(exc),
+            completed_at=_utc_timestamp(),
+        )
+
+
 class Tasker:
-    def __init__(self, worker_count: int = 2):
-        self.worker_count = max(1, worker_count)
-        self._queue: asyncio.Queue[tuple[str, TaskCoroutine]] = asyncio.Queue()
+    def __init__(self, worker_count: int | None = None):
+        # 未指定时在 start() 时从配置读取
+        self.worker_count = max(1, worker_count) if worker_count else 0
+        # priority -> fair_key -> 待执行队列
+        self._lanes: dict[str, OrderedDict[str, deque[_QueuedTask]]] = {p: OrderedDict() for p in TASK_PRIORITIES}
+        self._cond = asyncio.Condition()
+        self._running_by_type: Counter[str] = Counter()
+        self._wait_times: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=500))
         self._tasks: dict[str, Task] = {}
         self._lock = asyncio.Lock()
         self._workers: list[asyncio.Task[Any]] = []
-        self._storage_path = Path(config.save_dir) / "tasks" / "tasks.json"
-        os.makedirs(self._storage_path.parent, exist_ok=True)
+        self._storage_dir = Path(config.save_dir) / "tasks"
+        self._legacy_storage_path = self._storage_dir / "tasks.json"
+        self._archive_path = self._storage_dir / "archive.jsonl"
+        os.makedirs(self._storage_dir, exist_ok=True)
         self._started = False
+        # 按行持久化：写入按 _persist_lock 串行，避免旧快照覆盖新状态
+        self._persist_lock = asyncio.Lock()
+        self._dirty: set[str] = set()
+        self._last_persisted: dict[str, float] = {}
+        self._maintenance_task: asyncio.Task[Any] | None = None
+        self._processes: list[asyncio.subprocess.Process] = []
+
+    @property
+    def remote_enabled(self) -> bool:
+        return config.tasker_backend == "process"
 
     async def start(self) -> None:
         async with self._lock:
             if self._started:
                 return
             await self._load_state()
-            for _ in range(self.worker_count):
-                worker = asyncio.create_task(self._worker_loop(), name="tasker-worker")
-                self._workers.append(worker)
+            self.worker_count = self.worker_count or max(1, config.tasker_worker_count)
+            self._spawn_workers()
+            self._maintenance_task = asyncio.create_task(self._maintenance_loop(), name="tasker-maintenance")
+            if self.remote_enabled:
+                await self._spawn_worker_processes(config.tasker_process_workers)
             self._started = True
             logger.info("Tasker started with {} workers", self.worker_count)
 
@@ -123,27 +273,184 @@ class Tasker:
                 worker.cancel()
             await asyncio.gather(*self._workers, return_exceptions=True)
             self._workers.clear()
-            await self._persist_state()
+            if self._maintenance_task:
+                self._maintenance_task.cancel()
+                await asyncio.gather(self._maintenance_task, return_exceptions=True)
+                self._maintenance_task = None
+            await self._stop_worker_processes()
+            await self._flush_dirty()
             self._started = False
             logger.info("Tasker shutdown complete")
 
+    async def _spawn_worker_processes(self, count: int) -> None:
+        """启动本机 worker 进程（其他机器可直接运行 `python -m server.services.task_worker` 共享同一数据库）"""
+        for index in range(max(0, count)):
+            worker_id = f"{socket.gethostname()}-{os.getpid()}-{index}"
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "server.services.task_worker", "--worker-id", worker_id
+            )
+            self._processes.append(process)
+        if count:
+            logger.info("Started {} task worker processes", count)
+
+    async def _stop_worker_processes(self) -> None:
+        for process in self._processes:
+            if process.returncode is None:
+                process.terminate()
+        for process in self._processes:
+            try:
+                await asyncio.wait_for(process.wait(), 10)
+            except TimeoutError:
+                process.kill()
+        self._processes.clear()
+
+    def _spawn_workers(self) -> None:
+        while len(self._workers) < self.worker_count:
+            worker = asyncio.create_task(self._worker_loop(), name="tasker-worker")
+            self._workers.append(worker)
+
+    async def resize(self, worker_count: int) -> None:
+        """调整工作协程数量（配置项 tasker_worker_count 更新时调用）；多余的 worker 在完成当前任务后退出"""
+        self.worker_count = max(1, worker_count)
+        if not self._started:
+            return
+        self._spawn_workers()
+        async with self._cond:
+            self._cond.notify_all()
+        logger.info("Tasker resized to {} workers", self.worker_count)
+
     async def enqueue(
         self,
         *,
         name: str,
         task_type: str,
         payload: dict[str, Any] | None = None,
-        coroutine: TaskCoroutine,
+        coroutine: TaskCoroutine | None = None,
+        handler: str | None = None,
+        priority: str = "normal",
+        fair_key: str | None = None,
+        local_only: bool = False,
     ) -> Task:
+        """提交任务。
+
+        `coroutine` 在 API 进程内执行；`handler` 为可导入的 "module:function"，
+        在 process 后端下由独立 worker 进程从 tasks 表领取执行，在 local 后端下进程内执行。
+        以 handler 提交的任务在服务重启后会重新入队，可通过 `TaskContext.checkpoint` 断点续跑；
+        `local_only` 用于依赖 API 进程内状态、但仍需可恢复的任务。
+        """
+        if coroutine is None and handler is None:
+            raise ValueError("Either coroutine or handler is required")
+        payload = payload or {}
+        if priority not in TASK_PRIORITIES:
+            priority = "normal"
         task_id = uuid.uuid4().hex
-        task = Task(id=task_id, name=name, type=task_type, payload=payload or {})
+        remote = handler is not None and self.remote_enabled and not local_only
+        task = Task(
+            id=task_id,
+            name=name,
+            type=task_type,
+            payload=payload,
+            priority=priority,
+            handler=handler,
+            backend="process" if remote else "local",
+        )
         async with self._lock:
             self._tasks[task_id] = task
-            await self._persist_state()
-            await self._queue.put((task_id, coroutine))
-        logger.info("Enqueued task {} ({})", task_id, name)
+        await self._persist_task(task)
+        if remote:
+            logger.info("Enqueued task {} ({}, priority={}) for worker processes", task_id, name, priority)
+            return task
+
+        coroutine = coroutine or resolve_handler(handler)
+        await self._push(task, _QueuedTask(task_id, task_type, fair_key or self._fair_key(payload), coroutine))
+        logger.info("Enqueued task {} ({}, priority={})", task_id, name, priority)
         return task
 
+    @staticmethod
+    def _fair_key(payload: dict[str, Any]) -> str:
+        return f"{payload.get('created_by') or ''}/{payload.get('db_id') or ''}"
+
+    async def _push(self, task: Task, item: _QueuedTask) -> None:
+        async with self._cond:
+            self._lanes[task.priority].setdefault(item.fair_key, deque()).append(item)
+            self._cond.notify()
+
+    def _can_run(self, task_type: str) -> bool:
+        limit = config.tasker_type_concurrency.get(task_type)
+        return not limit or self._running_by_type[task_type] < limit
+
+    def _pop_runnable(self) -> _QueuedTask | None:
+        """按优先级通道依次查找；同一通道内各 fair_key 轮询，跳过已达并发上限的任务类型"""
+        for priority in TASK_PRIORITIES:
+            lane = self._lanes[priority]
+            for key in list(lane.keys()):
+                queue = lane[key]
+                for index, item in enumerate(queue):
+                    if not self._can_run(item.task_type):
+                        continue
+                    del queue[index]
+                    if queue:
+                        lane.move_to_end(key)
+                    else:
+                        del lane[key]
+                    return item
+        return None
+
+    async def _next_task(self) -> _QueuedTask | None:
+        """等待下一个可执行的任务；worker 数量缩减时返回 None"""
+        async with self._cond:
+            while True:
+                if self._workers.index(asyncio.current_task()) >= self.worker_count:
+                    return None
+                item = self._pop_runnable()
+                if item is not None:
+                    self._running_by_type[item.task_type] += 1
+                    self._wait_times[item.task_type].append(time.monotonic() - item.enqueued_at)
+                    return item
+                await self._cond.wait()
+
+    async def _release(self, item: _QueuedTask) -> None:
+        async with self._cond:
+            self._running_by_type[item.task_type] -= 1
+            self._cond.notify_all()
+
+    async def get_metrics(self) -> dict[str, Any]:
+        """队列深度、运行中任务与排队等待时间等调度指标"""
+        now = time.monotonic()
+        async with self._cond:
+            pending = [(p, item) for p, lane in self._lanes.items() for queue in lane.values() for item in queue]
+            running = dict(+self._running_by_type)
+            wait_times = {task_type: sorted(values) for task_type, values in self._wait_times.items() if values}
+
+        depth_by_priority = Counter(p for p, _ in pending)
+        depth_by_type = Counter(item.task_type for _, item in pending)
+        oldest_wait = {}
+        for _, item in pending:
+            oldest_wait[item.task_type] = max(oldest_wait.get(item.task_type, 0.0), now - item.enqueued_at)
+
+        wait_stats = {
+            task_type: {
+                "count": len(values),
+                "avg_seconds": round(sum(values) / len(values), 3),
+                "p95_seconds": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+                "max_seconds": round(values[-1], 3),
+            }
+            for task_type, values in wait_times.items()
+        }
+
+        return {
+            "workers": {"target": self.worker_count, "alive": len(self._workers), "busy": sum(running.values())},
+            "queue_depth": {
+                "total": len(pending),
+                "by_priority": {p: depth_by_priority.get(p, 0) for p in TASK_PRIORITIES},
+                "by_type": dict(depth_by_type),
+            },
+            "running_by_type": running,
+            "type_concurrency_limits": dict(config.tasker_type_concurrency),
+            "oldest_pending_wait_seconds": {k: round(v, 3) for k, v in oldest_wait.items()},
+            "wait_time": wait_stats,
+        }
+
     async def list_tasks(self, status: str | None = None, limit: int = 100) -> dict[str, Any]:
         async with self._lock:
             all_tasks = list(self._tasks.values())
@@ -184,70 +491,35 @@ class Tasker:
                 return False
             task.cancel_requested = True
             task.updated_at = _utc_timestamp()
-            await self._persist_state()
+        if task.backend == "process":
+            # 远程任务的状态由 worker 写入，只更新取消标记，避免覆盖其进度
+            async with db_manager.get_async_session_context() as session:
+                await session.execute(
+                    update(TaskRecord)
+                    .where(TaskRecord.id == task_id)
+                    .values(cancel_requested=1, updated_at=_iso_to_utc_naive(task.updated_at))
+                )
+        else:
+            await self._persist_task(task)
         logger.info("Cancellation requested for task {}", task_id)
         return True
 
     async def _worker_loop(self) -> None:
         while True:
             try:
-                task_id, coroutine = await self._queue.get()
+                item = await self._next_task()
+                if item is None:
+                    self._workers.remove(asyncio.current_task())
+                    break
                 try:
-                    task = await self._get_task_instance(task_id)
-                    if not task:
-                        continue
-                    if task.cancel_requested:
-                        await self._mark_cancelled(task_id, "Task was cancelled before execution")
-                        continue
-                    await self._update_task(
-                        task_id, status="running", progress=0.0, message="任务开始执行", started_at=_utc_timestamp()
-                    )
-                    context = TaskContext(self, task_id)
-                    try:
-                        result = await coroutine(context)
-                        if task.cancel_requested:
-                            await self._mark_cancelled(task_id, "Task cancelled during execution")
-                            continue
-                        await self._update_task(
-                            task_id,
-                            status="success",
-                            progress=100.0,
-                            message="任务已完成",
-                            result=result,
-                            completed_at=_utc_timestamp(),
-                        )
-                    except asyncio.CancelledError:
-                        await self._mark_cancelled(task_id, "任务被取消")
-                    except Exception as exc:  # noqa: BLE001
-                        logger.exception("Task {} failed: {}", task_id, exc)
-                        await self._update_task(
-                            task_id,
-                            status="failed",
-                            progress=100.0,
-                            message="任务执行失败",
-                            error=str(exc),
-                            completed_at=_utc_timestamp(),
-                        )
+                    await execute_task(self, item.task_id, item.coroutine)
                 finally:
-                    self._queue.task_done()
+                    await self._release(item)
             except asyncio.CancelledError:
                 break
             except Exception as exc:  # noqa: BLE001
                 logger.exception("Tasker worker error: {}", exc)
 
-    async def _get_task_instance(self, task_id: str) -> Task | None:
-        async with self._lock:
-            return self._tasks.get(task_id)
-
-    async def _mark_cancelled(self, task_id: str, message: str) -> None:
-        await self._update_task(
-            task_id,
-            status="cancelled",
-            progress=100.0,
-            message=message,
-            completed_at=_utc_timestamp(),
-        )
-
     async def _update_task(
         self,
         task_id: str,
@@ -259,6 +531,7 @@ class Tasker:
         error: str | None = None,
         started_at: str | None = None,
         completed_at: str | None = None,
+        checkpoint: dict[str, Any] | None = None,
     ) -> None:
         async with self._lock:
             task = self._tasks.get(task_id)
@@ -278,49 +551,202 @@ class Tasker:
                 task.started_at = started_at
             if completed_at is not None:
                 task.completed_at = completed_at
+            if checkpoint is not None:
+                task.checkpoint = checkpoint
             task.updated_at = _utc_timestamp()
-            await self._persist_state()
+
+        # 状态类变化立即落库；纯进度更新节流，由维护循环补写
+        state_changed = any(v is not None for v in (status, error, started_at, completed_at, checkpoint))
+        last = self._last_persisted.get(task_id, 0.0)
+        if state_changed or time.monotonic() - last >= TASK_PROGRESS_PERSIST_INTERVAL:
+            await self._persist_task(task)
+        else:
+            self._dirty.add(task_id)
 
     def _is_cancel_requested(self, task_id: str) -> bool:
         task = self._tasks.get(task_id)
         return bool(task and task.cancel_requested)
 
     async def _load_state(self) -> None:
-        if not self._storage_path.exists():
-            return
         try:
-            content = await asyncio.to_thread(self._storage_path.read_text, encoding="utf-8")
-            if not content.strip():
-                return
-            data = json.loads(content)
-            tasks = data.get("tasks", [])
-            for item in tasks:
-                task = Task.from_dict(item)
+            async with db_manager.get_async_session_context() as session:
+                result = await session.execute(select(TaskRecord))
+                tasks = [Task.from_dict(record.to_dict()) for record in result.scalars().all()]
+            if not tasks:
+                tasks = await self._import_legacy_state()
+
+            updated: list[Task] = []
+            resumed: list[tuple[Task, TaskCoroutine]] = []
+            for task in tasks:
+                if task.backend == "process" and task.status not in TERMINAL_STATUSES:
+                    # 由 worker 进程执行的任务不受 API 重启影响，状态通过 _sync_remote_tasks 同步
+                    self._tasks[task.id] = task
+                    continue
+                if task.status not in TERMINAL_STATUSES and task.handler:
+                    # 以 handler 提交的任务可恢复：重新入队，由任务从 checkpoint 继续
+                    try:
+                        resumed.append((task, resolve_handler(task.handler)))
+                        task.status = "pending"
+                        task.message = "服务重启后等待从断点恢复" if task.checkpoint else "服务重启后重新排队"
+                        task.updated_at = _utc_timestamp()
+                        updated.append(task)
+                        self._tasks[task.id] = task
+                        continue
+                    except Exception as exc:  # noqa: BLE001
+                        logger.warning("Cannot resume task {} with handler {}: {}", task.id, task.handler, exc)
                 if task.status == "running":
                     task.status = "failed"
                     task.message = "服务重启时任务中断"
                     task.updated_at = _utc_timestamp()
+                    updated.append(task)
                 elif task.status not in TERMINAL_STATUSES:
                     task.status = "failed"
                     task.message = "服务重启时任务未继续执行"
                     task.updated_at = _utc_timestamp()
+                    updated.append(task)
                 self._tasks[task.id] = task
+            for task in updated:
+                await self._persist_task(task)
+            for task, coroutine in resumed:
+                await self._push(task, _QueuedTask(task.id, task.type, self._fair_key(task.payload), coroutine))
+            if resumed:
+                logger.info("Re-enqueued {} interrupted tasks", len(resumed))
             logger.info("Loaded {} task records from storage", len(tasks))
+            await self._prune_finished_tasks()
         except Exception as exc:  # noqa: BLE001
             logger.exception("Failed to load task state: {}", exc)
 
-    async def _persist_state(self) -> None:
-        tasks = [task.to_dict() for task in self._tasks.values()]
-        payload = {"tasks": tasks, "updated_at": _utc_timestamp()}
+    async def _import_legacy_state(self) -> list[Task]:
+        """将旧版 tasks.json 导入数据库（仅首次），导入后重命名保留"""
+        if not self._legacy_storage_path.exists():
+            return []
+        content = await asyncio.to_thread(self._legacy_storage_path.read_text, encoding="utf-8")
+        tasks = [Task.from_dict(item) for item in (json.loads(content).get("tasks", []) if content.strip() else [])]
+        for task in tasks:
+            await self._persist_task(task)
+        os.replace(self._legacy_storage_path, self._legacy_storage_path.with_suffix(".json.migrated"))
+        logger.info("Imported {} task records from legacy tasks.json", len(tasks))
+        return tasks
+
+    async def _persist_task(self, task: Task) -> None:
+        """写入单个任务行（O(1)，与任务总数无关）
+
+        payload 在任务创建后不再变化，只在本进程首次写入该行时保存，后续状态写入不再重复序列化。
+        """
+        async with self._persist_lock:
+            data = {
+                "name": task.name,
+                "type": task.type,
+                "status": task.status,
+                "progress": task.progress,
+                "message": task.message,
+                "result": task.result,
+                "error": task.error,
+                "cancel_requested": 1 if task.cancel_requested else 0,
+                "priority": task.priority,
+                "handler": task.handler,
+                "backend": task.backend,
+                "worker_id": task.worker_id,
+                "checkpoint": task.checkpoint,
+                "created_at": _iso_to_utc_naive(task.created_at),
+                "updated_at": _iso_to_utc_naive(task.updated_at),
+                "started_at": _iso_to_utc_naive(task.started_at),
+                "completed_at": _iso_to_utc_naive(task.completed_at),
+            }
+            row_written = task.id in self._last_persisted
+            self._dirty.discard(task.id)
+            self._last_persisted[task.id] = time.monotonic()
+            try:
+                async with db_manager.get_async_session_context() as session:
+                    if row_written:
+                        await session.execute(update(TaskRecord).where(TaskRecord.id == task.id).values(**data))
+                    else:
+                        await session.merge(TaskRecord(id=task.id, payload=task.payload, **data))
+            except Exception as exc:  # noqa: BLE001
+                if not row_written:
+                    # 首次写入失败时下次仍需完整写入
+                    self._last_persisted.pop(task.id, None)
+                logger.exception("Failed to persist task {}: {}", task.id, exc)
+
+    async def _flush_dirty(self) -> None:
+        for task_id in list(self._dirty):
+            task = self._tasks.get(task_id)
+            if task is None:
+                self._dirty.discard(task_id)
+                continue
+            await self._persist_task(task)
+
+    async def _maintenance_loop(self) -> None:
+        last_prune = time.monotonic()
+        while True:
+            try:
+                await asyncio.sleep(TASK_PROGRESS_PERSIST_INTERVAL)
+                await self._flush_dirty()
+                await self._sync_remote_tasks()
+                if time.monotonic() - last_prune >= TASK_MAINTENANCE_INTERVAL:
+                    last_prune = time.monotonic()
+                    await self._prune_finished_tasks()
+            except asyncio.CancelledError:
+                break
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Tasker maintenance error: {}", exc)
+
+    async def _sync_remote_tasks(self) -> None:
+        """从 tasks 表同步 worker 进程执行中任务的状态，心跳超时的任务重新排队，由其他 worker 从断点恢复"""
+        async with self._lock:
+            task_ids = [
+                t.id for t in self._tasks.values() if t.backend == "process" and t.status not in TERMINAL_STATUSES
+            ]
+        if not task_ids:
+            return
+
+        stale_before = utc_now().replace(tzinfo=None) - timedelta(seconds=TASK_WORKER_HEARTBEAT_TIMEOUT)
+        async with db_manager.get_async_session_context() as session:
+            await session.execute(
+                update(TaskRecord)
+                .where(
+                    TaskRecord.id.in_(task_ids),
+                    TaskRecord.status == "running",
+                    TaskRecord.heartbeat_at < stale_before,
+                )
+                .values(status="pending", worker_id=None, message="任务执行进程失联，等待重新执行")
+            )
+            result = await session.execute(select(TaskRecord).where(TaskRecord.id.in_(task_ids)))
+            records = [Task.from_dict(record.to_dict()) for record in result.scalars().all()]
+
+        async with self._lock:
+            for task in records:
+                if task.id in self._tasks:
+                    self._tasks[task.id] = task
+
+    async def _prune_finished_tasks(self) -> None:
+        """归档并删除超出保留期限或条数上限的已结束任务"""
+        cutoff = utc_isoformat(utc_now() - timedelta(days=TASK_RETENTION_DAYS))
+        async with self._lock:
+            finished = [task for task in self._tasks.values() if task.status in TERMINAL_STATUSES]
+            finished.sort(key=lambda item: item.completed_at or item.updated_at or "", reverse=True)
+            expired = [
+                task
+                for index, task in enumerate(finished)
+                if index >= TASK_MAX_FINISHED_RECORDS or (task.completed_at or task.updated_at or "") < cutoff
+            ]
+            for task in expired:
+                self._tasks.pop(task.id, None)
+                self._last_persisted.pop(task.id, None)
+                self._dirty.discard(task.id)
+        if not expired:
+            return
 
-        def _write() -> None:
-            self._storage_path.parent.mkdir(parents=True, exist_ok=True)
-            tmp_path = self._storage_path.with_suffix(".tmp")
-            with open(tmp_path, "w", encoding="utf-8") as fh:
-                json.dump(payload, fh, ensure_ascii=False, indent=2)
-            os.replace(tmp_path, self._storage_path)
+        def _archive() -> None:
+            with open(self._archive_path, "a", encoding="utf-8") as fh:
+                for task in expired:
+                    fh.write(json.dumps(task.to_dict(), ensure_ascii=False, default=str) + "\n")
 
-        await asyncio.to_thread(_write)
+        await asyncio.to_thread(_archive)
+        async with self._persist_lock:
+            async with db_manager.get_async_session_context() as session:
+                await session.execute(delete(TaskRecord).where(TaskRecord.id.in_([task.id for task in expired])))
+        logger.info("Archived {} finished task records", len(expired))
 
 
 tasker = Tasker()
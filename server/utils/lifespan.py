@@ -1,9 +1,12 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
 from server.services import tasker
-from src.services.mcp_service import init_mcp_servers
+from src import graph_base
+from src.agents import agent_manager
+from src.services.mcp_service import init_mcp_servers, shutdown_mcp_sessions, start_mcp_background_refresh
 from src.utils import logger
 
 
@@ -15,7 +18,15 @@ async def lifespan(app: FastAPI):
         await init_mcp_servers()
     except Exception as e:
         logger.error(f"Failed to initialize MCP servers during startup: {e}")
+    start_mcp_background_refresh()
 
     await tasker.start()
+
+    # 后台预热智能体 graph 与工具，不阻塞服务启动
+    warm_up_task = asyncio.create_task(agent_manager.warm_up_all())
     yield
+    if not warm_up_task.done():
+        warm_up_task.cancel()
     await tasker.shutdown()
+    await graph_base.connection.aclose()
+    await shutdown_mcp_sessions()
@@ -239,6 +239,84 @@ class DatabaseMigrator:
                     logger.error(f"数据库恢复失败: {restore_error}")
             raise
 
+    def _dashboard_rollup_backfill_commands(self) -> list[str]:
+        """按小时回填 dashboard_rollups，指标定义与 src/storage/conversation/rollups.py 保持一致"""
+
+        def rollup(created_at: str, metric: str, dimension: str, value: str, source: str, where: str = "") -> str:
+            # bucket 格式与 SQLAlchemy 写入 SQLite 的 DateTime 一致，保证唯一约束与范围查询可比
+            conditions = " AND ".join(filter(None, [f"{created_at} IS NOT NULL", where]))
+            return (
+                "INSERT INTO dashboard_rollups (bucket, metric, dimension, value) "
+                f"SELECT strftime('%Y-%m-%d %H:00:00.000000', {created_at}), {metric}, {dimension}, {value} "
+                f"FROM {source} WHERE {conditions} GROUP BY 1, 2, 3"
+            )
+
+        model = "COALESCE(json_extract(m.extra_metadata, '$.response_metadata.model_name'), '')"
+        join_conversation = "JOIN conversations c ON m.conversation_id = c.id"
+
+        commands = [
+            rollup("m.created_at", "'messages'", "m.role", "COUNT(*)", "messages m"),
+            rollup("m.created_at", "'model_calls'", model, "COUNT(*)", "messages m", "m.role = 'assistant'"),
+            *(
+                rollup(
+                    "m.created_at",
+                    f"'{field}'",
+                    model,
+                    f"SUM(COALESCE(json_extract(m.extra_metadata, '$.usage_metadata.{field}'), 0))",
+                    "messages m",
+                    "json_extract(m.extra_metadata, '$.usage_metadata') IS NOT NULL",
+                )
+                for field in ("input_tokens", "output_tokens")
+            ),
+            rollup("m.created_at", "'active_users'", "c.user_id", "COUNT(*)", f"messages m {join_conversation}"),
+        ]
+
+        if self.check_table_exists("tool_calls"):
+            commands += [
+                rollup("t.created_at", "'tool_calls'", "t.tool_name", "COUNT(*)", "tool_calls t"),
+                rollup(
+                    "t.created_at",
+                    "'tool_' || t.status",
+                    "t.tool_name",
+                    "COUNT(*)",
+                    "tool_calls t",
+                    "t.status IN ('success', 'error')",
+                ),
+                rollup(
+                    "t.created_at",
+                    "'agent_tool_calls'",
+                    "c.agent_id",
+                    "COUNT(*)",
+                    f"tool_calls t JOIN messages m ON t.message_id = m.id {join_conversation}",
+                ),
+            ]
+
+        if self.check_table_exists("message_feedbacks"):
+            with_feedback = f"message_feedbacks f JOIN messages m ON f.message_id = m.id {join_conversation}"
+            commands += [
+                rollup("f.created_at", "'feedbacks'", "c.agent_id", "COUNT(*)", with_feedback),
+                rollup("f.created_at", "'feedback_likes'", "c.agent_id", "COUNT(*)", with_feedback, "f.rating='like'"),
+            ]
+
+        return commands
+
+    def _message_usage_backfill_command(self) -> str:
+        """回填消息用量列，取值规则与 src/storage/conversation/rollups.py 的 extract_usage 一致"""
+
+        def tokens(field: str) -> str:
+            return (
+                "CASE WHEN json_type(extra_metadata, '$.usage_metadata') = 'object' "
+                f"THEN CAST(COALESCE(json_extract(extra_metadata, '$.usage_metadata.{field}'), 0) AS INTEGER) END"
+            )
+
+        return (
+            "UPDATE messages SET "
+            "model_name = json_extract(extra_metadata, '$.response_metadata.model_name'), "
+            f"input_tokens = {tokens('input_tokens')}, "
+            f"output_tokens = {tokens('output_tokens')} "
+            "WHERE extra_metadata IS NOT NULL AND json_valid(extra_metadata)"
+        )
+
     def get_latest_migration_version(self) -> int:
         """获取最新迁移版本号"""
         migrations = self.get_migrations()
@@ -310,6 +388,85 @@ class DatabaseMigrator:
 
         migrations.append((4, "添加部门功能", v4_commands))
 
+        # 迁移 v5: 为 mcp_servers 表添加可缓存工具列表
+        v5_commands: list[str] = []
+
+        if not self.check_column_exists("mcp_servers", "cacheable_tools"):
+            v5_commands.append("ALTER TABLE mcp_servers ADD COLUMN cacheable_tools JSON")
+
+        migrations.append((5, "为 MCP 服务器表添加可缓存工具字段", v5_commands))
+
+        # 迁移 v6: 为 tasks 表添加优先级字段
+        v6_commands: list[str] = []
+
+        if self.check_table_exists("tasks") and not self.check_column_exists("tasks", "priority"):
+            v6_commands.append("ALTER TABLE tasks ADD COLUMN priority VARCHAR(16) NOT NULL DEFAULT 'normal'")
+
+        migrations.append((6, "为任务表添加优先级字段", v6_commands))
+
+        # 迁移 v7: 为 tasks 表添加多进程执行相关字段
+        v7_commands: list[str] = []
+
+        if self.check_table_exists("tasks"):
+            if not self.check_column_exists("tasks", "handler"):
+                v7_commands.append("ALTER TABLE tasks ADD COLUMN handler VARCHAR(255)")
+            if not self.check_column_exists("tasks", "backend"):
+                v7_commands.append("ALTER TABLE tasks ADD COLUMN backend VARCHAR(16) NOT NULL DEFAULT 'local'")
+            if not self.check_column_exists("tasks", "worker_id"):
+                v7_commands.append("ALTER TABLE tasks ADD COLUMN worker_id VARCHAR(128)")
+            if not self.check_column_exists("tasks", "heartbeat_at"):
+                v7_commands.append("ALTER TABLE tasks ADD COLUMN heartbeat_at DATETIME")
+
+        migrations.append((7, "为任务表添加多进程执行字段", v7_commands))
+
+        # 迁移 v8: 为 tasks 表添加断点字段
+        v8_commands: list[str] = []
+
+        if self.check_table_exists("tasks") and not self.check_column_exists("tasks", "checkpoint"):
+            v8_commands.append("ALTER TABLE tasks ADD COLUMN checkpoint JSON")
+
+        migrations.append((8, "为任务表添加断点字段", v8_commands))
+
+        # 迁移 v9: 由历史明细回填仪表板小时聚合表（表本身由 create_all 创建）
+        v9_commands: list[str] = []
+
+        if self.check_table_exists("dashboard_rollups") and self.check_table_exists("messages"):
+            v9_commands = self._dashboard_rollup_backfill_commands()
+
+        migrations.append((9, "回填仪表板预聚合统计", v9_commands))
+
+        # 迁移 v10: 将消息的模型名与 token 用量从 extra_metadata 提升为列并回填
+        v10_commands: list[str] = []
+
+        if self.check_table_exists("messages"):
+            usage_columns = [("model_name", "VARCHAR(100)"), ("input_tokens", "INTEGER"), ("output_tokens", "INTEGER")]
+            missing_columns = [(c, t) for c, t in usage_columns if not self.check_column_exists("messages", c)]
+            if missing_columns:
+                v10_commands = [f"ALTER TABLE messages ADD COLUMN {c} {t}" for c, t in missing_columns]
+                v10_commands.append(self._message_usage_backfill_command())
+
+        migrations.append((10, "将消息模型名与 token 用量提升为列", v10_commands))
+
+        # 迁移 v11: 对话、消息、反馈列表 keyset 分页所需的复合索引
+        v11_commands: list[str] = []
+
+        if self.check_table_exists("conversations"):
+            v11_commands += [
+                "CREATE INDEX IF NOT EXISTS ix_conversations_user_status_updated "
+                "ON conversations (user_id, status, updated_at)",
+                "CREATE INDEX IF NOT EXISTS ix_conversations_status_updated ON conversations (status, updated_at)",
+            ]
+        if self.check_table_exists("messages"):
+            v11_commands.append(
+                "CREATE INDEX IF NOT EXISTS ix_messages_conversation_created ON messages (conversation_id, created_at)"
+            )
+        if self.check_table_exists("message_feedbacks"):
+            v11_commands.append(
+                "CREATE INDEX IF NOT EXISTS ix_message_feedbacks_created_at ON message_feedbacks (created_at)"
+            )
+
+        migrations.append((11, "添加列表分页复合索引", v11_commands))
+
         # 未来的迁移可以在这里添加
         # migrations.append((
         #     2,
@@ -1,6 +1,7 @@
 import asyncio
 import importlib
 import inspect
+import time
 from pathlib import Path
 
 from server.utils.singleton import SingletonMeta
@@ -36,8 +37,24 @@ class AgentManager(metaclass=SingletonMeta):
         return list(self._instances.values())
 
     async def reload_all(self):
+        """在后台重建所有智能体的 graph（知识库、MCP 变更后调用），重建完成前继续使用旧 graph"""
         for agent_id in self._classes.keys():
-            self.get_agent(agent_id, reload=True)
+            self.get_agent(agent_id, reload_graph=True)
+
+    async def warm_up_all(self):
+        """预构建所有智能体的 graph 与工具，避免部署后首个对话承担冷启动开销"""
+        from src.services.mcp_service import get_tools_from_all_servers
+
+        start = time.monotonic()
+        # 先统一拉取 MCP 工具，避免各智能体并发构建时重复连接同一服务器
+        try:
+            await get_tools_from_all_servers()
+        except Exception as e:
+            logger.warning(f"预热 MCP 工具失败: {e}")
+
+        agents = self.get_agents()
+        results = await asyncio.gather(*[agent.warm_up() for agent in agents])
+        logger.info(f"智能体预热完成: {sum(results)}/{len(agents)} 个成功，耗时 {time.monotonic() - start:.2f}s")
 
     async def get_agents_info(self):
         agents = self.get_agents()
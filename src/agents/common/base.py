@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import importlib.util
 import os
 import tomllib as tomli
@@ -31,6 +32,7 @@ class BaseAgent:
         self.workdir = Path(sys_config.save_dir) / "agents" / self.module_name
         self.workdir.mkdir(parents=True, exist_ok=True)
         self._metadata_cache = None  # Cache for metadata to avoid repeated file reads
+        self._rebuild_task: asyncio.Task | None = None  # 后台重建 graph 的任务
 
     @property
     def module_name(self) -> str:
@@ -133,9 +135,37 @@ class BaseAgent:
             return []
 
     def reload_graph(self):
-        """重置 graph 缓存，强制下次调用 get_graph 时重新构建"""
-        self.graph = None
-        logger.info(f"{self.name} graph 缓存已清空，将在下次调用时重新构建")
+        """在后台重建 graph，构建完成后原子替换，期间继续使用旧 graph 提供服务"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 没有运行中的事件循环（如脚本调用），退化为清空缓存
+            self.graph = None
+            logger.info(f"{self.name} graph 缓存已清空，将在下次调用时重新构建")
+            return
+
+        if self._rebuild_task and not self._rebuild_task.done():
+            self._rebuild_task.cancel()
+        self._rebuild_task = loop.create_task(self._rebuild_graph())
+        logger.info(f"{self.name} graph 将在后台重建")
+
+    async def _rebuild_graph(self):
+        try:
+            self.graph = await self.get_graph(force_rebuild=True)
+            logger.info(f"{self.name} graph 后台重建完成")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"{self.name} graph 后台重建失败，继续使用旧 graph: {e}")
+
+    async def warm_up(self) -> bool:
+        """预构建 graph（包括 checkpointer、MCP 与知识库工具），失败时不影响服务启动"""
+        try:
+            await self.get_graph()
+            return True
+        except Exception as e:
+            logger.error(f"预热智能体 {self.name} 失败: {e}")
+            return False
 
     @abstractmethod
     async def get_graph(self, **kwargs) -> CompiledStateGraph:
@@ -143,10 +173,16 @@ class BaseAgent:
         获取并编译对话图实例。
         必须确保在编译时设置 checkpointer，否则将无法获取历史记录。
         例如: graph = workflow.compile(checkpointer=sqlite_checkpointer)
+
+        实现应将构建结果缓存到 self.graph；传入 force_rebuild=True 时忽略缓存重新构建（用于后台重建）。
         """
         pass
 
     async def _get_checkpointer(self):
+        # 复用已创建的 checkpointer，避免每次重建 graph 都新建数据库连接
+        if self.checkpointer is not None:
+            return self.checkpointer
+
         # 创建数据库连接并确保设置 checkpointer
         checkpointer = None
 
@@ -157,6 +193,7 @@ class BaseAgent:
             logger.error(f"构建 Graph 设置 checkpointer 时出错: {e}, 尝试使用内存存储")
             checkpointer = InMemorySaver()
 
+        self.checkpointer = checkpointer
         return checkpointer
 
     async def get_async_conn(self) -> aiosqlite.Connection:
@@ -1,5 +1,6 @@
 """Define the configurable parameters for the agent."""
 
+import copy
 import os
 import uuid
 from dataclasses import MISSING, dataclass, field, fields
@@ -15,6 +16,10 @@ from src.utils import logger
 
 from .tools import gen_tool_info, get_buildin_tools
 
+# 智能体文件配置缓存 {module_name: (config_mtime_ns, file_config)}
+# 配置文件未变化时复用解析结果，避免每次对话都重新解析 YAML
+_file_config_cache: dict[str, tuple[int | None, dict]] = {}
+
 
 @dataclass(kw_only=True)
 class BaseContext:
@@ -101,23 +106,38 @@ class BaseContext:
     def from_file(cls, module_name: str, input_context: dict = None) -> "BaseContext":
         """Load configuration from a YAML file. 用于持久化配置"""
 
-        # 从文件加载配置
+        # 每次构造新实例，thread_id/user_id 等 default_factory 字段重新生成
         context = cls()
+        context.update(copy.deepcopy(cls._load_file_config(module_name)))
+
+        if input_context:
+            context.update(input_context)
+
+        return context
+
+    @staticmethod
+    def _load_file_config(module_name: str) -> dict:
+        """读取智能体的文件配置，按配置文件 mtime 缓存解析结果"""
         config_file_path = Path(sys_config.save_dir) / "agents" / module_name / "config.yaml"
-        if module_name is not None and os.path.exists(config_file_path):
-            file_config = {}
+        try:
+            mtime = os.stat(config_file_path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        cached = _file_config_cache.get(module_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        file_config = {}
+        if mtime is not None:
             try:
                 with open(config_file_path, encoding="utf-8") as f:
                     file_config = yaml.safe_load(f) or {}
             except Exception as e:
                 logger.error(f"加载智能体配置文件出错: {e}")
 
-            context.update(file_config)
-
-        if input_context:
-            context.update(input_context)
-
-        return context
+        _file_config_cache[module_name] = (mtime, file_config)
+        return file_config
 
     @classmethod
     def save_to_file(cls, config: dict, module_name: str) -> bool:
@@ -136,6 +156,7 @@ class BaseContext:
             with open(config_file_path, "w", encoding="utf-8") as f:
                 yaml.dump(configurable_config, f, indent=2, allow_unicode=True)
 
+            _file_config_cache.pop(module_name, None)
             return True
         except Exception as e:
             logger.error(f"保存智能体配置文件出错: {e}")
@@ -7,7 +7,7 @@ from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResp
 from langchain_core.messages import SystemMessage
 
 from src.agents.common import load_chat_model
-from src.agents.common.tools import get_buildin_tools, get_kb_based_tools
+from src.agents.common.tools import get_buildin_tools, get_kb_based_tools, search_knowledge_bases
 from src.services.mcp_service import get_enabled_mcp_tools
 from src.utils.datetime_utils import shanghai_now
 from src.utils.logging_config import logger
@@ -63,7 +63,7 @@ class RuntimeConfigMiddleware(AgentMiddleware):
         self.tools: list[Any] = []
         # 预加载工具列表（仅当启用工具覆盖时）
         if self.enable_tools_override:
-            self.kb_tools = get_kb_based_tools()
+            self.kb_tools = get_kb_based_tools() + [search_knowledge_bases]
             self.buildin_tools = get_buildin_tools()
             self.tools = self.kb_tools + self.buildin_tools + (extra_tools or [])
         elif extra_tools:
@@ -129,11 +129,13 @@ class RuntimeConfigMiddleware(AgentMiddleware):
                 if tool_name in tools_map:
                     selected_tools.append(tools_map[tool_name])
 
-        # 2. 知识库工具
+        # 2. 知识库工具（多个知识库时额外提供并行检索工具）
         knowledges = getattr(context, self.knowledges_context_name, None)
         if knowledges:
             kb_tools = get_kb_based_tools(db_names=knowledges)
             selected_tools.extend(kb_tools)
+            if len(kb_tools) > 1 and self.knowledges_context_name == "knowledges":
+                selected_tools.append(search_knowledge_bases)
 
         # 3. MCP 工具（使用统一入口，自动过滤 disabled_tools）
         mcps = getattr(context, self.mcps_context_name, None)
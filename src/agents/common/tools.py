@@ -5,7 +5,7 @@ import uuid
 from typing import Annotated, Any
 
 import requests
-from langchain.tools import tool
+from langchain.tools import ToolRuntime, tool
 from langchain_core.tools import StructuredTool
 from langgraph.types import interrupt
 from pydantic import BaseModel, Field
@@ -132,11 +132,11 @@ Keyword (query): Use keywords that may help answer the question for querying, do
 
 
 @tool(name_or_callable="Query Knowledge Graph", description=KG_QUERY_DESCRIPTION)
-def query_knowledge_graph(query: Annotated[str, "The keyword to query knowledge graph."]) -> Any:
+async def query_knowledge_graph(query: Annotated[str, "The keyword to query knowledge graph."]) -> Any:
     """Use this tool to query triple information contained in the knowledge graph. Keyword (query): Use keywords that may help answer the question for querying, do not directly use the user's raw input for querying."""
     try:
         logger.debug(f"Querying knowledge graph with: {query}")
-        result = graph_base.query_node(query, hops=2, return_format="triples")
+        result = await graph_base.aquery_node(query, hops=2, return_format="triples")
         logger.debug(
             f"Knowledge graph query returned "
             f"{len(result.get('triples', [])) if isinstance(result, dict) else 'N/A'} triples"
@@ -169,15 +169,30 @@ class CommonKnowledgeRetriever(KnowledgeRetrieverModel):
     file_name: str = Field(description="Restrict to specific filename. When operation type is 'search', you can specify a filename, supports fuzzy matching")
 
 
+# 知识库工具缓存：随 knowledge_base.access_version 失效，避免每次请求重建 StructuredTool
+_kb_tools_cache: dict[str, Any] = {"version": None, "tools": {}, "name_to_id": {}}
+
+
 def get_kb_based_tools(db_names: list[str] | None = None) -> list:
     """获取所有知识库基于的工具"""
-    # 获取所有知识库
-    kb_tools = []
-    retrievers = knowledge_base.get_retrievers()
+    version = knowledge_base.access_version
+    if _kb_tools_cache["version"] != version:
+        retrievers = knowledge_base.get_retrievers()
+        _kb_tools_cache["tools"] = _build_kb_tools(retrievers)
+        _kb_tools_cache["name_to_id"] = {kb["name"]: kb_id for kb_id, kb in retrievers.items()}
+        _kb_tools_cache["version"] = version
+
+    tools_by_id = _kb_tools_cache["tools"]
     if db_names is None:
-        db_ids = None
-    else:
-        db_ids = [kb_id for kb_id, kb in retrievers.items() if kb["name"] in db_names]
+        return list(tools_by_id.values())
+
+    name_to_id = _kb_tools_cache["name_to_id"]
+    return [tools_by_id[db_id] for name in db_names if (db_id := name_to_id.get(name)) in tools_by_id]
+
+
+def _build_kb_tools(retrievers: dict[str, dict]) -> dict[str, StructuredTool]:
+    """为每个知识库构建检索工具 {db_id: tool}"""
+    kb_tools = {}
 
     def _create_retriever_wrapper(db_id: str, retriever_info: dict[str, Any]):
         """创建检索器包装函数的工厂函数，避免闭包变量捕获问题"""
@@ -242,9 +257,6 @@ def get_kb_based_tools(db_names: list[str] | None = None) -> list:
         return async_retriever_wrapper
 
     for db_id, retrieve_info in retrievers.items():
-        if db_ids is not None and db_id not in db_ids:
-            continue
-
         try:
             # Build tool description
             description = (
@@ -276,7 +288,7 @@ def get_kb_based_tools(db_names: list[str] | None = None) -> list:
                 metadata=retrieve_info["metadata"] | {"tag": ["knowledgebase"]},
             )
 
-            kb_tools.append(tool)
+            kb_tools[db_id] = tool
             # logger.debug(f"Successfully created tool {tool_id} for database {db_id}")
 
         except Exception as e:
@@ -286,6 +298,111 @@ def get_kb_based_tools(db_names: list[str] | None = None) -> list:
     return kb_tools
 
 
+# 多知识库并行检索：单个知识库的最长等待时间（秒），超时的知识库结果会被丢弃
+MULTI_KB_QUERY_TIMEOUT = 20
+MULTI_KB_TOP_K = 10
+
+
+def _extract_chunks(result: Any) -> list[dict]:
+    """从不同类型知识库的 aquery 结果中提取可排序的文档块"""
+    if isinstance(result, list):
+        return [chunk for chunk in result if isinstance(chunk, dict)]
+    if isinstance(result, dict):
+        return [chunk for chunk in result.get("chunks", []) if isinstance(chunk, dict)]
+    return []
+
+
+def _normalize_chunk_scores(chunks: list[dict]) -> list[float]:
+    """将单个知识库的分数归一化到 [0, 1]；没有分数的结果（如 LightRAG）按排名折算"""
+    raw_scores = [chunk.get("rerank_score", chunk.get("score")) for chunk in chunks]
+    if chunks and all(isinstance(score, int | float) for score in raw_scores):
+        low, high = min(raw_scores), max(raw_scores)
+        if high > low:
+            return [(score - low) / (high - low) for score in raw_scores]
+        return [1.0] * len(chunks)
+
+    total = len(chunks)
+    return [1.0 - rank / total for rank in range(total)]
+
+
+async def multi_kb_search(query_text: str, db_names: list[str], top_k: int = MULTI_KB_TOP_K) -> list[dict]:
+    """并发检索多个知识库，归一化分数后合并为一个排序列表"""
+    retrievers = knowledge_base.get_retrievers()
+    name_to_id = {info["name"]: db_id for db_id, info in retrievers.items()}
+    targets = [(name, name_to_id[name]) for name in dict.fromkeys(db_names) if name in name_to_id]
+    if not targets:
+        return []
+
+    async def _query_one(kb_name: str, db_id: str) -> list[dict]:
+        try:
+            result = await asyncio.wait_for(
+                knowledge_base.aquery(query_text, db_id, agent_call=True), timeout=MULTI_KB_QUERY_TIMEOUT
+            )
+        except TimeoutError:
+            logger.warning(f"Multi-KB search timed out on {kb_name} ({db_id}) after {MULTI_KB_QUERY_TIMEOUT}s")
+            return []
+        except Exception as e:
+            logger.error(f"Multi-KB search failed on {kb_name} ({db_id}): {e}")
+            return []
+
+        chunks = _extract_chunks(result)
+        return [
+            {**chunk, "kb_name": kb_name, "db_id": db_id, "score": score, "raw_score": chunk.get("score")}
+            for chunk, score in zip(chunks, _normalize_chunk_scores(chunks))
+        ]
+
+    per_kb_results = await asyncio.gather(*[_query_one(name, db_id) for name, db_id in targets])
+
+    candidates = []
+    seen_contents = set()
+    for chunk in sorted((c for chunks in per_kb_results for c in chunks), key=lambda c: c["score"], reverse=True):
+        content = chunk.get("content", "")
+        if content in seen_contents:
+            continue
+        seen_contents.add(content)
+        candidates.append(chunk)
+
+    # 统一重排序：所有知识库的候选只调用一次 reranker
+    if config.enable_reranker and config.reranker and len(candidates) > 1:
+        try:
+            from src.models.rerank import get_reranker
+
+            reranker = get_reranker(config.reranker)
+            try:
+                documents = [chunk.get("content", "") for chunk in candidates]
+                rerank_scores = await reranker.acompute_score([query_text, documents], normalize=True)
+                for chunk, rerank_score in zip(candidates, rerank_scores):
+                    chunk["rerank_score"] = float(rerank_score)
+                candidates.sort(key=lambda c: c.get("rerank_score", c["score"]), reverse=True)
+            finally:
+                await reranker.aclose()
+        except Exception as e:
+            logger.error(f"Multi-KB rerank failed: {e}, falling back to normalized scores")
+
+    return candidates[:top_k]
+
+
+MULTI_KB_SEARCH_DESCRIPTION = """
+Search all knowledge bases enabled for this conversation at once and return a single ranked list of document fragments.
+Prefer this tool over calling each knowledge base tool one by one when the answer may come from several knowledge bases.
+Each result carries `kb_name` to indicate which knowledge base it came from.
+"""
+
+
+@tool(name_or_callable="search_knowledge_bases", description=MULTI_KB_SEARCH_DESCRIPTION)
+async def search_knowledge_bases(
+    query_text: Annotated[str, "Query keywords. Use keywords that may help answer the question."],
+    runtime: ToolRuntime,
+) -> Any:
+    """Search all enabled knowledge bases concurrently and merge the ranked results."""
+    db_names = getattr(runtime.context, "knowledges", None) or []
+    try:
+        return await multi_kb_search(query_text, db_names)
+    except Exception as e:
+        logger.error(f"Multi-KB search error: {e}, {traceback.format_exc()}")
+        return f"Retrieval failed: {str(e)}"
+
+
 def gen_tool_info(tools) -> list[dict[str, Any]]:
     """获取所有工具的信息（用于前端展示）"""
     tools_info = []
@@ -373,10 +490,12 @@ async def get_tools_from_context(context, extra_tools=None) -> list:
             if tool_name in tools_map:
                 selected_tools.append(tools_map[tool_name])
 
-    # 2. 知识库工具
+    # 2. 知识库工具（多个知识库时额外提供并行检索工具）
     if context.knowledges:
         kb_tools = get_kb_based_tools(db_names=context.knowledges)
         selected_tools.extend(kb_tools)
+        if len(kb_tools) > 1:
+            selected_tools.append(search_knowledge_bases)
 
     # 3. MCP 工具（使用统一入口，自动过滤 disabled_tools）
     if context.mcps:
@@ -105,6 +105,9 @@ class DeepAgent(BaseAgent):
 
     async def get_graph(self, **kwargs):
         """构建 Deep Agent 的图"""
+        if self.graph and not kwargs.get("force_rebuild"):
+            return self.graph
+
         # 获取上下文配置
         context = self.context_schema.from_file(module_name=self.module_name)
 
@@ -159,4 +162,5 @@ class DeepAgent(BaseAgent):
             checkpointer=await self._get_checkpointer(),
         )
 
+        self.graph = graph
         return graph
@@ -12,7 +12,7 @@ class MiniAgent(BaseAgent):
         super().__init__(**kwargs)
 
     async def get_graph(self, **kwargs):
-        if self.graph:
+        if self.graph and not kwargs.get("force_rebuild"):
             return self.graph
 
         context = self.context_schema.from_file(module_name=self.module_name)
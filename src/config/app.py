@@ -44,6 +44,28 @@ class Config(BaseModel):
     enable_web_search: bool = Field(default=False, description="Enable Web Search|是否启用网络搜索")
     enable_api_docs: bool = Field(default=False, description="Enable API Docs in Production|是否生产环境启用API文档")
 
+    # ============================================================
+    # 任务队列配置
+    # ============================================================
+    tasker_worker_count: int = Field(default=4, description="Background Task Workers|后台任务并发数")
+    tasker_type_concurrency: dict[str, int] = Field(
+        default={
+            "knowledge_ingest": 2,
+            "knowledge_parse": 2,
+            "knowledge_index": 2,
+            "rag_evaluation": 1,
+            "benchmark_generation": 1,
+        },
+        description="Per Task Type Concurrency Limits|各类型任务并发上限",
+    )
+    tasker_backend: str = Field(
+        default="local",
+        description=(
+            "Task Execution Backend (local/process)|任务执行后端：local 进程内执行，process 交给独立 worker 进程"
+        ),
+    )
+    tasker_process_workers: int = Field(default=2, description="Task Worker Processes|本机启动的任务 worker 进程数")
+
     # ============================================================
     # 模型配置
     # ============================================================
@@ -3,10 +3,14 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Any
 
+from neo4j import AsyncGraphDatabase
 from neo4j import GraphDatabase as GD
 
 from src.utils import logger
 
+# 异步驱动连接池大小，限制并发图查询占用的 Neo4j 连接数
+NEO4J_ASYNC_POOL_SIZE = int(os.environ.get("NEO4J_ASYNC_POOL_SIZE", 50))
+
 
 @dataclass
 class GraphQueryConfig:
@@ -154,17 +158,33 @@ class Neo4jConnectionManager:
 
     def __init__(self):
         self.driver = None
+        self._async_driver = None
         self.status = "closed"
         self._connect()
 
+    @staticmethod
+    def _get_connection_params():
+        uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
+        username = os.environ.get("NEO4J_USERNAME", "neo4j")
+        password = os.environ.get("NEO4J_PASSWORD", "0123456789")
+        return uri, (username, password)
+
+    @property
+    def async_driver(self):
+        """异步驱动（首次使用时创建），供事件循环中的查询使用，避免阻塞"""
+        if self._async_driver is None:
+            uri, auth = self._get_connection_params()
+            self._async_driver = AsyncGraphDatabase.driver(
+                uri, auth=auth, max_connection_pool_size=NEO4J_ASYNC_POOL_SIZE
+            )
+        return self._async_driver
+
     def _connect(self):
         """建立 Neo4j 连接"""
         if self.driver and self._is_connected():
             return
 
-        uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
-        username = os.environ.get("NEO4J_USERNAME", "neo4j")
-        password = os.environ.get("NEO4J_PASSWORD", "0123456789")
+        uri, (username, password) = self._get_connection_params()
 
         try:
             self.driver = GD.driver(uri, auth=(username, password))
@@ -199,6 +219,12 @@ class Neo4jConnectionManager:
             self.driver = None
             self.status = "closed"
 
+    async def aclose(self):
+        """关闭异步驱动"""
+        if self._async_driver:
+            await self._async_driver.close()
+            self._async_driver = None
+
 
 class BaseNeo4jAdapter:
     """
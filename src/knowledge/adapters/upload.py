@@ -1,3 +1,4 @@
+import asyncio
 from typing import TYPE_CHECKING, Any
 
 from src.knowledge.adapters.base import BaseNeo4jAdapter
@@ -44,15 +45,16 @@ class UploadGraphAdapter(GraphAdapter):
 
         # 如果关键词是 "*" 或者为空，则执行采样查询
         if not params["keyword"] or params["keyword"] == "*":
-            # 使用 BaseNeo4jAdapter 的连通子图查询
+            # 使用 BaseNeo4jAdapter 的连通子图查询（同步驱动，放到线程中执行避免阻塞事件循环）
             num = kwargs.get("max_nodes", 100)
-            raw_results = self._db._get_sample_nodes_with_connections(
+            raw_results = await asyncio.to_thread(
+                self._db._get_sample_nodes_with_connections,
                 num=num,
                 label_filter="Upload",
             )
         else:
             # 否则执行关键词搜索（使用 service 的查询功能）
-            raw_results = self.service.query_node(
+            raw_results = await self.service.aquery_node(
                 keyword=params["keyword"],
                 threshold=params.get("threshold", 0.9),
                 kgdb_name=params.get("kgdb_name", "neo4j"),
@@ -98,7 +100,7 @@ class UploadGraphAdapter(GraphAdapter):
     async def get_labels(self) -> list[str]:
         """获取所有标签 - 使用 UploadGraphService"""
         kgdb_name = self.config.get("kgdb_name", "neo4j")
-        info = self.service.get_graph_info(graph_name=kgdb_name)
+        info = await asyncio.to_thread(self.service.get_graph_info, graph_name=kgdb_name)
         return info.get("labels", []) if info else []
 
     def _normalize_query_params(self, keyword: str, kwargs: dict) -> dict[str, Any]:
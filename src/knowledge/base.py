@@ -141,7 +141,12 @@ class KnowledgeBase(ABC):
         pass
 
     async def add_file_record(
-        self, db_id: str, item: str, params: dict | None = None, operator_id: str | None = None
+        self,
+        db_id: str,
+        item: str,
+        params: dict | None = None,
+        operator_id: str | None = None,
+        task_id: str | None = None,
     ) -> dict:
         """
         Add a file record to metadata (Status: UPLOADED)
@@ -151,6 +156,7 @@ class KnowledgeBase(ABC):
             item: File path or URL
             params: Parameters
             operator_id: Operator ID who created the file
+            task_id: ID of the ingest task that created the file
 
         Returns:
             File metadata record
@@ -169,6 +175,8 @@ class KnowledgeBase(ABC):
         metadata["created_at"] = utc_isoformat()
         if operator_id:
             metadata["created_by"] = operator_id
+        if task_id:
+            metadata["task_id"] = task_id
 
         # Save to metadata
         self.files_meta[file_id] = metadata
@@ -342,6 +350,22 @@ class KnowledgeBase(ABC):
         """
         pass
 
+    async def index_files(self, db_id: str, file_ids: list[str], operator_id: str | None = None) -> list[dict]:
+        """
+        批量入库，默认逐个调用 index_file；支持批量处理的实现（如 LightRAG）可重写
+
+        Returns:
+            每个文件的元数据，失败的文件包含 status=failed、error 和 error_type
+        """
+        results = []
+        for file_id in file_ids:
+            try:
+                results.append(await self.index_file(db_id, file_id, operator_id))
+            except Exception as e:
+                logger.error(f"Index failed for {file_id}: {e}")
+                results.append({"file_id": file_id, "status": "failed", "error": str(e), "error_type": "index_failed"})
+        return results
+
     def create_database(
         self,
         database_name: str,
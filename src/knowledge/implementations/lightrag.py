@@ -1,5 +1,11 @@
+import asyncio
+import copy
+import json
 import os
+import time
 import traceback
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from functools import partial
 
 from lightrag import LightRAG, QueryParam
@@ -13,9 +19,68 @@ from src import config
 from src.knowledge.base import FileStatus, KnowledgeBase
 from src.knowledge.indexing import process_file_to_markdown
 from src.knowledge.utils.kb_utils import get_embedding_config
-from src.utils import hashstr, logger
+from src.knowledge.utils.llm_cache import LLMResponseCache
+from src.utils import logger
 from src.utils.datetime_utils import utc_isoformat
 
+# 同时保持初始化状态的 LightRAG 实例上限，超出后按 LRU 淘汰空闲实例
+LIGHTRAG_MAX_INSTANCES = int(os.getenv("LIGHTRAG_MAX_INSTANCES") or 32)
+# 实例空闲超过该时间（秒）后被淘汰，淘汰时刷新并关闭其存储
+LIGHTRAG_INSTANCE_IDLE_TTL = int(os.getenv("LIGHTRAG_INSTANCE_IDLE_TTL") or 1800)
+# 每个知识库同时进行的 LLM 调用数（实体抽取等），可通过知识库 metadata.llm_max_async 单独配置
+LIGHTRAG_LLM_MAX_ASYNC = int(os.getenv("LIGHTRAG_LLM_MAX_ASYNC") or 4)
+# 每个知识库同时处理的文档数
+LIGHTRAG_MAX_PARALLEL_INSERT = int(os.getenv("LIGHTRAG_MAX_PARALLEL_INSERT") or 2)
+# 查询结果缓存，知识库入库或删除文件时失效
+LIGHTRAG_QUERY_CACHE_SIZE = 256
+LIGHTRAG_QUERY_CACHE_TTL = int(os.getenv("LIGHTRAG_QUERY_CACHE_TTL") or 300)
+
+# QueryParam 支持的参数列表
+LIGHTRAG_QUERY_PARAMS = {
+    "mode",
+    "only_need_context",
+    "only_need_prompt",
+    "response_type",
+    "stream",
+    "top_k",
+    "chunk_top_k",
+    "max_entity_tokens",
+    "max_relation_tokens",
+    "max_total_tokens",
+    "hl_keywords",
+    "ll_keywords",
+    "conversation_history",
+    "history_turns",
+    "model_func",
+    "user_prompt",
+    "enable_rerank",
+    "include_references",
+}
+
+# 实例之间共享的客户端，避免每个知识库各自建立连接
+_MILVUS_ALIAS = "lightrag_shared"
+_neo4j_driver = None
+
+
+def _get_milvus_alias() -> str:
+    """获取共享的 Milvus 连接别名（首次调用时建立连接）"""
+    if not connections.has_connection(_MILVUS_ALIAS):
+        milvus_uri = os.getenv("MILVUS_URI") or "http://localhost:19530"
+        milvus_token = os.getenv("MILVUS_TOKEN") or ""
+        connections.connect(alias=_MILVUS_ALIAS, uri=milvus_uri, token=milvus_token)
+    return _MILVUS_ALIAS
+
+
+def _get_neo4j_driver():
+    """获取共享的 Neo4j 驱动"""
+    global _neo4j_driver
+    if _neo4j_driver is None:
+        neo4j_uri = os.getenv("NEO4J_URI") or "bolt://localhost:7687"
+        neo4j_username = os.getenv("NEO4J_USERNAME") or "neo4j"
+        neo4j_password = os.getenv("NEO4J_PASSWORD") or "0123456789"
+        _neo4j_driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_username, neo4j_password))
+    return _neo4j_driver
+
 
 class LightRagKB(KnowledgeBase):
     """基于 LightRAG 的知识库实现"""
@@ -30,8 +95,24 @@ class LightRagKB(KnowledgeBase):
         """
         super().__init__(work_dir)
 
-        # 存储 LightRAG 实例映射 {db_id: LightRAG}
-        self.instances: dict[str, LightRAG] = {}
+        # LightRAG 实例池 {db_id: LightRAG}，按最近使用顺序排列
+        self.instances: OrderedDict[str, LightRAG] = OrderedDict()
+        self._last_used: dict[str, float] = {}
+        # 正在进行的索引/查询数量，使用中的实例不会被淘汰
+        self._active: dict[str, int] = {}
+        # 正在初始化的实例，同一知识库的并发请求共享同一次初始化
+        self._init_tasks: dict[str, asyncio.Task] = {}
+        self._finalize_tasks: set[asyncio.Task] = set()
+        # 被移出实例池但仍在使用中的实例，最后一个使用者释放后再关闭存储
+        self._retired: dict[str, list[LightRAG]] = {}
+
+        # 按模型配置共享的 LLM / embedding 函数
+        self._llm_funcs: dict[str, callable] = {}
+        self._embedding_funcs: dict[str, EmbeddingFunc] = {}
+        # 每个知识库的持久化 LLM 响应缓存
+        self._llm_caches: dict[str, LLMResponseCache] = {}
+        # 查询结果缓存 {(db_id, query, agent_call, scope, params): (timestamp, result)}
+        self._query_cache: OrderedDict[tuple, tuple[float, object]] = OrderedDict()
 
         logger.info("LightRagKB initialized")
 
@@ -42,13 +123,12 @@ class LightRagKB(KnowledgeBase):
 
     def delete_database(self, db_id: str) -> dict:
         """删除数据库，同时清除Milvus和Neo4j中的数据"""
+        # 先从实例池中移除，避免继续使用已删除的存储
+        self._discard_instance(db_id)
+
         # Drop Milvus collection
         try:
-            milvus_uri = os.getenv("MILVUS_URI") or "http://localhost:19530"
-            milvus_token = os.getenv("MILVUS_TOKEN") or ""
-            connection_alias = f"lightrag_{hashstr(db_id, 6)}"
-
-            connections.connect(alias=connection_alias, uri=milvus_uri, token=milvus_token)
+            connection_alias = _get_milvus_alias()
 
             # 删除 LightRAG 创建的三个集合
             collection_names = [f"{db_id}_chunks", f"{db_id}_relationships", f"{db_id}_entities"]
@@ -58,19 +138,12 @@ class LightRagKB(KnowledgeBase):
                     logger.info(f"Dropped Milvus collection {collection_name}")
                 else:
                     logger.info(f"Milvus collection {collection_name} does not exist, skipping")
-
-            connections.disconnect(connection_alias)
         except Exception as e:
             logger.error(f"Failed to drop Milvus collection {db_id}: {e}")
 
         # Delete Neo4j data
-        neo4j_uri = os.getenv("NEO4J_URI") or "bolt://localhost:7687"
-        neo4j_username = os.getenv("NEO4J_USERNAME") or "neo4j"
-        neo4j_password = os.getenv("NEO4J_PASSWORD") or "0123456789"
-
         try:
-            driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_username, neo4j_password))
-            with driver.session() as session:
+            with _get_neo4j_driver().session() as session:
                 # 删除带有特定 db_id 标签的节点和关系
                 session.run(
                     """
@@ -84,13 +157,17 @@ class LightRagKB(KnowledgeBase):
                 logger.info(f"Deleted Neo4j nodes and relationships for workspace {db_id}")
         except Exception as e:
             logger.error(f"Failed to delete Neo4j data for {db_id}: {e}")
-        finally:
-            if "driver" in locals():
-                driver.close()
 
         # Delete local files and metadata
         return super().delete_database(db_id)
 
+    def update_database(self, db_id: str, name: str, description: str, llm_info: dict = None) -> dict:
+        """更新数据库，LLM 配置变化时丢弃已初始化的实例，下次使用时按新配置重建"""
+        result = super().update_database(db_id, name, description, llm_info)
+        if llm_info is not None:
+            self._discard_instance(db_id)
+        return result
+
     async def _create_kb_instance(self, db_id: str, kb_config: dict) -> LightRAG:
         """创建 LightRAG 实例"""
         logger.info(f"Creating LightRAG instance for {db_id}")
@@ -115,11 +192,15 @@ class LightRagKB(KnowledgeBase):
         working_dir = os.path.join(self.work_dir, db_id)
         os.makedirs(working_dir, exist_ok=True)
 
+        llm_max_async = int(metadata.get("llm_max_async") or LIGHTRAG_LLM_MAX_ASYNC)
+
         # 创建 LightRAG 实例
         rag = LightRAG(
             working_dir=working_dir,
             workspace=db_id,
-            llm_model_func=self._get_llm_func(llm_info),
+            llm_model_func=self._get_kb_llm_func(db_id, llm_info, working_dir, llm_max_async),
+            llm_model_max_async=llm_max_async,
+            max_parallel_insert=LIGHTRAG_MAX_PARALLEL_INSERT,
             embedding_func=self._get_embedding_func(embed_info),
             vector_storage="MilvusVectorDBStorage",
             kv_storage="JsonKVStorage",
@@ -138,32 +219,107 @@ class LightRagKB(KnowledgeBase):
         await initialize_pipeline_status()
 
     async def _get_lightrag_instance(self, db_id: str) -> LightRAG | None:
-        """获取或创建 LightRAG 实例"""
+        """获取或创建 LightRAG 实例（实例池，空闲实例按 LRU 淘汰）"""
         if db_id in self.instances:
+            self.instances.move_to_end(db_id)
+            self._last_used[db_id] = time.monotonic()
+            self._evict_idle_instances()
             return self.instances[db_id]
 
         if db_id not in self.databases_meta:
             return None
 
-        try:
-            # 创建实例
-            rag = await self._create_kb_instance(db_id, {})
-
-            # 异步初始化存储
-            await self._initialize_kb_instance(rag)
-
-            self.instances[db_id] = rag
-            return rag
+        # 同一知识库只初始化一次，并发请求等待同一个初始化任务
+        task = self._init_tasks.get(db_id)
+        if task is None:
+            task = asyncio.create_task(self._create_pooled_instance(db_id))
+            self._init_tasks[db_id] = task
+            task.add_done_callback(lambda _: self._init_tasks.pop(db_id, None))
 
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Failed to create LightRAG instance for {db_id}: {e}")
             logger.error(f"Traceback: {traceback.format_exc()}")
             return None
 
-    def _get_llm_func(self, llm_info: dict):
-        """获取 LLM 函数"""
-        from src.models import select_model
+    async def _create_pooled_instance(self, db_id: str) -> LightRAG:
+        # 创建实例
+        rag = await self._create_kb_instance(db_id, {})
+
+        # 异步初始化存储
+        await self._initialize_kb_instance(rag)
+
+        self.instances[db_id] = rag
+        self._last_used[db_id] = time.monotonic()
+        self._evict_idle_instances()
+        return rag
+
+    @asynccontextmanager
+    async def _use_instance(self, db_id: str):
+        """获取实例并在使用期间标记为活跃，避免长时间的索引/查询过程中被淘汰
+
+        获取实例前即标记活跃，使其在初始化及池内其他实例创建触发的淘汰中同样受保护。
+        """
+        self._active[db_id] = self._active.get(db_id, 0) + 1
+        try:
+            yield await self._get_lightrag_instance(db_id)
+        finally:
+            self._active[db_id] -= 1
+            if self._active[db_id] <= 0:
+                self._active.pop(db_id, None)
+                for retired in self._retired.pop(db_id, []):
+                    self._schedule_finalize(db_id, retired)
+            if db_id in self.instances:
+                self._last_used[db_id] = time.monotonic()
+
+    def _evict_idle_instances(self) -> None:
+        """淘汰超过空闲时间的实例，以及超出池容量时最久未使用的空闲实例"""
+        now = time.monotonic()
+        for db_id in list(self.instances):
+            over_capacity = len(self.instances) > LIGHTRAG_MAX_INSTANCES
+            idle_expired = now - self._last_used.get(db_id, now) > LIGHTRAG_INSTANCE_IDLE_TTL
+            if (over_capacity or idle_expired) and not self._active.get(db_id):
+                self._discard_instance(db_id)
+
+    def _discard_instance(self, db_id: str) -> None:
+        """从实例池移除实例，并在后台刷新、关闭其存储"""
+        rag = self.instances.pop(db_id, None)
+        self._last_used.pop(db_id, None)
+        self._invalidate_query_cache(db_id)
+        if rag is None:
+            return
+
+        logger.info(f"Evicting LightRAG instance for {db_id}")
+        if self._active.get(db_id):
+            # 删除/更新知识库时实例可能仍在使用，等使用结束后再关闭
+            self._retired.setdefault(db_id, []).append(rag)
+            return
+        self._schedule_finalize(db_id, rag)
+
+    def _schedule_finalize(self, db_id: str, rag: LightRAG) -> None:
+        try:
+            task = asyncio.get_running_loop().create_task(self._finalize_instance(db_id, rag))
+        except RuntimeError:
+            # 没有运行中的事件循环时无法异步关闭，交由进程退出时回收
+            return
+        self._finalize_tasks.add(task)
+        task.add_done_callback(self._finalize_tasks.discard)
+
+    async def _finalize_instance(self, db_id: str, rag: LightRAG) -> None:
+        try:
+            await rag.finalize_storages()
+        except Exception as e:
+            logger.error(f"Failed to finalize LightRAG instance for {db_id}: {e}")
 
+        # 实例未被重新创建时关闭其 LLM 缓存
+        if db_id not in self.instances and db_id not in self._init_tasks and db_id in self._llm_caches:
+            self._llm_caches.pop(db_id).close()
+
+    @staticmethod
+    def _get_llm_spec(llm_info: dict) -> str:
         # 如果用户选择了LLM，使用用户选择的；否则使用环境变量默认值
         if llm_info and llm_info.get("model_spec"):
             model_spec = llm_info["model_spec"]
@@ -174,6 +330,46 @@ class LightRagKB(KnowledgeBase):
         else:
             model_spec = config.default_model
             logger.info(f"Using default LLM from environment: {model_spec}")
+        return model_spec
+
+    def _get_kb_llm_func(self, db_id: str, llm_info: dict, working_dir: str, max_async: int):
+        """为知识库包装 LLM 函数：限制并发调用数，并持久化缓存非流式调用的结果"""
+        model_spec = self._get_llm_spec(llm_info)
+        base_func = self._get_llm_func(llm_info)
+        semaphore = asyncio.Semaphore(max_async)
+
+        old_cache = self._llm_caches.pop(db_id, None)
+        if old_cache:
+            old_cache.close()
+        cache = LLMResponseCache(os.path.join(working_dir, "llm_response_cache.db"))
+        self._llm_caches[db_id] = cache
+
+        async def llm_model_func(prompt, system_prompt=None, history_messages=[], **kwargs):
+            cacheable = not kwargs.get("stream")
+            if cacheable:
+                key = cache.make_key(model_spec, prompt, system_prompt, history_messages, kwargs)
+                cached = await cache.aget(key)
+                if cached is not None:
+                    return cached
+
+            async with semaphore:
+                response = await base_func(
+                    prompt, system_prompt=system_prompt, history_messages=history_messages, **kwargs
+                )
+
+            if cacheable and isinstance(response, str):
+                await cache.aset(key, response)
+            return response
+
+        return llm_model_func
+
+    def _get_llm_func(self, llm_info: dict):
+        """获取 LLM 函数（相同模型的知识库共享同一个函数）"""
+        from src.models import select_model
+
+        model_spec = self._get_llm_spec(llm_info)
+        if model_spec in self._llm_funcs:
+            return self._llm_funcs[model_spec]
 
         model = select_model(model_spec=model_spec)
 
@@ -188,13 +384,21 @@ class LightRagKB(KnowledgeBase):
                 **kwargs,
             )
 
+        self._llm_funcs[model_spec] = llm_model_func
         return llm_model_func
 
     def _get_embedding_func(self, embed_info: dict):
-        """获取 embedding 函数"""
+        """获取 embedding 函数（相同配置的知识库共享同一个函数）"""
         config_dict = get_embedding_config(embed_info)
         logger.debug(f"Embedding config dict: {config_dict}")
 
+        cache_key = json.dumps(config_dict, sort_keys=True, default=str)
+        if cache_key not in self._embedding_funcs:
+            self._embedding_funcs[cache_key] = self._build_embedding_func(config_dict)
+        return self._embedding_funcs[cache_key]
+
+    def _build_embedding_func(self, config_dict: dict) -> EmbeddingFunc:
+        """根据 embedding 配置构建 EmbeddingFunc"""
         if config_dict.get("model_id") and config_dict["model_id"].startswith("ollama"):
             from lightrag.llm.ollama import ollama_embed
 
@@ -244,13 +448,118 @@ class LightRagKB(KnowledgeBase):
         Returns:
             Updated file metadata
         """
+        file_meta = self._start_indexing(db_id, file_id, operator_id)
+
+        try:
+            # Read markdown
+            markdown_content = await self._read_markdown_from_minio(file_meta["markdown_file"])
+            file_path = file_meta.get("path")
+
+            async with self._use_instance(db_id) as rag:
+                if not rag:
+                    raise ValueError(f"Failed to get LightRAG instance for {db_id}")
+
+                # Clean up existing chunks if any (for re-indexing)
+                await self.delete_file_chunks_only(db_id, file_id)
+
+                # Insert
+                await rag.ainsert(input=markdown_content, ids=file_id, file_paths=file_path)
+                self._invalidate_query_cache(db_id)
+
+            logger.info(f"Indexed file {file_id} into LightRAG")
+            return self._finish_indexing(file_id, operator_id)
+
+        except Exception as e:
+            logger.error(f"Indexing failed for {file_id}: {e}")
+            self._finish_indexing(file_id, operator_id, error=str(e))
+            raise
+
+    async def index_files(self, db_id: str, file_ids: list[str], operator_id: str | None = None) -> list[dict]:
+        """
+        批量入库：一次性将多个文档送入 LightRAG 流水线，由 LightRAG 并行处理（max_parallel_insert），
+        实体抽取的 LLM 调用受知识库的并发预算限制。单个文件失败不影响其他文件。
+
+        Returns:
+            每个文件的元数据，失败的文件包含 status=failed、error 和 error_type
+        """
+        results: dict[str, dict] = {}
+        started: dict[str, dict] = {}
+        for file_id in file_ids:
+            try:
+                started[file_id] = self._start_indexing(db_id, file_id, operator_id)
+            except Exception as e:
+                logger.error(f"Index failed for {file_id}: {e}")
+                results[file_id] = {
+                    "file_id": file_id,
+                    "status": "failed",
+                    "error": str(e),
+                    "error_type": "index_failed",
+                }
+
+        if started:
+            # 并发读取 markdown
+            contents = await asyncio.gather(
+                *[self._read_markdown_from_minio(meta["markdown_file"]) for meta in started.values()],
+                return_exceptions=True,
+            )
+            batch = {}
+            for (file_id, meta), content in zip(started.items(), contents):
+                if isinstance(content, Exception):
+                    logger.error(f"Indexing failed for {file_id}: {content}")
+                    results[file_id] = self._finish_indexing(file_id, operator_id, error=str(content))
+                else:
+                    batch[file_id] = (content, meta.get("path"))
+
+            if batch:
+                try:
+                    async with self._use_instance(db_id) as rag:
+                        if not rag:
+                            raise ValueError(f"Failed to get LightRAG instance for {db_id}")
+
+                        # Clean up existing chunks if any (for re-indexing)
+                        for file_id in batch:
+                            await self.delete_file_chunks_only(db_id, file_id)
+
+                        ids = list(batch)
+                        await rag.ainsert(
+                            input=[batch[file_id][0] for file_id in ids],
+                            ids=ids,
+                            file_paths=[batch[file_id][1] for file_id in ids],
+                        )
+                        self._invalidate_query_cache(db_id)
+                        doc_errors = await self._get_doc_errors(rag, ids)
+
+                    for file_id in ids:
+                        if file_id in doc_errors:
+                            logger.error(f"Indexing failed for {file_id}: {doc_errors[file_id]}")
+                        results[file_id] = self._finish_indexing(file_id, operator_id, error=doc_errors.get(file_id))
+                    logger.info(f"Indexed {len(ids) - len(doc_errors)}/{len(ids)} files into LightRAG {db_id}")
+
+                except Exception as e:
+                    logger.error(f"Batch indexing failed for {db_id}: {e}, {traceback.format_exc()}")
+                    for file_id in batch:
+                        results[file_id] = self._finish_indexing(file_id, operator_id, error=str(e))
+
+        return [results[file_id] for file_id in file_ids if file_id in results]
+
+    async def _get_doc_errors(self, rag: LightRAG, file_ids: list[str]) -> dict[str, str]:
+        """读取 LightRAG 文档处理状态，返回处理失败的文档及错误信息"""
+        errors = {}
+        for file_id in file_ids:
+            try:
+                doc = await rag.doc_status.get_by_id(file_id)
+            except Exception as e:
+                logger.warning(f"Failed to get LightRAG doc status for {file_id}: {e}")
+                continue
+            if doc and str(doc.get("status", "")).lower().endswith("failed"):
+                errors[file_id] = doc.get("error_msg") or "LightRAG 文档处理失败"
+        return errors
+
+    def _start_indexing(self, db_id: str, file_id: str, operator_id: str | None = None) -> dict:
+        """校验文件状态并标记为入库中，返回文件元数据"""
         if db_id not in self.databases_meta:
             raise ValueError(f"Database {db_id} not found")
 
-        rag = await self._get_lightrag_instance(db_id)
-        if not rag:
-            raise ValueError(f"Failed to get LightRAG instance for {db_id}")
-
         # Get file meta
         if file_id not in self.files_meta:
             raise ValueError(f"File {file_id} not found")
@@ -288,160 +597,115 @@ class LightRagKB(KnowledgeBase):
 
         # Add to processing queue
         self._add_to_processing_queue(file_id)
+        return file_meta
 
-        try:
-            # Read markdown
-            markdown_content = await self._read_markdown_from_minio(file_meta["markdown_file"])
-            file_path = file_meta.get("path")
-
-            # Clean up existing chunks if any (for re-indexing)
-            await self.delete_file_chunks_only(db_id, file_id)
-
-            # Insert
-            await rag.ainsert(input=markdown_content, ids=file_id, file_paths=file_path)
-
-            logger.info(f"Indexed file {file_id} into LightRAG")
-
-            # Update status
-            self.files_meta[file_id]["status"] = FileStatus.INDEXED
-            self.files_meta[file_id]["updated_at"] = utc_isoformat()
-            if operator_id:
-                self.files_meta[file_id]["updated_by"] = operator_id
-            self._save_metadata()
-
-            return self.files_meta[file_id]
-
-        except Exception as e:
-            logger.error(f"Indexing failed for {file_id}: {e}")
-            self.files_meta[file_id]["status"] = FileStatus.ERROR_INDEXING
-            self.files_meta[file_id]["error"] = str(e)
-            self.files_meta[file_id]["updated_at"] = utc_isoformat()
-            if operator_id:
-                self.files_meta[file_id]["updated_by"] = operator_id
-            self._save_metadata()
-            raise
+    def _finish_indexing(self, file_id: str, operator_id: str | None = None, error: str | None = None) -> dict:
+        """更新入库结果状态并移出处理队列，返回文件元数据"""
+        self.files_meta[file_id]["status"] = FileStatus.ERROR_INDEXING if error else FileStatus.INDEXED
+        if error:
+            self.files_meta[file_id]["error"] = error
+        self.files_meta[file_id]["updated_at"] = utc_isoformat()
+        if operator_id:
+            self.files_meta[file_id]["updated_by"] = operator_id
+        self._save_metadata()
 
-        finally:
-            # Remove from processing queue
-            self._remove_from_processing_queue(file_id)
+        # Remove from processing queue
+        self._remove_from_processing_queue(file_id)
+        return self.files_meta[file_id]
 
     async def update_content(self, db_id: str, file_ids: list[str], params: dict | None = None) -> list[dict]:
         """更新内容 - 根据file_ids重新解析文件并更新向量库"""
         if db_id not in self.databases_meta:
             raise ValueError(f"Database {db_id} not found")
 
-        rag = await self._get_lightrag_instance(db_id)
-        if not rag:
-            raise ValueError(f"Failed to get LightRAG instance for {db_id}")
-
         # 处理默认参数
         if params is None:
             params = {}
         content_type = params.get("content_type", "file")
         processed_items_info = []
 
-        for file_id in file_ids:
-            # 从元数据中获取文件信息
-            if file_id not in self.files_meta:
-                logger.warning(f"File {file_id} not found in metadata, skipping")
-                continue
-
-            file_meta = self.files_meta[file_id]
-            file_path = file_meta.get("path")
-
-            if not file_path:
-                logger.warning(f"File path not found for {file_id}, skipping")
-                continue
-
-            # 添加到处理队列
-            self._add_to_processing_queue(file_id)
-
-            try:
-                # 更新状态为处理中
-                self.files_meta[file_id]["processing_params"] = params.copy()
-                self.files_meta[file_id]["status"] = "processing"
-                self._save_metadata()
-
-                # 重新解析文件为 markdown
-                if content_type != "file":
-                    raise ValueError("URL 内容解析已禁用")
-                markdown_content = await process_file_to_markdown(file_path, params=params)
-                markdown_content_lines = markdown_content[:100].replace("\n", " ")
-                logger.info(f"Markdown content: {markdown_content_lines}...")
-
-                # 先删除现有的 LightRAG 数据（仅删除chunks，保留元数据）
-                await self.delete_file_chunks_only(db_id, file_id)
-
-                # 使用 LightRAG 重新插入内容
-                await rag.ainsert(input=markdown_content, ids=file_id, file_paths=file_path)
-
-                logger.info(f"Updated {content_type} {file_path} in LightRAG. Done.")
-
-                # 更新元数据状态
-                self.files_meta[file_id]["status"] = "done"
-                self._save_metadata()
-
-                # 从处理队列中移除
-                self._remove_from_processing_queue(file_id)
-
-                # 返回更新后的文件信息
-                updated_file_meta = file_meta.copy()
-                updated_file_meta["status"] = "done"
-                updated_file_meta["file_id"] = file_id
-                processed_items_info.append(updated_file_meta)
-
-            except Exception as e:
-                error_msg = str(e)
-                logger.error(f"更新{content_type} {file_path} 失败: {error_msg}, {traceback.format_exc()}")
-                self.files_meta[file_id]["status"] = "failed"
-                self.files_meta[file_id]["error"] = error_msg
-                self._save_metadata()
-
-                # 从处理队列中移除
-                self._remove_from_processing_queue(file_id)
-
-                # 返回失败的文件信息
-                failed_file_meta = file_meta.copy()
-                failed_file_meta["status"] = "failed"
-                failed_file_meta["file_id"] = file_id
-                failed_file_meta["error"] = error_msg
-                processed_items_info.append(failed_file_meta)
+        async with self._use_instance(db_id) as rag:
+            if not rag:
+                raise ValueError(f"Failed to get LightRAG instance for {db_id}")
+
+            for file_id in file_ids:
+                # 从元数据中获取文件信息
+                if file_id not in self.files_meta:
+                    logger.warning(f"File {file_id} not found in metadata, skipping")
+                    continue
+
+                file_meta = self.files_meta[file_id]
+                file_path = file_meta.get("path")
+
+                if not file_path:
+                    logger.warning(f"File path not found for {file_id}, skipping")
+                    continue
+
+                # 添加到处理队列
+                self._add_to_processing_queue(file_id)
+
+                try:
+                    # 更新状态为处理中
+                    self.files_meta[file_id]["processing_params"] = params.copy()
+                    self.files_meta[file_id]["status"] = "processing"
+                    self._save_metadata()
+
+                    # 重新解析文件为 markdown
+                    if content_type != "file":
+                        raise ValueError("URL 内容解析已禁用")
+                    markdown_content = await process_file_to_markdown(file_path, params=params)
+                    markdown_content_lines = markdown_content[:100].replace("\n", " ")
+                    logger.info(f"Markdown content: {markdown_content_lines}...")
+
+                    # 先删除现有的 LightRAG 数据（仅删除chunks，保留元数据）
+                    await self.delete_file_chunks_only(db_id, file_id)
+
+                    # 使用 LightRAG 重新插入内容
+                    await rag.ainsert(input=markdown_content, ids=file_id, file_paths=file_path)
+                    self._invalidate_query_cache(db_id)
+
+                    logger.info(f"Updated {content_type} {file_path} in LightRAG. Done.")
+
+                    # 更新元数据状态
+                    self.files_meta[file_id]["status"] = "done"
+                    self._save_metadata()
+
+                    # 从处理队列中移除
+                    self._remove_from_processing_queue(file_id)
+
+                    # 返回更新后的文件信息
+                    updated_file_meta = file_meta.copy()
+                    updated_file_meta["status"] = "done"
+                    updated_file_meta["file_id"] = file_id
+                    processed_items_info.append(updated_file_meta)
+
+                except Exception as e:
+                    error_msg = str(e)
+                    logger.error(f"更新{content_type} {file_path} 失败: {error_msg}, {traceback.format_exc()}")
+                    self.files_meta[file_id]["status"] = "failed"
+                    self.files_meta[file_id]["error"] = error_msg
+                    self._save_metadata()
+
+                    # 从处理队列中移除
+                    self._remove_from_processing_queue(file_id)
+
+                    # 返回失败的文件信息
+                    failed_file_meta = file_meta.copy()
+                    failed_file_meta["status"] = "failed"
+                    failed_file_meta["file_id"] = file_id
+                    failed_file_meta["error"] = error_msg
+                    processed_items_info.append(failed_file_meta)
 
         return processed_items_info
 
     async def aquery(self, query_text: str, db_id: str, agent_call: bool = False, **kwargs) -> str:
         """异步查询知识库"""
-        rag = await self._get_lightrag_instance(db_id)
-        if not rag:
-            raise ValueError(f"Database {db_id} not found")
-
         try:
-            # QueryParam 支持的参数列表
-            valid_params = {
-                "mode",
-                "only_need_context",
-                "only_need_prompt",
-                "response_type",
-                "stream",
-                "top_k",
-                "chunk_top_k",
-                "max_entity_tokens",
-                "max_relation_tokens",
-                "max_total_tokens",
-                "hl_keywords",
-                "ll_keywords",
-                "conversation_history",
-                "history_turns",
-                "model_func",
-                "user_prompt",
-                "enable_rerank",
-                "include_references",
-            }
-
             # 过滤 kwargs，只保留 QueryParam 支持的参数
             query_params = self._get_query_params(db_id)
             query_params = query_params | kwargs
-            filtered_kwargs = {k: v for k, v in query_params.items() if k in valid_params}
+            filtered_kwargs = {k: v for k, v in query_params.items() if k in LIGHTRAG_QUERY_PARAMS}
+            scope = query_params.get("retrieval_content_scope", "chunks")
 
             # 设置查询参数
             params_dict = {
@@ -449,52 +713,94 @@ class LightRagKB(KnowledgeBase):
                 "only_need_context": True,
                 "top_k": 10,
             } | filtered_kwargs
-            param = QueryParam(**params_dict)
 
-            # 执行查询
-            response = await rag.aquery_data(query_text, param)
+            # 智能体只需要文档片段且知识库/调用方未指定检索模式时，默认使用 naive 模式直接做向量检索，
+            # 跳过关键词抽取（LLM 调用）以及实体/关系检索
+            if agent_call and scope == "chunks" and "mode" not in filtered_kwargs:
+                params_dict["mode"] = "naive"
+
+            cache_key = None
+            if not params_dict.get("stream"):
+                params_key = json.dumps(params_dict, sort_keys=True, ensure_ascii=False, default=str)
+                cache_key = (db_id, query_text, agent_call, scope, params_key)
+                cached = self._get_cached_query(cache_key)
+                if cached is not None:
+                    return cached
+
+            async with self._use_instance(db_id) as rag:
+                if not rag:
+                    raise ValueError(f"Database {db_id} not found")
+
+                # 执行查询
+                response = await rag.aquery_data(query_text, QueryParam(**params_dict))
             logger.debug(f"Query response: {str(response)[:1000]}...")
 
-            if agent_call:
-                scope = query_params.get("retrieval_content_scope", "chunks")
-                data = response.get("data", {}) or {}
+            result = self._format_agent_response(response, scope) if agent_call else response
+            if cache_key:
+                self._set_cached_query(cache_key, result)
+            return result
 
-                if scope == "chunks":
-                    return data.get("chunks", [])
+        except Exception as e:
+            logger.error(f"Query error: {e}, {traceback.format_exc()}")
+            return ""
 
-                result = {}
-                if scope in ["graph", "all"]:
-                    # 过滤掉无关信息，保留实体和关系的核心内容
-                    exclude_keys = {"source_id", "file_path", "created_at"}
+    @staticmethod
+    def _format_agent_response(response: dict, scope: str):
+        """按 retrieval_content_scope 整理返回给智能体的内容"""
+        data = response.get("data", {}) or {}
 
-                    ents = data.get("entities", [])
-                    rels = data.get("relationships", [])
+        if scope == "chunks":
+            return data.get("chunks", [])
 
-                    result["entities"] = [{k: v for k, v in e.items() if k not in exclude_keys} for e in ents]
-                    result["relationships"] = [{k: v for k, v in r.items() if k not in exclude_keys} for r in rels]
-                    result["references"] = data.get("references", [])
+        result = {}
+        if scope in ["graph", "all"]:
+            # 过滤掉无关信息，保留实体和关系的核心内容
+            exclude_keys = {"source_id", "file_path", "created_at"}
 
-                if scope == "all":
-                    result["chunks"] = data.get("chunks", [])
+            ents = data.get("entities", [])
+            rels = data.get("relationships", [])
 
-                return result
+            result["entities"] = [{k: v for k, v in e.items() if k not in exclude_keys} for e in ents]
+            result["relationships"] = [{k: v for k, v in r.items() if k not in exclude_keys} for r in rels]
+            result["references"] = data.get("references", [])
 
-            return response
+        if scope == "all":
+            result["chunks"] = data.get("chunks", [])
 
-        except Exception as e:
-            logger.error(f"Query error: {e}, {traceback.format_exc()}")
-            return ""
+        return result
+
+    def _get_cached_query(self, cache_key: tuple):
+        entry = self._query_cache.get(cache_key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > LIGHTRAG_QUERY_CACHE_TTL:
+            self._query_cache.pop(cache_key, None)
+            return None
+        self._query_cache.move_to_end(cache_key)
+        return copy.deepcopy(entry[1])
+
+    def _set_cached_query(self, cache_key: tuple, result) -> None:
+        self._query_cache[cache_key] = (time.monotonic(), copy.deepcopy(result))
+        self._query_cache.move_to_end(cache_key)
+        while len(self._query_cache) > LIGHTRAG_QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+
+    def _invalidate_query_cache(self, db_id: str) -> None:
+        """知识库内容变化（入库、删除）后清除其查询缓存"""
+        for key in [key for key in self._query_cache if key[0] == db_id]:
+            self._query_cache.pop(key, None)
 
     async def delete_file_chunks_only(self, db_id: str, file_id: str) -> None:
         """仅删除文件的chunks数据，保留元数据（用于更新操作）"""
-        rag = await self._get_lightrag_instance(db_id)
-        if rag:
-            try:
-                # 使用 LightRAG 删除文档
-                await rag.adelete_by_doc_id(file_id)
-                logger.info(f"Deleted chunks for file {file_id} from LightRAG")
-            except Exception as e:
-                logger.error(f"Error deleting file {file_id} from LightRAG: {e}")
+        async with self._use_instance(db_id) as rag:
+            if rag:
+                try:
+                    # 使用 LightRAG 删除文档
+                    await rag.adelete_by_doc_id(file_id)
+                    logger.info(f"Deleted chunks for file {file_id} from LightRAG")
+                except Exception as e:
+                    logger.error(f"Error deleting file {file_id} from LightRAG: {e}")
+                self._invalidate_query_cache(db_id)
         # 注意：这里不删除 files_meta[file_id]，保留元数据用于后续操作
 
     async def delete_file(self, db_id: str, file_id: str) -> None:
@@ -521,32 +827,32 @@ class LightRagKB(KnowledgeBase):
 
         # 使用 LightRAG 获取 chunks
         content_info = {"lines": []}
-        rag = await self._get_lightrag_instance(db_id)
-        if rag:
-            try:
-                # 获取文档的所有 chunks
-                # LightRAG v1.4+ 使用 JsonKVStorage，通过 _data 属性访问所有数据
-                if hasattr(rag.text_chunks, "_data"):
-                    all_chunks = dict(rag.text_chunks._data)
-                else:
-                    logger.warning("text_chunks does not have _data attribute, cannot get file content")
-                    return content_info
-
-                # 筛选属于该文档的 chunks
-                doc_chunks = []
-                for chunk_id, chunk_data in all_chunks.items():
-                    if isinstance(chunk_data, dict) and chunk_data.get("full_doc_id") == file_id:
-                        chunk_data["id"] = chunk_id
-                        chunk_data["content_vector"] = []
-                        doc_chunks.append(chunk_data)
-
-                # 按 chunk_order_index 排序
-                doc_chunks.sort(key=lambda x: x.get("chunk_order_index", 0))
-                content_info["lines"] = doc_chunks
-
-            except Exception as e:
-                logger.error(f"Failed to get file content from LightRAG: {e}")
-                content_info["lines"] = []
+        async with self._use_instance(db_id) as rag:
+            if rag:
+                try:
+                    # 获取文档的所有 chunks
+                    # LightRAG v1.4+ 使用 JsonKVStorage，通过 _data 属性访问所有数据
+                    if hasattr(rag.text_chunks, "_data"):
+                        all_chunks = dict(rag.text_chunks._data)
+                    else:
+                        logger.warning("text_chunks does not have _data attribute, cannot get file content")
+                        return content_info
+
+                    # 筛选属于该文档的 chunks
+                    doc_chunks = []
+                    for chunk_id, chunk_data in all_chunks.items():
+                        if isinstance(chunk_data, dict) and chunk_data.get("full_doc_id") == file_id:
+                            chunk_data["id"] = chunk_id
+                            chunk_data["content_vector"] = []
+                            doc_chunks.append(chunk_data)
+
+                    # 按 chunk_order_index 排序
+                    doc_chunks.sort(key=lambda x: x.get("chunk_order_index", 0))
+                    content_info["lines"] = doc_chunks
+
+                except Exception as e:
+                    logger.error(f"Failed to get file content from LightRAG: {e}")
+                    content_info["lines"] = []
 
         # Try to read markdown content if available
         file_meta = self.files_meta[file_id]
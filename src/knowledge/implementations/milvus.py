@@ -670,6 +670,40 @@ class MilvusKB(KnowledgeBase):
 
         return content_info
 
+    async def get_all_chunks(self, db_id: str, with_vectors: bool = False, batch_size: int = 1000) -> list[dict]:
+        """遍历 Milvus 集合读取知识库全部 chunks（可选附带已存储的向量），避免逐文件查询"""
+        collection = await self._get_milvus_collection(db_id)
+        if not collection:
+            return []
+
+        output_fields = ["content", "chunk_id", "file_id", "chunk_index"]
+        if with_vectors:
+            output_fields.append("embedding")
+
+        def _iterate():
+            iterator = collection.query_iterator(batch_size=batch_size, expr='id != ""', output_fields=output_fields)
+            rows = []
+            try:
+                while batch := iterator.next():
+                    rows.extend(batch)
+            finally:
+                iterator.close()
+            return rows
+
+        rows = await asyncio.to_thread(_iterate)
+        chunks = []
+        for row in rows:
+            chunk = {
+                "id": row.get("chunk_id", ""),
+                "content": row.get("content", ""),
+                "file_id": row.get("file_id"),
+                "chunk_index": row.get("chunk_index", 0),
+            }
+            if with_vectors:
+                chunk["embedding"] = row.get("embedding")
+            chunks.append(chunk)
+        return chunks
+
     async def get_file_info(self, db_id: str, file_id: str) -> dict:
         """获取文件完整信息（基本信息+内容信息）- 保持向后兼容"""
         if file_id not in self.files_meta:
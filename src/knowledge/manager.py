@@ -3,6 +3,7 @@ import json
 import os
 import shutil
 import tempfile
+from contextlib import asynccontextmanager
 
 from src.knowledge.base import KBNotFoundError, KnowledgeBase
 from src.knowledge.factory import KnowledgeBaseFactory
@@ -36,6 +37,12 @@ class KnowledgeBaseManager:
         # 元数据锁
         self._metadata_lock = asyncio.Lock()
 
+        # 知识库访问权限缓存 {department_id: (version, db_ids, db_names)}
+        # 知识库增删改或部门变更时递增 version，缓存随之失效
+        self._access_version = 0
+        self._access_cache: dict[object, tuple[int, frozenset[str], frozenset[str]]] = {}
+        self._retrievers_cache: tuple[int, dict[str, dict]] | None = None
+
         # 加载全局元数据
         self._load_global_metadata()
         self._normalize_global_metadata()
@@ -159,6 +166,22 @@ class KnowledgeBaseManager:
             except Exception as e:
                 logger.error(f"Failed to initialize {kb_type} knowledge base: {e}")
 
+    def reload_metadata(self) -> None:
+        """
+        从磁盘重新加载全局元数据和各知识库实例的元数据
+
+        worker 进程中的管理器只在导入时加载一次元数据，之后 API 进程新建的知识库、
+        基准或文件对其不可见；执行依赖这些元数据的任务前调用本方法同步磁盘状态。
+        仅应在不写元数据的进程中调用，否则会覆盖尚未落盘的内存修改。
+        """
+        self._load_global_metadata()
+        self._normalize_global_metadata()
+        self._initialize_existing_kbs()
+        for kb_instance in self.kb_instances.values():
+            kb_instance._load_metadata()
+            kb_instance._normalize_metadata_state()
+        self.invalidate_access_cache()
+
     def _get_or_create_kb_instance(self, kb_type: str) -> KnowledgeBase:
         """
         获取或创建知识库实例
@@ -214,6 +237,60 @@ class KnowledgeBaseManager:
     # 统一的外部接口 - 与原始 LightRagBasedKB 兼容
     # =============================================================================
 
+    @property
+    def access_version(self) -> int:
+        """知识库列表/权限版本号，任何影响检索工具或访问权限的变更都会使其递增"""
+        return self._access_version
+
+    def invalidate_access_cache(self) -> None:
+        """使权限缓存和检索器缓存失效（知识库增删改、部门变更时调用）"""
+        self._access_version += 1
+        self._access_cache.clear()
+        self._retrievers_cache = None
+        logger.debug(f"Knowledge base access cache invalidated, version={self._access_version}")
+
+    @staticmethod
+    def _is_accessible_by_department(db_meta: dict, department_id) -> bool:
+        """根据 share_config 判断部门是否可访问知识库，未配置时默认共享"""
+        share_config = db_meta.get("share_config") or (db_meta.get("additional_params") or {}).get("share_config")
+        share_config = share_config or {}
+        if share_config.get("is_shared", True):
+            return True
+        return department_id in (share_config.get("accessible_departments") or [])
+
+    def _resolve_access(self, user: dict) -> tuple[frozenset[str], frozenset[str]]:
+        """解析用户可访问的知识库 (db_ids, names)，按部门缓存"""
+        cache_key = "*" if user.get("role") == "superadmin" else user.get("department_id")
+        cached = self._access_cache.get(cache_key)
+        if cached and cached[0] == self._access_version:
+            return cached[1], cached[2]
+
+        db_ids = []
+        db_names = []
+        for db_id, meta in self.global_databases_meta.items():
+            if cache_key == "*" or self._is_accessible_by_department(meta, cache_key):
+                db_ids.append(db_id)
+                if meta.get("name"):
+                    db_names.append(meta["name"])
+
+        entry = (self._access_version, frozenset(db_ids), frozenset(db_names))
+        self._access_cache[cache_key] = entry
+        return entry[1], entry[2]
+
+    def get_accessible_db_ids(self, user: dict) -> frozenset[str]:
+        """获取用户可访问的知识库 ID 集合（带缓存）"""
+        return self._resolve_access(user)[0]
+
+    def get_accessible_db_names(self, user: dict) -> frozenset[str]:
+        """获取用户可访问的知识库名称集合（带缓存）"""
+        return self._resolve_access(user)[1]
+
+    async def get_databases_by_user(self, user: dict) -> dict:
+        """获取用户有权访问的数据库信息"""
+        accessible_ids = self.get_accessible_db_ids(user)
+        databases = [db for db in self.get_databases()["databases"] if db.get("db_id") in accessible_ids]
+        return {"databases": databases}
+
     def get_kb(self, db_id: str) -> KnowledgeBase:
         """Public accessor to fetch the underlying knowledge base instance by database id.
 
@@ -290,6 +367,7 @@ class KnowledgeBaseManager:
                 "additional_params": kwargs.copy(),
             }
             self._save_global_metadata()
+        self.invalidate_access_cache()
 
         logger.info(f"Created {kb_type} database: {database_name} ({db_id}) with {kwargs}")
         return db_info
@@ -304,6 +382,7 @@ class KnowledgeBaseManager:
                 if db_id in self.global_databases_meta:
                     del self.global_databases_meta[db_id]
                     self._save_global_metadata()
+            self.invalidate_access_cache()
 
             return result
         except KBNotFoundError as e:
@@ -311,11 +390,16 @@ class KnowledgeBaseManager:
             return {"message": "删除成功"}
 
     async def add_file_record(
-        self, db_id: str, item: str, params: dict | None = None, operator_id: str | None = None
+        self,
+        db_id: str,
+        item: str,
+        params: dict | None = None,
+        operator_id: str | None = None,
+        task_id: str | None = None,
     ) -> dict:
         """Add file record to metadata"""
         kb_instance = self._get_kb_for_database(db_id)
-        return await kb_instance.add_file_record(db_id, item, params, operator_id)
+        return await kb_instance.add_file_record(db_id, item, params, operator_id, task_id=task_id)
 
     async def parse_file(self, db_id: str, file_id: str, operator_id: str | None = None) -> dict:
         """Parse file to Markdown"""
@@ -327,6 +411,11 @@ class KnowledgeBaseManager:
         kb_instance = self._get_kb_for_database(db_id)
         return await kb_instance.index_file(db_id, file_id, operator_id)
 
+    async def index_files(self, db_id: str, file_ids: list[str], operator_id: str | None = None) -> list[dict]:
+        """Index parsed files in one batch"""
+        kb_instance = self._get_kb_for_database(db_id)
+        return await kb_instance.index_files(db_id, file_ids, operator_id)
+
     async def update_file_params(self, db_id: str, file_id: str, params: dict, operator_id: str | None = None) -> None:
         """Update file processing params"""
         kb_instance = self._get_kb_for_database(db_id)
@@ -552,11 +641,15 @@ class KnowledgeBaseManager:
                 self.global_databases_meta[db_id].pop("auto_generate_questions", None)
 
                 self._save_global_metadata()
+        self.invalidate_access_cache()
 
         return result
 
     def get_retrievers(self) -> dict[str, dict]:
-        """获取所有检索器"""
+        """获取所有检索器（按 access_version 缓存）"""
+        if self._retrievers_cache and self._retrievers_cache[0] == self._access_version:
+            return self._retrievers_cache[1]
+
         all_retrievers = {}
 
         # 收集所有知识库的检索器
@@ -564,6 +657,7 @@ class KnowledgeBaseManager:
             retrievers = kb_instance.get_retrievers()
             all_retrievers.update(retrievers)
 
+        self._retrievers_cache = (self._access_version, all_retrievers)
         return all_retrievers
 
     # =============================================================================
@@ -606,19 +700,31 @@ class KnowledgeBaseManager:
     # 兼容性方法 - 为了支持现有的 graph_router.py
     # =============================================================================
 
-    async def _get_lightrag_instance(self, db_id: str):
+    @asynccontextmanager
+    async def _use_lightrag_instance(self, db_id: str):
         """
-        获取 LightRAG 实例（兼容性方法）
+        获取 LightRAG 实例（兼容性方法），实例在 async with 块内保持活跃，不会被实例池淘汰或关闭
+
+        用法：
+            async with knowledge_base._use_lightrag_instance(db_id) as rag:
+                ...
 
         Args:
             db_id: 数据库ID
 
-        Returns:
-            LightRAG 实例，如果数据库不是 lightrag 类型则返回 None
-
-        Raises:
-            ValueError: 如果数据库不存在或不是 lightrag 类型
+        Yields:
+            LightRAG 实例，如果数据库不存在、不是 lightrag 类型或获取失败则为 None
         """
+        kb_instance = self._get_lightrag_kb(db_id)
+        if kb_instance is None:
+            yield None
+            return
+
+        async with kb_instance._use_instance(db_id) as rag:
+            yield rag
+
+    def _get_lightrag_kb(self, db_id: str):
+        """获取 lightrag 类型数据库对应的 LightRagKB，不满足条件时返回 None"""
         try:
             # 检查数据库是否存在
             if db_id not in self.global_databases_meta:
@@ -629,18 +735,17 @@ class KnowledgeBaseManager:
             kb_type = self.global_databases_meta[db_id].get("kb_type", "lightrag")
             if kb_type != "lightrag":
                 logger.error(f"Database {db_id} is not a LightRAG type (actual type: {kb_type})")
-                raise ValueError(f"Database {db_id} is not a LightRAG knowledge base")
+                return None
 
             # 获取 LightRAG 知识库实例
             kb_instance = self._get_kb_for_database(db_id)
 
             # 如果不是 LightRagKB 实例，返回错误
-            if not hasattr(kb_instance, "_get_lightrag_instance"):
+            if not hasattr(kb_instance, "_use_instance"):
                 logger.error(f"Knowledge base instance for {db_id} is not LightRagKB")
                 return None
 
-            # 调用 LightRagKB 的方法获取 LightRAG 实例
-            return await kb_instance._get_lightrag_instance(db_id)
+            return kb_instance
 
         except Exception as e:
             logger.error(f"Failed to get LightRAG instance for {db_id}: {e}")
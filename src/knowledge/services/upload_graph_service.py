@@ -1,8 +1,13 @@
+import asyncio
+import copy
 import json
 import os
 import tempfile
+import time
 import traceback
 import warnings
+from collections import OrderedDict
+from itertools import islice
 from urllib.parse import urlparse
 
 from src import config
@@ -14,6 +19,115 @@ from src.utils.datetime_utils import utc_isoformat
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
+# 三元组批量导入时每个写事务包含的三元组数量
+GRAPH_IMPORT_BATCH_SIZE = 2000
+
+# 图谱信息（标签等）缓存时间（秒），计数由写入/删除路径增量维护
+GRAPH_INFO_CACHE_TTL = 30
+# 计数全量重算间隔（秒）：增量只覆盖本进程的写入，其他 API/worker 进程的写入在此时间内被纠正
+GRAPH_STATS_REFRESH_INTERVAL = int(os.getenv("GRAPH_STATS_REFRESH_INTERVAL") or 300)
+
+# query_node 最近查询结果缓存条数，本进程写入图谱时清空；
+# 条目超过 TTL（秒）后失效，使其他 API/worker 进程的写入在此时间内可见
+QUERY_CACHE_SIZE = 128
+GRAPH_QUERY_CACHE_TTL = int(os.getenv("GRAPH_QUERY_CACHE_TTL") or 60)
+
+# 实体名称全文索引，用于模糊查询
+FULLTEXT_INDEX_NAME = "entityNameFulltext"
+FULLTEXT_MATCH_LIMIT = 50
+
+VECTOR_INDEX_MISSING_MESSAGE = (
+    "向量索引不存在，请先创建索引，或当前图谱中未上传任何三元组（知识库中自动构建的，不会在此处展示和检索）。"
+)
+
+VECTOR_MATCH_QUERY = """
+UNWIND $embeddings AS embedding
+CALL db.index.vector.queryNodes('entityEmbeddings', 10, embedding)
+YIELD node AS similarEntity, score
+WITH similarEntity, score
+WHERE 'Upload' IN labels(similarEntity) AND score > $threshold
+RETURN similarEntity.name AS name, max(score) AS score
+"""
+
+FULLTEXT_MATCH_QUERY = f"""
+UNWIND $queries AS q
+CALL db.index.fulltext.queryNodes('{FULLTEXT_INDEX_NAME}', q, {{limit: $limit}}) YIELD node
+RETURN DISTINCT node.name AS name
+"""
+
+CONTAINS_MATCH_QUERY = """
+MATCH (n:Upload)
+WHERE any(keyword IN $keywords WHERE toLower(n.name) CONTAINS keyword)
+RETURN DISTINCT n.name AS name
+"""
+
+# 多源 2 跳邻居展开（出边与入边），每个实体最多返回 $limit 条
+ENTITY_EXPANSION_QUERY = """
+UNWIND $entity_names AS entity_name
+MATCH (n:Upload {name: entity_name})
+CALL {
+    WITH n
+    WITH [
+        // 1跳出边
+        [(n)-[r1]->(m1) |
+         {h: {id: elementId(n), name: n.name, properties: properties(n)},
+          r: {
+            id: elementId(r1),
+            type: r1.type,
+            source_id: elementId(n),
+            target_id: elementId(m1),
+            properties: properties(r1)
+          },
+          t: {id: elementId(m1), name: m1.name, properties: properties(m1)}}],
+        // 2跳出边
+        [(n)-[r1]->(m1)-[r2]->(m2) |
+         {h: {id: elementId(m1), name: m1.name, properties: properties(m1)},
+          r: {
+            id: elementId(r2),
+            type: r2.type,
+            source_id: elementId(m1),
+            target_id: elementId(m2),
+            properties: properties(r2)
+          },
+          t: {id: elementId(m2), name: m2.name, properties: properties(m2)}}],
+        // 1跳入边
+        [(m1)-[r1]->(n) |
+         {h: {id: elementId(m1), name: m1.name, properties: properties(m1)},
+          r: {
+            id: elementId(r1),
+            type: r1.type,
+            source_id: elementId(m1),
+            target_id: elementId(n),
+            properties: properties(r1)
+          },
+          t: {id: elementId(n), name: n.name, properties: properties(n)}}],
+        // 2跳入边
+        [(m2)-[r2]->(m1)-[r1]->(n) |
+         {h: {id: elementId(m2), name: m2.name, properties: properties(m2)},
+          r: {
+            id: elementId(r2),
+            type: r2.type,
+            source_id: elementId(m2),
+            target_id: elementId(m1),
+            properties: properties(r2)
+          },
+          t: {id: elementId(m1), name: m1.name, properties: properties(m1)}}]
+    ] AS all_results
+    UNWIND all_results AS result_list
+    UNWIND result_list AS item
+    RETURN item
+    LIMIT $limit
+}
+RETURN entity_name, item.h AS h, item.r AS r, item.t AS t
+"""
+
+
+def _iter_batches(iterable, size):
+    """将可迭代对象按固定大小切分为列表批次"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
 
 class UploadGraphService:
     """
@@ -31,6 +145,13 @@ class UploadGraphService:
         os.makedirs(self.work_dir, exist_ok=True)
         self.is_initialized_from_file = False
 
+        # 图谱统计计数，首次访问及每隔 GRAPH_STATS_REFRESH_INTERVAL 秒全量统计，期间由本进程的导入/删除结果增量更新
+        self._stats: dict[str, int] | None = None
+        self._stats_loaded_at = 0.0
+        self._info_cache: tuple[float, dict] | None = None
+        self._query_cache: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self._fulltext_index_checked = False
+
         # 尝试加载已保存的图数据库信息
         if not self.load_graph_info():
             logger.debug("创建新的图数据库配置")
@@ -112,6 +233,7 @@ class UploadGraphService:
                 with tempfile.NamedTemporaryFile(mode="wb", suffix=".jsonl", delete=False) as temp_file:
                     temp_file.write(file_data)
                     actual_file_path = temp_file.name
+                del file_data
 
                 try:
 
@@ -121,7 +243,8 @@ class UploadGraphService:
                                 if line.strip():
                                     yield json.loads(line.strip())
 
-                    triples = list(read_triples(actual_file_path))
+                    # 以生成器形式逐行读取，由 txt_add_vector_entity 分批写入
+                    triples = read_triples(actual_file_path)
                     await self.txt_add_vector_entity(triples, kgdb_name, embed_model_name, batch_size)
                 finally:
                     # 清理临时文件
@@ -143,7 +266,11 @@ class UploadGraphService:
         return kgdb_name
 
     async def txt_add_vector_entity(self, triples, kgdb_name="neo4j", embed_model_name=None, batch_size=None):
-        """添加实体三元组"""
+        """添加实体三元组
+
+        triples 可以是列表或任意可迭代对象（如逐行读取文件的生成器），
+        按 GRAPH_IMPORT_BATCH_SIZE 分批通过 UNWIND 写入，每批独立提交并计算 embedding，内存占用与总量无关。
+        """
         assert self.driver is not None, "Database is not connected"
         self.use_database(kgdb_name)
 
@@ -171,32 +298,44 @@ class UploadGraphService:
                 return rel_type, props
             return str(rel_data), {}
 
-        def _create_graph(tx, data):
-            """添加一个三元组"""
-            for entry in data:
-                h_name, h_props = _parse_node(entry.get("h"))
-                t_name, t_props = _parse_node(entry.get("t"))
-                r_type, r_props = _parse_relation(entry.get("r"))
+        def _parse_triple(entry):
+            """将一条三元组解析为 UNWIND 参数行，缺少必要字段时返回 None"""
+            h_name, h_props = _parse_node(entry.get("h"))
+            t_name, t_props = _parse_node(entry.get("t"))
+            r_type, r_props = _parse_relation(entry.get("r"))
 
-                if not h_name or not t_name or not r_type:
-                    continue
+            if not h_name or not t_name or not r_type:
+                return None
 
-                tx.run(
-                    """
-                MERGE (h:Entity:Upload {name: $h_name})
-                SET h += $h_props
-                MERGE (t:Entity:Upload {name: $t_name})
-                SET t += $t_props
-                MERGE (h)-[r:RELATION {type: $r_type}]->(t)
-                SET r += $r_props
-                """,
-                    h_name=h_name,
-                    h_props=h_props,
-                    t_name=t_name,
-                    t_props=t_props,
-                    r_type=r_type,
-                    r_props=r_props,
-                )
+            return {
+                "h_name": h_name,
+                "h_props": h_props,
+                "t_name": t_name,
+                "t_props": t_props,
+                "r_type": r_type,
+                "r_props": r_props,
+            }
+
+        def _create_graph(tx, rows):
+            """批量添加三元组，返回事务的写入计数"""
+            result = tx.run(
+                """
+            UNWIND $rows AS row
+            MERGE (h:Entity:Upload {name: row.h_name})
+            SET h += row.h_props
+            MERGE (t:Entity:Upload {name: row.t_name})
+            SET t += row.t_props
+            MERGE (h)-[r:RELATION {type: row.r_type}]->(t)
+            SET r += row.r_props
+            """,
+                rows=rows,
+            )
+            return result.consume().counters
+
+        def _create_name_index(tx):
+            """创建实体名称索引，保证批量 MERGE 按名称查找而不是全表扫描；同时创建模糊查询使用的全文索引"""
+            tx.run("CREATE INDEX entityName IF NOT EXISTS FOR (n:Entity) ON (n.name)")
+            tx.run(f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX_NAME} IF NOT EXISTS FOR (n:Upload) ON EACH [n.name]")
 
         def _create_vector_index(tx, dim):
             """创建向量索引"""
@@ -214,39 +353,21 @@ class UploadGraphService:
 
         def _get_nodes_without_embedding(tx, entity_names):
             """获取没有embedding的节点列表"""
-            # 构建参数字典，将列表转换为"param0"、"param1"等键值对形式
-            params = {f"param{i}": name for i, name in enumerate(entity_names)}
-
-            if not params:
+            if not entity_names:
                 return []
 
-            # 构建查询参数列表
-            param_placeholders = ", ".join([f"${key}" for key in params.keys()])
-
-            # 执行查询
             result = tx.run(
-                f"""
-            MATCH (n:Entity)
-            WHERE n.name IN [{param_placeholders}] AND n.embedding IS NULL
-            RETURN n.name AS name
+                """
+            UNWIND $names AS name
+            MATCH (n:Entity {name: name})
+            WHERE n.embedding IS NULL
+            RETURN DISTINCT n.name AS name
             """,
-                params,
+                names=entity_names,
             )
 
             return [record["name"] for record in result]
 
-        def _batch_set_embeddings(tx, entity_embedding_pairs):
-            """批量设置实体的嵌入向量"""
-            for entity_name, embedding in entity_embedding_pairs:
-                tx.run(
-                    """
-                MATCH (e:Entity {name: $name})
-                CALL db.create.setNodeVectorProperty(e, 'embedding', $embedding)
-                """,
-                    name=entity_name,
-                    embedding=embedding,
-                )
-
         # 检查是否允许更新模型
         if embed_model_name and not self.is_initialized_from_file:
             if embed_model_name != self.embed_model_name:
@@ -266,54 +387,56 @@ class UploadGraphService:
         assert self.embed_model_name in config.embed_model_names, f"Unsupported embed model: {self.embed_model_name}"
 
         with self.driver.session() as session:
-            logger.info(f"Adding entity to {kgdb_name}")
-            session.execute_write(_create_graph, triples)
-            logger.info(f"Creating vector index for {kgdb_name} with {config.embed_model}")
+            logger.info(f"Creating indexes for {kgdb_name} with {config.embed_model}")
+            session.execute_write(_create_name_index)
             session.execute_write(_create_vector_index, getattr(cur_embed_info, "dimension", 1024))
 
-            # 收集所有需要处理的实体名称，去重
-            all_entities = set()
-            for entry in triples:
-                h_name, _ = _parse_node(entry.get("h"))
-                t_name, _ = _parse_node(entry.get("t"))
-                if h_name:
-                    all_entities.add(h_name)
-                if t_name:
-                    all_entities.add(t_name)
-
-            all_entities_list = list(all_entities)
-
-            # 筛选出没有embedding的节点
-            nodes_without_embedding = session.execute_read(_get_nodes_without_embedding, all_entities_list)
-            if not nodes_without_embedding:
-                logger.info("所有实体已有embedding，无需重新计算")
-                return
+            logger.info(f"Adding entity to {kgdb_name}")
+            total_triples = 0
+            total_embedded = 0
+            for batch_index, batch in enumerate(_iter_batches(triples, GRAPH_IMPORT_BATCH_SIZE), start=1):
+                rows = [row for row in map(_parse_triple, batch) if row]
+                if not rows:
+                    continue
 
-            logger.info(f"需要为{len(nodes_without_embedding)}/{len(all_entities_list)}个实体计算embedding")
+                # 每批一个写事务，失败时只回滚当前批次
+                counters = session.execute_write(_create_graph, rows)
+                # 新建的节点尚无 embedding，同时计入未索引数量
+                self._update_stats(
+                    entity_count=counters.nodes_created,
+                    relationship_count=counters.relationships_created,
+                    triples_count=counters.relationships_created,
+                    unindexed_node_count=counters.nodes_created,
+                )
+                total_triples += len(rows)
 
-            # 批量处理实体
-            max_batch_size = 1024  # 限制此部分的主要是内存大小 1024 * 1024 * 4 / 1024 / 1024 = 4GB
-            total_entities = len(nodes_without_embedding)
+                # 收集本批次涉及的实体名称，去重后筛选出没有embedding的节点
+                batch_entities = list(dict.fromkeys(name for row in rows for name in (row["h_name"], row["t_name"])))
+                nodes_without_embedding = session.execute_read(_get_nodes_without_embedding, batch_entities)
+                total_embedded += await self._add_embeddings(session, nodes_without_embedding, batch_size)
 
-            for i in range(0, total_entities, max_batch_size):
-                batch_entities = nodes_without_embedding[i : i + max_batch_size]
                 logger.debug(
-                    f"Processing entities batch {i // max_batch_size + 1}/"
-                    f"{(total_entities - 1) // max_batch_size + 1} ({len(batch_entities)} entities)"
+                    f"Imported batch {batch_index}: {len(rows)} triples, "
+                    f"{len(nodes_without_embedding)}/{len(batch_entities)} entities embedded"
                 )
 
-                # 批量获取嵌入向量
-                batch_embeddings = await self.aget_embedding(batch_entities, batch_size=batch_size)
-
-                # 将实体名称和嵌入向量配对
-                entity_embedding_pairs = list(zip(batch_entities, batch_embeddings))
-
-                # 批量写入数据库
-                session.execute_write(_batch_set_embeddings, entity_embedding_pairs)
+            logger.info(f"已导入 {total_triples} 个三元组，为 {total_embedded} 个实体计算 embedding")
 
             # 数据添加完成后保存图信息
             self.save_graph_info()
 
+    async def _add_embeddings(self, session, entity_names, batch_size=None):
+        """分批计算实体的嵌入向量并通过 UNWIND 写入，返回写入数量"""
+        max_batch_size = 1024  # 限制此部分的主要是内存大小
+        count = 0
+        for i in range(0, len(entity_names), max_batch_size):
+            batch_entities = entity_names[i : i + max_batch_size]
+            batch_embeddings = await self.aget_embedding(batch_entities, batch_size=batch_size)
+            newly_indexed = session.execute_write(self.set_embeddings, list(zip(batch_entities, batch_embeddings)))
+            self._update_stats(unindexed_node_count=-newly_indexed)
+            count += len(batch_entities)
+        return count
+
     async def add_embedding_to_nodes(self, node_names=None, kgdb_name="neo4j", batch_size=None):
         """为节点添加嵌入向量
 
@@ -334,13 +457,11 @@ class UploadGraphService:
 
         count = 0
         with self.driver.session() as session:
-            for node_name in node_names:
+            for batch_nodes in _iter_batches(node_names, 1024):
                 try:
-                    embedding = await self.aget_embedding(node_name, batch_size=batch_size)
-                    session.execute_write(self.set_embedding, node_name, embedding)
-                    count += 1
+                    count += await self._add_embeddings(session, batch_nodes, batch_size)
                 except Exception as e:
-                    logger.error(f"为节点 '{node_name}' 添加嵌入向量失败: {e}, {traceback.format_exc()}")
+                    logger.error(f"为 {len(batch_nodes)} 个节点添加嵌入向量失败: {e}, {traceback.format_exc()}")
 
         return count
 
@@ -350,16 +471,31 @@ class UploadGraphService:
         self.use_database(kgdb_name)
         with self.driver.session() as session:
             if entity_name:
-                session.execute_write(self._delete_specific_entity, entity_name)
+                deltas = session.execute_write(self._delete_specific_entity, entity_name)
+                self._update_stats(**{key: -value for key, value in deltas.items()})
             else:
                 session.execute_write(self._delete_all_entities)
+                self._stats = dict.fromkeys(self._stats or self._empty_stats(), 0)
+                self._info_cache = None
+                self._query_cache.clear()
 
     def _delete_specific_entity(self, tx, entity_name):
+        """删除指定实体，返回被删除部分在各统计项中所占的数量"""
         query = """
         MATCH (n {name: $entity_name})
+        WITH n, n:Entity AS is_entity, n.embedding IS NULL AS unindexed,
+             COUNT { (n)-[:RELATION]-() } - COUNT { (n)-[:RELATION]->(n) } AS relationships,
+             CASE WHEN n:Entity
+                  THEN COUNT { (n)-[:RELATION]-(:Entity) } - COUNT { (n)-[:RELATION]->(n) }
+                  ELSE 0 END AS triples
         DETACH DELETE n
+        RETURN sum(CASE WHEN is_entity THEN 1 ELSE 0 END) AS entity_count,
+               sum(relationships) AS relationship_count,
+               sum(triples) AS triples_count,
+               sum(CASE WHEN is_entity AND unindexed THEN 1 ELSE 0 END) AS unindexed_node_count
         """
-        tx.run(query, entity_name=entity_name)
+        record = tx.run(query, entity_name=entity_name).single()
+        return {key: record[key] or 0 for key in self._empty_stats()} if record else {}
 
     def _delete_all_entities(self, tx):
         query = """
@@ -388,43 +524,88 @@ class UploadGraphService:
         with self.driver.session() as session:
             return session.execute_read(query)
 
-    def get_graph_info(self, graph_name="neo4j"):
+    def count_nodes_without_embedding(self, kgdb_name="neo4j"):
+        """统计没有嵌入向量的节点数量"""
         assert self.driver is not None, "Database is not connected"
-        self.use_database(graph_name)
+        self.use_database(kgdb_name)
 
         def query(tx):
-            # 只统计包含Entity标签的节点
-            entity_count = tx.run("MATCH (n:Entity) RETURN count(n) AS count").single()["count"]
-            # 只统计包含RELATION标签的关系
-            relationship_count = tx.run("MATCH ()-[r:RELATION]->() RETURN count(r) AS count").single()["count"]
-            triples_count = tx.run("MATCH (n:Entity)-[r:RELATION]->(m:Entity) RETURN count(n) AS count").single()[
-                "count"
-            ]
+            return tx.run("MATCH (n:Entity) WHERE n.embedding IS NULL RETURN count(n) AS count").single()["count"]
+
+        with self.driver.session() as session:
+            return session.execute_read(query)
+
+    @staticmethod
+    def _empty_stats():
+        return {"entity_count": 0, "relationship_count": 0, "triples_count": 0, "unindexed_node_count": 0}
+
+    def _update_stats(self, **deltas):
+        """按写事务的结果增量更新统计计数；尚未统计过时无需更新，下次访问会全量统计"""
+        self._info_cache = None
+        self._query_cache.clear()
+        if self._stats is None:
+            return
+        for key, delta in deltas.items():
+            self._stats[key] = max(0, self._stats[key] + delta)
+
+    def _load_stats(self, tx):
+        """全量统计图谱计数，在计数未初始化、超过重算间隔或显式刷新时执行"""
+        # 只统计包含Entity标签的节点
+        entity_count = tx.run("MATCH (n:Entity) RETURN count(n) AS count").single()["count"]
+        # 只统计包含RELATION标签的关系
+        relationship_count = tx.run("MATCH ()-[r:RELATION]->() RETURN count(r) AS count").single()["count"]
+        triples_count = tx.run("MATCH (n:Entity)-[r:RELATION]->(m:Entity) RETURN count(n) AS count").single()["count"]
+        unindexed_node_count = tx.run("MATCH (n:Entity) WHERE n.embedding IS NULL RETURN count(n) AS count").single()[
+            "count"
+        ]
+        return {
+            "entity_count": entity_count,
+            "relationship_count": relationship_count,
+            "triples_count": triples_count,
+            "unindexed_node_count": unindexed_node_count,
+        }
+
+    def get_graph_info(self, graph_name="neo4j", refresh=False):
+        """获取图谱信息
+
+        标签列表缓存 GRAPH_INFO_CACHE_TTL 秒；计数由本进程的导入/删除路径增量维护，
+        并每隔 GRAPH_STATS_REFRESH_INTERVAL 秒全量重算，以纠正其他进程写入造成的偏差；refresh=True 时立即重算。
+        """
+        assert self.driver is not None, "Database is not connected"
+        self.use_database(graph_name)
 
+        def query(tx, load_stats):
+            stats = self._load_stats(tx) if load_stats else None
             # 获取所有标签
             labels = tx.run("CALL db.labels() YIELD label RETURN collect(label) AS labels").single()["labels"]
-
-            return {
-                "graph_name": graph_name,
-                "entity_count": entity_count,
-                "relationship_count": relationship_count,
-                "triples_count": triples_count,
-                "labels": labels,
-                "status": self.status,
-                "embed_model_name": self.embed_model_name,
-                "embed_model_configurable": not self.is_initialized_from_file,
-                "unindexed_node_count": len(self.query_nodes_without_embedding(graph_name)),
-            }
+            return stats, labels
 
         try:
             if self.is_running():
-                # 获取数据库信息
-                with self.driver.session() as session:
-                    graph_info = session.execute_read(query)
-
-                    # 添加时间戳
-                    graph_info["last_updated"] = utc_isoformat()
-                    return graph_info
+                cached = self._info_cache
+                if refresh or cached is None or time.monotonic() - cached[0] > GRAPH_INFO_CACHE_TTL:
+                    load_stats = (
+                        refresh
+                        or self._stats is None
+                        or time.monotonic() - self._stats_loaded_at > GRAPH_STATS_REFRESH_INTERVAL
+                    )
+                    # 获取数据库信息
+                    with self.driver.session() as session:
+                        stats, labels = session.execute_read(query, load_stats)
+                    if stats is not None:
+                        self._stats = stats
+                        self._stats_loaded_at = time.monotonic()
+                    cached = (time.monotonic(), {**self._stats, "labels": labels, "last_updated": utc_isoformat()})
+                    self._info_cache = cached
+
+                # 状态和模型配置可能随时变化，不参与缓存
+                return {
+                    "graph_name": graph_name,
+                    **cached[1],
+                    "status": self.status,
+                    "embed_model_name": self.embed_model_name,
+                    "embed_model_configurable": not self.is_initialized_from_file,
+                }
             else:
                 logger.warning(f"图数据库未连接或未运行:{self.status=}")
                 return None
@@ -504,6 +685,21 @@ class UploadGraphService:
             outputs = self.embed_model.encode([text])[0]
             return outputs
 
+    def set_embeddings(self, tx, entity_embedding_pairs):
+        """批量设置实体的嵌入向量，返回此前没有嵌入向量的实体数量"""
+        result = tx.run(
+            """
+        UNWIND $rows AS row
+        MATCH (e:Entity {name: row.name})
+        WITH e, row, e.embedding IS NULL AS unindexed
+        CALL db.create.setNodeVectorProperty(e, 'embedding', row.embedding)
+        RETURN count(CASE WHEN unindexed THEN 1 END) AS count
+        """,
+            rows=[{"name": name, "embedding": embedding} for name, embedding in entity_embedding_pairs],
+        )
+        record = result.single()
+        return record["count"] if record else 0
+
     def set_embedding(self, tx, entity_name, embedding):
         """为单个实体设置嵌入向量"""
         tx.run(
@@ -523,52 +719,77 @@ class UploadGraphService:
         assert self.is_running(), "图数据库未启动"
 
         self.use_database(kgdb_name)
+        cache_key, tokens = self._prepare_node_query(keyword, threshold, kgdb_name, hops, max_entities, return_format)
+        if (cached := self._get_cached_query(cache_key)) is not None:
+            return cached
+
+        vector_results = self._query_with_vector_sim(tokens, kgdb_name, threshold)
+        fuzzy_results = self._query_with_fuzzy_match(tokens, kgdb_name)
+        qualified_entities = self._rank_entities(vector_results, fuzzy_results, max_entities)
+        logger.debug(f"Graph Query Entities: {keyword}, {qualified_entities=}")
+
+        entity_results = self._query_specific_entities(qualified_entities, kgdb_name=kgdb_name, hops=hops)
+        return self._merge_node_query_results(cache_key, qualified_entities, entity_results, return_format)
+
+    async def aquery_node(
+        self, keyword, threshold=0.9, kgdb_name="neo4j", hops=2, max_entities=8, return_format="graph", **kwargs
+    ):
+        """query_node 的异步版本，使用 Neo4j 异步驱动，不阻塞事件循环，返回格式与 query_node 一致"""
+        assert self.is_running(), "图数据库未启动"
+
+        self.use_database(kgdb_name)
+        cache_key, tokens = self._prepare_node_query(keyword, threshold, kgdb_name, hops, max_entities, return_format)
+        if (cached := self._get_cached_query(cache_key)) is not None:
+            return cached
+
+        vector_results, fuzzy_results = await asyncio.gather(
+            self._aquery_with_vector_sim(tokens, threshold),
+            self._aquery_with_fuzzy_match(tokens),
+        )
+        qualified_entities = self._rank_entities(vector_results, fuzzy_results, max_entities)
+        logger.debug(f"Graph Query Entities: {keyword}, {qualified_entities=}")
+
+        entity_results = await self._aquery_specific_entities(qualified_entities)
+        return self._merge_node_query_results(cache_key, qualified_entities, entity_results, return_format)
+
+    def _prepare_node_query(self, keyword, threshold, kgdb_name, hops, max_entities, return_format):
+        """校验参数并返回 (缓存键, 去重后的查询 token)"""
+        if return_format not in ("graph", "triples"):
+            raise ValueError(f"Invalid return_format: {return_format}")
 
         # 简单空格分词，OR 聚合
         tokens = [t for t in str(keyword).split(" ") if t]
         if not tokens:
             tokens = [str(keyword)]
 
-        # name -> score 聚合；向量分数累加，模糊命中给予轻权重
+        cache_key = (str(keyword), threshold, kgdb_name, hops, max_entities, return_format)
+        return cache_key, list(dict.fromkeys(tokens))
+
+    @staticmethod
+    def _rank_entities(vector_results, fuzzy_results, max_entities):
+        """聚合向量与模糊查询结果并排序截断"""
+        # name -> score 聚合；向量分数取最大值，模糊命中给予轻权重，避免覆盖向量高分
         entity_to_score = {}
-        for token in tokens:
-            # 使用向量索引进行查询
-            results_sim = self._query_with_vector_sim(token, kgdb_name, threshold)
-            for r in results_sim:
-                name = r[0]  # 与下方保持统一的 [0] 取 name 的方式
-                score = 0.0
-                try:
-                    score = float(r["score"])  # neo4j.Record 支持键访问
-                except Exception:
-                    # 兜底：若无法取到score，给个基础分
-                    score = 0.5
-                entity_to_score[name] = max(entity_to_score.get(name, 0.0), score)
-
-            # 模糊查询（不区分大小写），命中加一个较小分
-            results_fuzzy = self._query_with_fuzzy_match(token, kgdb_name)
-            for fr in results_fuzzy:
-                # _query_with_fuzzy_match 返回 values()，形如 [name]
-                name = fr[0]
-                # 给予轻权重，避免覆盖向量高分
-                entity_to_score[name] = max(entity_to_score.get(name, 0.0), 0.3)
-
-        # 排序并截断
-        sorted_entity_to_score = sorted(entity_to_score.items(), key=lambda x: x[1], reverse=True)
-        qualified_entities = [name for name, _ in sorted_entity_to_score][:max_entities]
+        for name, score in vector_results:
+            entity_to_score[name] = max(entity_to_score.get(name, 0.0), score)
+        for name in fuzzy_results:
+            entity_to_score[name] = max(entity_to_score.get(name, 0.0), 0.3)
 
-        logger.debug(f"Graph Query Entities: {keyword}, {qualified_entities=}")
+        sorted_entity_to_score = sorted(entity_to_score.items(), key=lambda x: x[1], reverse=True)
+        return [name for name, _ in sorted_entity_to_score][:max_entities]
 
-        # 对每个合格的实体进行查询
+    def _merge_node_query_results(self, cache_key, qualified_entities, entity_results, return_format):
+        """按实体排序合并邻居查询结果、去重并写入查询缓存"""
         all_query_results = {"nodes": [], "edges": [], "triples": []}
         for entity in qualified_entities:
-            query_result = self._query_specific_entity(entity_name=entity, kgdb_name=kgdb_name, hops=hops)
+            query_result = entity_results.get(entity)
+            if not query_result:
+                continue
             if return_format == "graph":
                 all_query_results["nodes"].extend(query_result["nodes"])
                 all_query_results["edges"].extend(query_result["edges"])
-            elif return_format == "triples":
-                all_query_results["triples"].extend(query_result["triples"])
             else:
-                raise ValueError(f"Invalid return_format: {return_format}")
+                all_query_results["triples"].extend(query_result["triples"])
 
         # 基础去重
         if return_format == "graph":
@@ -599,31 +820,109 @@ class UploadGraphService:
                     dedup_triples.append(t)
             all_query_results["triples"] = dedup_triples
 
+        self._set_cached_query(cache_key, all_query_results)
         return all_query_results
 
-    def _query_with_fuzzy_match(self, keyword, kgdb_name="neo4j"):
-        """模糊查询"""
+    def _get_cached_query(self, cache_key: tuple) -> dict | None:
+        entry = self._query_cache.get(cache_key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > GRAPH_QUERY_CACHE_TTL:
+            self._query_cache.pop(cache_key, None)
+            return None
+        self._query_cache.move_to_end(cache_key)
+        return copy.deepcopy(entry[1])
+
+    def _set_cached_query(self, cache_key: tuple, result: dict) -> None:
+        self._query_cache[cache_key] = (time.monotonic(), copy.deepcopy(result))
+        self._query_cache.move_to_end(cache_key)
+        while len(self._query_cache) > QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+
+    def _ensure_fulltext_index(self):
+        """确保实体名称全文索引存在（只在首次查询时尝试创建）"""
+        if self._fulltext_index_checked:
+            return
+
+        def create_index(tx):
+            tx.run(f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX_NAME} IF NOT EXISTS FOR (n:Upload) ON EACH [n.name]")
+
+        try:
+            with self.driver.session() as session:
+                session.execute_write(create_index)
+        except Exception as e:
+            logger.warning(f"创建全文索引 {FULLTEXT_INDEX_NAME} 失败，模糊查询将使用全表扫描: {e}")
+        self._fulltext_index_checked = True
+
+    @staticmethod
+    def _to_lucene_query(token):
+        """将 token 转为全文索引查询：短语匹配，英文单词额外做前缀匹配"""
+        escaped = token.replace("\\", "\\\\").replace('"', '\\"')
+        query = f'"{escaped}"'
+        if token.isascii() and token.isalnum():
+            query += f" OR {token.lower()}*"
+        return query
+
+    def _query_with_fuzzy_match(self, tokens, kgdb_name="neo4j"):
+        """模糊查询，返回命中的实体名称列表
+
+        优先使用全文索引，索引不可用时退化为 CONTAINS 扫描。
+        """
         assert self.driver is not None, "Database is not connected"
         self.use_database(kgdb_name)
+        self._ensure_fulltext_index()
 
-        def query_fuzzy_match(tx, keyword):
+        def query_fulltext(tx, tokens):
             result = tx.run(
-                """
-            MATCH (n:Upload)
-            WHERE toLower(n.name) CONTAINS toLower($keyword)
-            RETURN DISTINCT n.name AS name
-            """,
-                keyword=keyword,
+                FULLTEXT_MATCH_QUERY,
+                queries=[self._to_lucene_query(token) for token in tokens],
+                limit=FULLTEXT_MATCH_LIMIT,
             )
-            values = result.values()
-            logger.debug(f"Fuzzy Query Results: {values}")
-            return values
+            return [record["name"] for record in result]
+
+        def query_contains(tx, tokens):
+            result = tx.run(CONTAINS_MATCH_QUERY, keywords=[token.lower() for token in tokens])
+            return [record["name"] for record in result]
 
         with self.driver.session() as session:
-            return session.execute_read(query_fuzzy_match, keyword)
+            try:
+                values = session.execute_read(query_fulltext, tokens)
+            except Exception as e:
+                logger.warning(f"全文索引查询失败，使用 CONTAINS 扫描: {e}")
+                values = session.execute_read(query_contains, tokens)
+
+        logger.debug(f"Fuzzy Query Results: {values}")
+        return values
+
+    async def _aquery_with_fuzzy_match(self, tokens):
+        """_query_with_fuzzy_match 的异步版本"""
+        if not self._fulltext_index_checked:
+            await asyncio.to_thread(self._ensure_fulltext_index)
+
+        async def query_fulltext(tx, tokens):
+            result = await tx.run(
+                FULLTEXT_MATCH_QUERY,
+                queries=[self._to_lucene_query(token) for token in tokens],
+                limit=FULLTEXT_MATCH_LIMIT,
+            )
+            return [record["name"] async for record in result]
+
+        async def query_contains(tx, tokens):
+            result = await tx.run(CONTAINS_MATCH_QUERY, keywords=[token.lower() for token in tokens])
+            return [record["name"] async for record in result]
 
-    def _query_with_vector_sim(self, keyword, kgdb_name="neo4j", threshold=0.9):
-        """向量查询"""
+        async with self.connection.async_driver.session() as session:
+            try:
+                values = await session.execute_read(query_fulltext, tokens)
+            except Exception as e:
+                logger.warning(f"全文索引查询失败，使用 CONTAINS 扫描: {e}")
+                values = await session.execute_read(query_contains, tokens)
+
+        logger.debug(f"Fuzzy Query Results: {values}")
+        return values
+
+    def _query_with_vector_sim(self, tokens, kgdb_name="neo4j", threshold=0.9):
+        """向量查询，返回 [(name, score)]"""
         assert self.driver is not None, "Database is not connected"
         self.use_database(kgdb_name)
 
@@ -635,37 +934,39 @@ class UploadGraphService:
                     return True
             return False
 
-        def query_by_vector(tx, text, threshold):
+        def query_by_vector(tx, embeddings, threshold):
+            result = tx.run(VECTOR_MATCH_QUERY, embeddings=embeddings, threshold=threshold)
+            return [(r["name"], float(r["score"])) for r in result]
+
+        with self.driver.session() as session:
             # 首先检查索引是否存在
-            if not _index_exists(tx, "entityEmbeddings"):
-                raise Exception(
-                    "向量索引不存在，请先创建索引，或当前图谱中未上传任何三元组（知识库中自动构建的，不会在此处展示和检索）。"
-                )
+            if not session.execute_read(_index_exists, "entityEmbeddings"):
+                raise Exception(VECTOR_INDEX_MISSING_MESSAGE)
 
-            embedding = self.get_embedding(text)
-            result = tx.run(
-                """
-            CALL db.index.vector.queryNodes('entityEmbeddings', 10, $embedding)
-            YIELD node AS similarEntity, score
-            WHERE 'Upload' IN labels(similarEntity)
-            RETURN similarEntity.name AS name, score
-            """,
-                embedding=embedding,
-            )
-            return [r for r in result if r["score"] > threshold]
+            embeddings = self.get_embedding(tokens)
+            return session.execute_read(query_by_vector, embeddings, threshold=threshold)
 
-        with self.driver.session() as session:
-            results = session.execute_read(query_by_vector, keyword, threshold=threshold)
-            return results
+    async def _aquery_with_vector_sim(self, tokens, threshold=0.9):
+        """_query_with_vector_sim 的异步版本"""
 
-    def _query_specific_entity(self, entity_name, kgdb_name="neo4j", hops=2, limit=100):
-        """查询指定实体三元组信息（无向关系）"""
-        assert self.driver is not None, "Database is not connected"
-        if not entity_name:
-            logger.warning("实体名称为空")
-            return []
+        async def _index_exists(tx, index_name):
+            result = await tx.run("SHOW INDEXES YIELD name WHERE name = $name RETURN name", name=index_name)
+            return await result.single() is not None
 
-        self.use_database(kgdb_name)
+        async def query_by_vector(tx, embeddings, threshold):
+            result = await tx.run(VECTOR_MATCH_QUERY, embeddings=embeddings, threshold=threshold)
+            return [(r["name"], float(r["score"])) async for r in result]
+
+        async with self.connection.async_driver.session() as session:
+            if not await session.execute_read(_index_exists, "entityEmbeddings"):
+                raise Exception(VECTOR_INDEX_MISSING_MESSAGE)
+
+            embeddings = await self.aget_embedding(tokens)
+            return await session.execute_read(query_by_vector, embeddings, threshold=threshold)
+
+    @staticmethod
+    def _format_entity_records(records, entity_names):
+        """将邻居展开查询的记录整理为 {entity_name: {"nodes", "edges", "triples"}}"""
 
         def _process_record_props(record):
             """处理记录中的属性：扁平化 properties 并移除 embedding"""
@@ -683,88 +984,61 @@ class UploadGraphService:
             # 合并属性（优先保留原字典中的 id, name, type 等核心字段）
             return {**props, **data}
 
-        def query(tx, entity_name, hops, limit):
-            try:
-                query_str = """
-                WITH [
-                    // 1跳出边
-                    [(n:Upload {name: $entity_name})-[r1]->(m1) |
-                     {h: {id: elementId(n), name: n.name, properties: properties(n)},
-                      r: {
-                        id: elementId(r1),
-                        type: r1.type,
-                        source_id: elementId(n),
-                        target_id: elementId(m1),
-                        properties: properties(r1)
-                      },
-                      t: {id: elementId(m1), name: m1.name, properties: properties(m1)}}],
-                    // 2跳出边
-                    [(n:Upload {name: $entity_name})-[r1]->(m1)-[r2]->(m2) |
-                     {h: {id: elementId(m1), name: m1.name, properties: properties(m1)},
-                      r: {
-                        id: elementId(r2),
-                        type: r2.type,
-                        source_id: elementId(m1),
-                        target_id: elementId(m2),
-                        properties: properties(r2)
-                      },
-                      t: {id: elementId(m2), name: m2.name, properties: properties(m2)}}],
-                    // 1跳入边
-                    [(m1)-[r1]->(n:Upload {name: $entity_name}) |
-                     {h: {id: elementId(m1), name: m1.name, properties: properties(m1)},
-                      r: {
-                        id: elementId(r1),
-                        type: r1.type,
-                        source_id: elementId(m1),
-                        target_id: elementId(n),
-                        properties: properties(r1)
-                      },
-                      t: {id: elementId(n), name: n.name, properties: properties(n)}}],
-                    // 2跳入边
-                    [(m2)-[r2]->(m1)-[r1]->(n:Upload {name: $entity_name}) |
-                     {h: {id: elementId(m2), name: m2.name, properties: properties(m2)},
-                      r: {
-                        id: elementId(r2),
-                        type: r2.type,
-                        source_id: elementId(m2),
-                        target_id: elementId(m1),
-                        properties: properties(r2)
-                      },
-                      t: {id: elementId(m1), name: m1.name, properties: properties(m1)}}]
-                ] AS all_results
-                UNWIND all_results AS result_list
-                UNWIND result_list AS item
-                RETURN item.h AS h, item.r AS r, item.t AS t
-                LIMIT $limit
-                """
-                results = tx.run(query_str, entity_name=entity_name, limit=limit)
+        formatted_results = {}
+        for item in records:
+            h = _process_record_props(item["h"])
+            r = _process_record_props(item["r"])
+            t = _process_record_props(item["t"])
 
-                if not results:
-                    logger.info(f"未找到实体 {entity_name} 的相关信息")
-                    return {}
+            entity_result = formatted_results.setdefault(item["entity_name"], {"nodes": [], "edges": [], "triples": []})
+            entity_result["nodes"].extend([h, t])
+            entity_result["edges"].append(r)
+            entity_result["triples"].append((h["name"], r["type"], t["name"]))
 
-                formatted_results = {"nodes": [], "edges": [], "triples": []}
+        missing = [name for name in entity_names if name not in formatted_results]
+        if missing:
+            logger.info(f"未找到实体 {missing} 的相关信息")
+        return formatted_results
 
-                for item in results:
-                    h = _process_record_props(item["h"])
-                    r = _process_record_props(item["r"])
-                    t = _process_record_props(item["t"])
+    def _query_specific_entities(self, entity_names, kgdb_name="neo4j", hops=2, limit=100):
+        """批量查询实体的邻居三元组信息（无向关系），返回 {entity_name: {"nodes", "edges", "triples"}}
 
-                    formatted_results["nodes"].extend([h, t])
-                    formatted_results["edges"].append(r)
-                    formatted_results["triples"].append((h["name"], r["type"], t["name"]))
+        每个实体最多返回 limit 条三元组。
+        """
+        assert self.driver is not None, "Database is not connected"
+        entity_names = [name for name in entity_names if name]
+        if not entity_names:
+            return {}
 
-                logger.debug(f"Query Results: {results}")
-                return formatted_results
+        self.use_database(kgdb_name)
 
-            except Exception as e:
-                logger.error(f"查询实体 {entity_name} 失败: {str(e)}")
-                return []
+        def query(tx, entity_names, limit):
+            results = tx.run(ENTITY_EXPANSION_QUERY, entity_names=entity_names, limit=limit)
+            return self._format_entity_records(results, entity_names)
 
         try:
             with self.driver.session() as session:
-                return session.execute_read(query, entity_name, hops, limit)
+                return session.execute_read(query, entity_names, limit)
+
+        except Exception as e:
+            logger.error(f"查询实体 {entity_names} 失败: {str(e)}")
+            return {}
+
+    async def _aquery_specific_entities(self, entity_names, limit=100):
+        """_query_specific_entities 的异步版本"""
+        entity_names = [name for name in entity_names if name]
+        if not entity_names:
+            return {}
+
+        async def query(tx, entity_names, limit):
+            result = await tx.run(ENTITY_EXPANSION_QUERY, entity_names=entity_names, limit=limit)
+            records = [record async for record in result]
+            return self._format_entity_records(records, entity_names)
+
+        try:
+            async with self.connection.async_driver.session() as session:
+                return await session.execute_read(query, entity_names, limit)
 
         except Exception as e:
-            logger.error(f"数据库会话异常: {str(e)}")
-            return []
+            logger.error(f"查询实体 {entity_names} 失败: {str(e)}")
+            return {}
@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.utils import logger
+
+# 缓存条目保留天数与最大条数，超出后按写入时间淘汰最旧的条目
+LLM_CACHE_TTL_DAYS = int(os.getenv("LLM_CACHE_TTL_DAYS") or 30)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES") or 100000)
+# 每写入多少条执行一次淘汰，避免每次写入都扫描
+LLM_CACHE_PRUNE_EVERY = 500
+
+# 不影响响应内容的调用参数（存储对象、流式开关、统计对象等），不参与缓存键
+NON_KEY_KWARGS = frozenset({"hashing_kv", "stream", "token_tracker"})
+
+
+class LLMResponseCache:
+    """
+    基于 SQLite 的持久化 LLM 响应缓存（prompt + 调用参数 -> response）
+
+    用于 LightRAG 实体抽取等确定性调用：相同模型、相同提示词与调用参数的请求直接复用历史结果，
+    重新入库未变化的文本块时无需再次调用 LLM。条目按写入时间过期，并限制总条数。
+    """
+
+    def __init__(self, db_path: str, ttl_days: int = LLM_CACHE_TTL_DAYS, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self._writes_since_prune = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created_at ON llm_cache (created_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(
+        model_spec: str,
+        prompt: str,
+        system_prompt: str | None,
+        history_messages: list | None,
+        call_kwargs: dict | None = None,
+    ) -> str:
+        """由模型、提示词与影响输出的调用参数（如 keyword_extraction、response_format、temperature）生成缓存键"""
+        kwargs = {k: v for k, v in (call_kwargs or {}).items() if k not in NON_KEY_KWARGS}
+        payload = json.dumps(
+            {
+                "model": model_spec,
+                "prompt": prompt,
+                "system": system_prompt,
+                "history": history_messages or [],
+                "kwargs": kwargs,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl_seconds),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, response: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, time.time()),
+            )
+            self._conn.commit()
+            self._writes_since_prune += 1
+            if self._writes_since_prune < LLM_CACHE_PRUNE_EVERY:
+                return
+        self._prune()
+
+    def _prune(self) -> None:
+        """删除过期条目，并在超出最大条数时按写入时间删除最旧的条目"""
+        with self._lock:
+            self._writes_since_prune = 0
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    async def aget(self, key: str) -> str | None:
+        try:
+            return await asyncio.to_thread(self._get, key)
+        except Exception as e:
+            logger.warning(f"读取 LLM 缓存失败 {self.db_path}: {e}")
+            return None
+
+    async def aset(self, key: str, response: str) -> None:
+        try:
+            await asyncio.to_thread(self._set, key, response)
+        except Exception as e:
+            logger.warning(f"写入 LLM 缓存失败 {self.db_path}: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
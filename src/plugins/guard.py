@@ -1,4 +1,5 @@
 import os
+from collections import deque
 
 from src.config.app import config
 from src.models import select_model
@@ -40,11 +41,112 @@ def load_keywords(file_path: str) -> list[str]:
     return keywords
 
 
+class KeywordAutomaton:
+    """
+    Aho-Corasick 多模式匹配自动机。
+    构建一次后，匹配耗时只与输入文本长度相关，与关键词数量无关。
+    """
+
+    def __init__(self, keywords: list[str]):
+        # 状态 0 为根节点；_goto[state] 为字符转移表，_fail 为失败指针，_output 为该状态命中的关键词
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[str | None] = [None]
+
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if keyword:
+                self._add(keyword)
+        self._build()
+
+    def _add(self, keyword: str) -> None:
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._output[state] = keyword
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                # 继承失败链上的命中结果，保证短关键词作为长关键词后缀时也能被识别
+                if self._output[next_state] is None:
+                    self._output[next_state] = self._output[self._fail[next_state]]
+
+    def step(self, state: int, ch: str) -> int:
+        """从 state 出发消费一个字符，返回新的状态"""
+        while state and ch not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(ch, 0)
+
+    def matched(self, state: int) -> str | None:
+        """返回到达 state 时命中的关键词（未命中返回 None）"""
+        return self._output[state]
+
+    def search(self, text: str) -> str | None:
+        """在完整文本中查找第一个命中的关键词"""
+        state = 0
+        for ch in text.lower():
+            state = self.step(state, ch)
+            if self._output[state] is not None:
+                return self._output[state]
+        return None
+
+
+class StreamingKeywordMatcher:
+    """
+    流式关键词匹配器：跨 chunk 保留自动机状态，每次只扫描新增字符。
+    一个匹配器对应一次流式输出，不可在多个会话间共享。
+    """
+
+    def __init__(self, automaton: KeywordAutomaton):
+        self._automaton = automaton
+        self._state = 0
+        self.matched_keyword: str | None = None
+
+    def feed(self, text) -> bool:
+        """
+        消费新增的流式内容，返回是否已命中敏感词。
+        True: 不合规
+        False: 合规
+        """
+        if self.matched_keyword is not None:
+            return True
+        if not isinstance(text, str):
+            # 多模态 content 为 block 列表，仅扫描其中的文本部分
+            text = "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in (text or []))
+
+        automaton = self._automaton
+        state = self._state
+        for ch in text.lower():
+            state = automaton.step(state, ch)
+            if (keyword := automaton.matched(state)) is not None:
+                logger.debug(f"Keyword match found in stream: {keyword}")
+                self.matched_keyword = keyword
+                break
+        self._state = state
+        return self.matched_keyword is not None
+
+
 class ContentGuard:
     def __init__(self, keywords_file: str = "src/config/static/bad_keywords.txt"):
         self.keywords = load_keywords(keywords_file)
         if not self.keywords:
             self.keywords = ["贩毒"]
+        self.automaton = KeywordAutomaton(self.keywords)
 
         # 从配置读取LLM模型设置
         self.enable_llm = config.enable_content_guard_llm
@@ -78,13 +180,15 @@ class ContentGuard:
         """
         if not text:
             return False
-        text_lower = text.lower()
-        for keyword in self.keywords:
-            if keyword in text_lower:
-                logger.debug(f"Keyword match found: {keyword}")
-                return True
+        if keyword := self.automaton.search(text):
+            logger.debug(f"Keyword match found: {keyword}")
+            return True
         return False
 
+    def create_stream_matcher(self) -> StreamingKeywordMatcher:
+        """为一次流式输出创建增量关键词匹配器"""
+        return StreamingKeywordMatcher(self.automaton)
+
     async def check_with_llm(self, text: str) -> bool:
         """
         Checks if the text contains any sensitive keywords using an LLM.
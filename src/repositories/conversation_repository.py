@@ -8,6 +8,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from src.storage.conversation.pagination import keyset_before
+from src.storage.conversation.rollups import extract_usage
 from src.storage.postgres.models_business import Conversation, ConversationStats, Message, ToolCall
 from src.utils import logger
 from src.utils.datetime_utils import utc_now_naive
@@ -79,11 +81,15 @@ class ConversationRepository:
         extra_metadata: dict | None = None,
         image_content: str | None = None,
     ) -> Message:
+        model_name, input_tokens, output_tokens = extract_usage(extra_metadata)
         message = Message(
             conversation_id=conversation_id,
             role=role,
             content=content,
             message_type=message_type,
+            model_name=model_name,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
             extra_metadata=extra_metadata or {},
             image_content=image_content,
         )
@@ -179,7 +185,12 @@ class ConversationRepository:
         return await self.get_messages(conversation.id, limit, offset)
 
     async def list_conversations(
-        self, user_id: str | None = None, agent_id: str | None = None, status: str = "active"
+        self,
+        user_id: str | None = None,
+        agent_id: str | None = None,
+        status: str = "active",
+        limit: int | None = None,
+        cursor: str | None = None,
     ) -> list[Conversation]:
         query = select(Conversation).where(Conversation.status == status)
 
@@ -187,8 +198,12 @@ class ConversationRepository:
             query = query.where(Conversation.user_id == str(user_id))
         if agent_id:
             query = query.where(Conversation.agent_id == agent_id)
+        if cursor:
+            query = query.where(keyset_before(Conversation.updated_at, Conversation.id, cursor))
 
-        query = query.order_by(Conversation.updated_at.desc())
+        query = query.order_by(Conversation.updated_at.desc(), Conversation.id.desc())
+        if limit:
+            query = query.limit(limit)
         result = await self.db.execute(query)
         return list(result.scalars().all())
 
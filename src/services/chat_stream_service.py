@@ -337,13 +337,7 @@ async def stream_agent_chat(
         logger.info(f"Requesting knowledges: {requested_knowledge_names}")
         if requested_knowledge_names and isinstance(requested_knowledge_names, list) and requested_knowledge_names:
             user_info = {"role": "user", "department_id": department_id}
-            accessible_databases = await knowledge_base.get_databases_by_user(user_info)
-            accessible_kb_names = {
-                db.get("name")
-                for db in accessible_databases.get("databases", [])
-                if isinstance(db, dict) and db.get("name")
-            }
-            logger.info(f"Accessible knowledges: {accessible_kb_names}")
+            accessible_kb_names = knowledge_base.get_accessible_db_names(user_info)
 
             filtered_knowledge_names = [kb for kb in requested_knowledge_names if kb in accessible_kb_names]
             blocked_knowledge_names = [kb for kb in requested_knowledge_names if kb not in accessible_kb_names]
@@ -353,13 +347,13 @@ async def stream_agent_chat(
 
         full_msg = None
         accumulated_content = []
+        guard_matcher = content_guard.create_stream_matcher() if conf.enable_content_guard else None
         langgraph_config = {"configurable": {"thread_id": thread_id, "user_id": user_id}}
         async for msg, metadata in agent.stream_messages(messages, input_context=input_context):
             if isinstance(msg, AIMessageChunk):
                 accumulated_content.append(msg.content)
 
-                content_for_check = "".join(accumulated_content[-10:])
-                if conf.enable_content_guard and await content_guard.check_with_keywords(content_for_check):
+                if guard_matcher and guard_matcher.feed(msg.content):
                     full_msg = AIMessage(content="".join(accumulated_content))
                     await save_partial_message(conv_repo, thread_id, full_msg, "content_guard_blocked")
                     meta["time_cost"] = asyncio.get_event_loop().time() - start_time
@@ -384,7 +378,13 @@ async def stream_agent_chat(
         if not full_msg and accumulated_content:
             full_msg = AIMessage(content="".join(accumulated_content))
 
-        if conf.enable_content_guard and hasattr(full_msg, "content") and await content_guard.check(full_msg.content):
+        # 关键词已由流式匹配器覆盖全文，结束时只需补充 LLM 审查
+        if (
+            conf.enable_content_guard
+            and content_guard.llm_model
+            and hasattr(full_msg, "content")
+            and await content_guard.check_with_llm(full_msg.content)
+        ):
             await save_partial_message(conv_repo, thread_id, full_msg, "content_guard_blocked")
             meta["time_cost"] = asyncio.get_event_loop().time() - start_time
             yield make_chunk(status="interrupted", message="检测到敏感内容，已中断输出", meta=meta)
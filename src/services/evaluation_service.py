@@ -7,12 +7,17 @@ import uuid
 from datetime import datetime
 from typing import Any
 
+import numpy as np
+
 from server.services.tasker import TaskContext, tasker
 from src.knowledge import knowledge_base
 from src.models import select_model
 from src.utils import logger
 from src.utils.evaluation_metrics import EvaluationMetricsCalculator
 
+# 评估任务中同时处理的问题数（可通过 retrieval_config.eval_concurrency 覆盖）
+EVALUATION_CONCURRENCY = int(os.getenv("EVALUATION_CONCURRENCY") or 4)
+
 
 class EvaluationService:
     """RAG评估服务"""
@@ -34,6 +39,41 @@ class EvaluationService:
         os.makedirs(path, exist_ok=True)
         return path
 
+    def _get_result_details_path(self, db_id: str, task_id: str) -> str:
+        """逐题评估结果（追加写入的 JSONL，按问题顺序，每行一条）；{task_id}.json 仅保存摘要"""
+        return os.path.join(self._get_result_dir(db_id), f"{task_id}.results.jsonl")
+
+    @staticmethod
+    def _is_error_result(item: dict[str, Any]) -> bool:
+        """答案评分为错误（score <= 0.5）或检索召回明显偏低"""
+        metrics = item.get("metrics", {})
+        if metrics.get("score", 1.0) <= 0.5:
+            return True
+        return any(metrics.get(k, 1.0) < 0.3 for k in metrics if k.startswith("recall@"))
+
+    def _read_result_details(
+        self, details_path: str, offset: int = 0, limit: int | None = None, error_only: bool = False
+    ) -> tuple[list[dict[str, Any]], int]:
+        """流式读取逐题结果，逐行处理不整体加载；返回 (当前页, 匹配总数)
+
+        不过滤时只解析分页窗口内的行；error_only 时按每行写入的 is_error 标记过滤。
+        """
+        items = []
+        total = 0
+        with open(details_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = None
+                if error_only:
+                    item = json.loads(line)
+                    if not item.get("is_error"):
+                        continue
+                if total >= offset and (limit is None or len(items) < limit):
+                    items.append(item if item is not None else json.loads(line))
+                total += 1
+        return items, total
+
     # 已移除基准回退逻辑，统一使用集中元数据
 
     # 已移除结果回退逻辑，统一通过 db_id 定位
@@ -230,13 +270,11 @@ class EvaluationService:
         return {"task_id": task_id, "message": "基准生成任务已提交"}
 
     async def _generate_benchmark_task(self, context: TaskContext):
-        import math
         import random
 
         await context.set_progress(0, "初始化")
 
-        task = context._tasker._tasks.get(context.task_id)
-        payload = task.payload if task else {}
+        payload = context.payload
 
         db_id = payload.get("db_id")
         name = payload.get("name", "自动生成评估基准")
@@ -261,55 +299,53 @@ class EvaluationService:
 
         await context.set_progress(5, "加载chunks")
 
-        all_chunks = []
-        for fid, finfo in kb_instance.files_meta.items():
-            if finfo.get("database_id") != db_id:
-                continue
-            try:
-                content_info = await kb_instance.get_file_content(db_id, fid)
-                lines = content_info.get("lines", [])
-                for line in lines:
-                    all_chunks.append(
-                        {
-                            "id": line.get("id"),
-                            "content": line.get("content", ""),
-                            "file_id": fid,
-                            "chunk_index": line.get("chunk_order_index"),
-                        }
-                    )
-            except Exception:
-                continue
-
-        if not all_chunks:
-            await context.set_message("知识库为空或未解析到chunks")
-            raise ValueError("No chunks found in knowledge base")
-
-        contents = [c["content"] for c in all_chunks]
-
-        await context.set_progress(15, "向量化")
-
+        db_meta = kb_instance.databases_meta.get(db_id, {})
+        embed_info = db_meta.get("embed_info") or {}
+        kb_embedding_ids = {embed_info.get("model_id"), embed_info.get("name"), embed_info.get("model")} - {None, ""}
         if not embedding_model_id:
-            db_meta = kb_instance.databases_meta.get(db_id, {})
-            embed_info = db_meta.get("embed_info", {})
             embedding_model_id = embed_info.get("name") or embed_info.get("model") or ""
         if not embedding_model_id:
             raise ValueError("Embedding model not specified")
 
-        from src.models import select_embedding_model, select_model
+        # 与知识库使用相同的嵌入模型时，直接复用 Milvus 中已存储的向量
+        reuse_vectors = neighbors_count > 0 and embedding_model_id in kb_embedding_ids
+        if hasattr(kb_instance, "get_all_chunks"):
+            all_chunks = await kb_instance.get_all_chunks(db_id, with_vectors=reuse_vectors)
+        else:
+            all_chunks = await self._load_chunks_by_file(kb_instance, db_id)
+            reuse_vectors = False
 
-        embed_model = select_embedding_model(embedding_model_id)
-        # TODO: Performance Optimization
-        # Currently, we re-calculate embeddings for ALL chunks in the KB for every benchmark generation.
-        # This is inefficient for large KBs (O(N) embedding calls).
-        # Optimization: Reuse existing embeddings from Vector DB if embedding_model_id matches the KB's embedding model.
-        embeddings = await embed_model.abatch_encode(contents, batch_size=40)
-        norms = [math.sqrt(sum(x * x for x in vec)) or 1.0 for vec in embeddings]
+        if not all_chunks:
+            await context.set_message("知识库为空或未解析到chunks")
+            raise ValueError("No chunks found in knowledge base")
 
-        def cosine(a, b, na, nb):
-            s = 0.0
-            for i in range(len(a)):
-                s += a[i] * b[i]
-            return s / (na * nb)
+        # 归一化后的向量矩阵 (N, D)，邻居检索只需一次矩阵-向量乘法
+        matrix = None
+        if neighbors_count > 0:
+            await context.set_progress(15, "向量化")
+            if reuse_vectors and all(c.get("embedding") is not None for c in all_chunks):
+                embeddings = [c.pop("embedding") for c in all_chunks]
+            else:
+                from src.models import select_embedding_model
+
+                embed_model = select_embedding_model(embedding_model_id)
+                contents = [c["content"] for c in all_chunks]
+                embeddings = await embed_model.abatch_encode(contents, batch_size=40)
+            matrix = np.asarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+
+        def nearest_neighbors(i0: int) -> list[int]:
+            k = min(neighbors_count, len(all_chunks) - 1)
+            if matrix is None or k <= 0:
+                return []
+            sims = matrix @ matrix[i0]
+            sims[i0] = -np.inf
+            top = np.argpartition(-sims, k - 1)[:k]
+            return top[np.argsort(-sims[top])].tolist()
+
+        from src.models import select_model
 
         llm = select_model(model_spec=llm_model_spec)
 
@@ -328,17 +364,7 @@ class EvaluationService:
             while generated < count and attempts < max_attempts:
                 attempts += 1
                 i0 = random.randrange(len(all_chunks))
-                e0 = embeddings[i0]
-                n0 = norms[i0]
-
-                sims = []
-                for j in range(len(all_chunks)):
-                    if j == i0:
-                        continue
-                    s = cosine(e0, embeddings[j], n0, norms[j])
-                    sims.append((j, s))
-                sims.sort(key=lambda x: x[1], reverse=True)
-                top_js = [j for j, _ in sims[:neighbors_count]]
+                top_js = nearest_neighbors(i0)
 
                 ctx_items = []
                 ctx_items.append((all_chunks[i0]["id"], all_chunks[i0]["content"]))
@@ -403,6 +429,27 @@ class EvaluationService:
 
         await context.set_progress(100, "完成")
 
+    async def _load_chunks_by_file(self, kb_instance, db_id: str) -> list[dict[str, Any]]:
+        """逐文件读取 chunks（用于不支持批量读取的知识库类型）"""
+        all_chunks = []
+        for fid, finfo in kb_instance.files_meta.items():
+            if finfo.get("database_id") != db_id:
+                continue
+            try:
+                content_info = await kb_instance.get_file_content(db_id, fid)
+                for line in content_info.get("lines", []):
+                    all_chunks.append(
+                        {
+                            "id": line.get("id"),
+                            "content": line.get("content", ""),
+                            "file_id": fid,
+                            "chunk_index": line.get("chunk_order_index"),
+                        }
+                    )
+            except Exception:
+                continue
+        return all_chunks
+
     async def run_evaluation(
         self, db_id: str, benchmark_id: str, model_config: dict[str, Any] = None, created_by: str = "system"
     ) -> str:
@@ -447,7 +494,7 @@ class EvaluationService:
                 "completed_questions": 0,
                 "started_at": datetime.utcnow().isoformat(),
                 "completed_at": None,
-                "interim_results": [],
+                "error_count": 0,
             }
 
             with open(result_file_path, "w", encoding="utf-8") as f:
@@ -463,7 +510,7 @@ class EvaluationService:
                     "retrieval_config": retrieval_config,
                     "created_by": created_by,
                 },
-                coroutine=self._run_evaluation_task,
+                handler="src.services.evaluation_service:run_evaluation_handler",
             )
 
             return task_id
@@ -475,10 +522,9 @@ class EvaluationService:
     async def _run_evaluation_task(self, context: TaskContext):
         """运行评估任务"""
         try:
-            task = context._tasker._tasks.get(context.task_id)
-            if not task:
+            payload = context.payload
+            if not payload:
                 raise ValueError("Task not found")
-            payload = task.payload
 
             task_id = payload["task_id"]
             db_id = payload["db_id"]
@@ -521,15 +567,46 @@ class EvaluationService:
                     except Exception as e:
                         logger.error(f"Failed to load judge LLM: {e}")
 
+            # 答案生成 LLM 在所有问题间复用
+            answer_llm = None
+            if retrieval_config.get("answer_llm"):
+                try:
+                    answer_llm = select_model(model_spec=retrieval_config["answer_llm"])
+                except Exception as e:
+                    logger.error(f"Failed to load answer LLM: {e}")
+
             total_questions = len(benchmark_data)
-            interim_results = []
+            concurrency = max(1, int(retrieval_config.get("eval_concurrency") or EVALUATION_CONCURRENCY))
+            # eval_concurrency 是评估任务自身的参数，不转发给知识库检索
+            query_config = {k: v for k, v in retrieval_config.items() if k != "eval_concurrency"}
+            semaphore = asyncio.Semaphore(concurrency)
+            results: list[dict[str, Any] | None] = [None] * total_questions
             all_retrieval_metrics = []
             all_answer_metrics = []
 
-            # 更新结果文件 helper
+            # 摘要文件（小，整体重写）与逐题结果文件（追加写入）
             result_file_path = os.path.join(self._get_result_dir(db_id), f"{task_id}.json")
-
-            def update_result_file(status="running", completed=0, metrics=None, interim=None, final_score=None):
+            details_path = self._get_result_details_path(db_id, task_id)
+            open(details_path, "w", encoding="utf-8").close()
+            next_to_write = 0
+            error_count = 0
+
+            def append_ready_results() -> None:
+                """按问题顺序追加已完成的连续结果，写出后释放内存"""
+                nonlocal next_to_write, error_count
+                lines = []
+                while next_to_write < total_questions and results[next_to_write] is not None:
+                    item = results[next_to_write]
+                    results[next_to_write] = None
+                    is_error = self._is_error_result(item)
+                    error_count += is_error
+                    lines.append(json.dumps({"is_error": is_error, "index": next_to_write, **item}, ensure_ascii=False))
+                    next_to_write += 1
+                if lines:
+                    with open(details_path, "a", encoding="utf-8") as f:
+                        f.write("\n".join(lines) + "\n")
+
+            def update_result_file(status="running", completed=0, metrics=None, final_score=None):
                 try:
                     if os.path.exists(result_file_path):
                         with open(result_file_path, encoding="utf-8") as f:
@@ -539,10 +616,9 @@ class EvaluationService:
 
                     data["status"] = status
                     data["completed_questions"] = completed
+                    data["error_count"] = error_count
                     if metrics:
                         data["metrics"] = metrics
-                    if interim is not None:
-                        data["interim_results"] = interim
                     if final_score is not None:
                         data["overall_score"] = final_score
                     if status in ["completed", "failed"]:
@@ -553,14 +629,9 @@ class EvaluationService:
                 except Exception as e:
                     logger.error(f"Failed to update result file: {e}")
 
-            for i, question_data in enumerate(benchmark_data):
-                # 检查任务是否被取消
-                await context.raise_if_cancelled()
-                progress = 10 + (i / total_questions) * 80
-                await context.set_progress(progress, f"评估 {i + 1}/{total_questions}")
-
+            async def evaluate_question(question_data: dict[str, Any]) -> dict[str, Any]:
                 # 执行查询
-                query_result = await kb_instance.aquery(question_data["query"], db_id, **retrieval_config)
+                query_result = await kb_instance.aquery(question_data["query"], db_id, **query_config)
 
                 # 处理结果
                 if isinstance(query_result, dict):
@@ -571,13 +642,9 @@ class EvaluationService:
                     generated_answer = ""
 
                 # 如果没有生成的答案，但有检索结果且配置了 LLM，则生成答案
-                if not generated_answer and retrieved_chunks and retrieval_config.get("answer_llm"):
+                if not generated_answer and retrieved_chunks and answer_llm:
                     logger.debug(f"使用 LLM {retrieval_config.get('answer_llm')} 生成答案...")
                     try:
-                        # 从配置中获取 LLM
-                        model_spec = retrieval_config["answer_llm"]
-                        llm = select_model(model_spec=model_spec)
-
                         # 构建上下文
                         context_docs = []
                         for idx, chunk in enumerate(retrieved_chunks[:5]):  # 使用前5个最相关的文档
@@ -597,7 +664,7 @@ class EvaluationService:
                         )
 
                         # 生成答案 - 使用 asyncio.to_thread 避免阻塞事件循环
-                        response = await asyncio.to_thread(llm.call, prompt, stream=False)
+                        response = await asyncio.to_thread(answer_llm.call, prompt, stream=False)
                         generated_answer = response.content if response else ""
                         logger.debug(f"LLM 生成的答案长度: {len(generated_answer) if generated_answer else 0}")
 
@@ -615,7 +682,6 @@ class EvaluationService:
                         retrieved_chunks, question_data["gold_chunk_ids"]
                     )
                     current_metrics.update(retrieval_scores)
-                    all_retrieval_metrics.append(retrieval_scores)
 
                 if benchmark_meta.get("has_gold_answers") and question_data.get("gold_answer"):
                     if judge_llm:
@@ -628,45 +694,75 @@ class EvaluationService:
                             judge_llm=judge_llm,
                         )
                         current_metrics.update(answer_scores)
-                        all_answer_metrics.append(answer_scores)
                     else:
                         logger.warning("需要计算答案指标但未配置 Judge LLM")
 
-                interim_results.append(
-                    {
-                        "query": question_data["query"],
-                        "gold_chunk_ids": question_data.get("gold_chunk_ids"),
-                        "gold_answer": question_data.get("gold_answer"),
-                        "generated_answer": generated_answer,
-                        "retrieved_chunks": retrieved_chunks,
-                        "metrics": current_metrics,
-                    }
-                )
+                return {
+                    "query": question_data["query"],
+                    "gold_chunk_ids": question_data.get("gold_chunk_ids"),
+                    "gold_answer": question_data.get("gold_answer"),
+                    "generated_answer": generated_answer,
+                    "retrieved_chunks": retrieved_chunks,
+                    "metrics": current_metrics,
+                    "_retrieval_scores": retrieval_scores,
+                    "_answer_scores": answer_scores,
+                }
 
-                # 计算当前累计指标
-                current_overall_metrics = {}
-                if all_retrieval_metrics:
-                    keys = all_retrieval_metrics[0].keys()
-                    for k in keys:
-                        current_overall_metrics[k] = sum(m.get(k, 0) for m in all_retrieval_metrics) / len(
-                            all_retrieval_metrics
-                        )
-                if all_answer_metrics:
-                    scores = [m.get("score", 0) for m in all_answer_metrics]
-                    current_overall_metrics["answer_correctness"] = sum(scores) / len(scores) if scores else 0.0
-
-                # 更新 Tasker 的 result 以便实时获取当前指标
-                await context.set_result(
-                    {
-                        "current_metrics": current_overall_metrics,
-                        "completed_questions": i + 1,
-                        "total_questions": total_questions,
-                    }
-                )
+            async def run_question(i: int, question_data: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+                async with semaphore:
+                    # 检查任务是否被取消
+                    await context.raise_if_cancelled()
+                    return i, await evaluate_question(question_data)
 
-                # 定期更新文件 (每5个或最后一个)
-                if (i + 1) % 5 == 0 or (i + 1) == total_questions:
-                    update_result_file(completed=i + 1, interim=interim_results)
+            # 并发评估，结果按问题顺序汇总
+            await context.set_progress(10, f"评估 0/{total_questions}（并发 {concurrency}）")
+            pending = [asyncio.create_task(run_question(i, q)) for i, q in enumerate(benchmark_data)]
+            completed = 0
+            try:
+                for next_done in asyncio.as_completed(pending):
+                    i, item = await next_done
+                    if retrieval_scores := item.pop("_retrieval_scores"):
+                        all_retrieval_metrics.append(retrieval_scores)
+                    if answer_scores := item.pop("_answer_scores"):
+                        all_answer_metrics.append(answer_scores)
+                    results[i] = item
+                    completed += 1
+                    append_ready_results()
+
+                    await context.raise_if_cancelled()
+                    progress = 10 + (completed / total_questions) * 80
+                    await context.set_progress(progress, f"评估 {completed}/{total_questions}")
+
+                    # 计算当前累计指标
+                    current_overall_metrics = {}
+                    if all_retrieval_metrics:
+                        keys = all_retrieval_metrics[0].keys()
+                        for k in keys:
+                            current_overall_metrics[k] = sum(m.get(k, 0) for m in all_retrieval_metrics) / len(
+                                all_retrieval_metrics
+                            )
+                    if all_answer_metrics:
+                        scores = [m.get("score", 0) for m in all_answer_metrics]
+                        current_overall_metrics["answer_correctness"] = sum(scores) / len(scores) if scores else 0.0
+
+                    # 更新 Tasker 的 result 以便实时获取当前指标
+                    await context.set_result(
+                        {
+                            "current_metrics": current_overall_metrics,
+                            "completed_questions": completed,
+                            "total_questions": total_questions,
+                        }
+                    )
+
+                    # 定期更新摘要文件 (每5个或最后一个)
+                    if completed % 5 == 0 or completed == total_questions:
+                        update_result_file(completed=completed)
+            finally:
+                # 取消或出错时停止剩余问题，并等待其真正结束后再标记任务完成
+                for t in pending:
+                    if not t.done():
+                        t.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
 
             # 最终计算
             await context.set_progress(95, "计算最终指标")
@@ -694,7 +790,6 @@ class EvaluationService:
                 status="completed",
                 completed=total_questions,
                 metrics=overall_metrics,
-                interim=interim_results,
                 final_score=overall_score,
             )
             await context.set_progress(100, "完成")
@@ -714,9 +809,8 @@ class EvaluationService:
                         d["error"] = str(e)
                         with open(path, "w", encoding="utf-8") as f:
                             json.dump(d, f, ensure_ascii=False, indent=2)
-            except Exception as e:
-                logger.error(f"Error updating result file: {e}")
-                pass
+            except Exception as update_error:
+                logger.error(f"Error updating result file: {update_error}")
 
             await context.set_message(f"Error: {str(e)}")
             raise
@@ -783,35 +877,25 @@ class EvaluationService:
                 }
             raise ValueError(f"Result not found for task {task_id}")
 
-        # 加载JSON文件
+        # 加载摘要文件
         with open(result_file_path, encoding="utf-8") as f:
             data = json.load(f)
 
+        details_path = self._get_result_details_path(db_id, task_id)
+        has_details = os.path.exists(details_path)
+
         # 如果是分页请求，处理详细结果
         if page and page_size:
-            all_results = data.get("interim_results", data.get("results", []))
-
-            # 如果只要错误结果，先过滤
-            if error_only:
-                filtered_results = []
-                for item in all_results:
-                    # 检查答案评分是否为错误（score <= 0.5）
-                    if item.get("metrics", {}).get("score", 1.0) <= 0.5:
-                        filtered_results.append(item)
-                        continue
-
-                    # 检查检索指标是否明显偏低
-                    metrics = item.get("metrics", {})
-                    has_low_recall = any(metrics.get(k, 1.0) < 0.3 for k in metrics if k.startswith("recall@"))
-                    if has_low_recall:
-                        filtered_results.append(item)
-                all_results = filtered_results
-
-            # 计算分页
-            total = len(all_results)
-            start_idx = (page - 1) * page_size
-            end_idx = start_idx + page_size
-            paged_results = all_results[start_idx:end_idx]
+            offset = (page - 1) * page_size
+            if has_details:
+                paged_results, total = self._read_result_details(details_path, offset, page_size, error_only)
+            else:
+                # 旧格式：逐题结果内嵌在 JSON 中
+                all_results = data.get("interim_results", data.get("results", []))
+                if error_only:
+                    all_results = [item for item in all_results if self._is_error_result(item)]
+                total = len(all_results)
+                paged_results = all_results[offset : offset + page_size]
 
             # 返回分页数据
             return {
@@ -834,6 +918,8 @@ class EvaluationService:
             }
 
         # 非分页请求，返回完整数据（保持向后兼容）
+        if has_details:
+            data["interim_results"], _ = self._read_result_details(details_path)
         return data
 
     async def delete_evaluation_result_by_db(self, db_id: str, task_id: str) -> None:
@@ -843,6 +929,17 @@ class EvaluationService:
         result_file_path = os.path.join(self._get_result_dir(db_id), f"{task_id}.json")
         if os.path.exists(result_file_path):
             os.remove(result_file_path)
+            details_path = self._get_result_details_path(db_id, task_id)
+            if os.path.exists(details_path):
+                os.remove(details_path)
             logger.info(f"成功删除评估结果: {task_id}")
             return
         raise ValueError("Result not found")
+
+
+async def run_evaluation_handler(context: TaskContext):
+    """评估任务入口（按名称解析，可在 worker 进程中执行）"""
+    if tasker.remote_enabled:
+        # process 后端下本任务在 worker 进程中执行，需先同步 API 进程新建的知识库与基准元数据
+        knowledge_base.reload_metadata()
+    return await EvaluationService()._run_evaluation_task(context)
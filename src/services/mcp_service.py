@@ -14,9 +14,11 @@ from collections.abc import Callable
 from typing import Any, cast
 
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.services.mcp_tool_wrapper import clear_tool_result_cache, wrap_mcp_tool
 from src.storage.db.models import MCPServer
 from src.utils import logger
 
@@ -24,7 +26,7 @@ from src.utils import logger
 # === Global Cache & State ===
 # =============================================================================
 
-# Global Lock for MCP state
+# Global Lock for MCP state (serializes writers only, readers never take it)
 _mcp_lock = asyncio.Lock()
 
 # Global MCP tools cache
@@ -34,8 +36,25 @@ _mcp_tools_cache: dict[str, list[Callable[..., Any]]] = {}
 _mcp_tools_stats: dict[str, dict[str, int]] = {}
 
 # MCP Server configurations (Runtime cache, loaded from DB)
+# Copy-on-write snapshot: writers build a new dict and rebind the name under `_mcp_lock`,
+# so readers can use the current reference without locking. Never mutate it in place.
 MCP_SERVERS: dict[str, dict[str, Any]] = {}
 
+# In-flight tool discoveries per server (single-flight): server_name -> (server_config, task)
+_mcp_fetch_tasks: dict[str, tuple[dict[str, Any], asyncio.Task]] = {}
+
+# Long-lived sessions per MCP server (see MCPServerSession)
+_mcp_sessions: dict[str, "MCPServerSession"] = {}
+
+# Background task keeping the tools cache warm
+_mcp_refresh_task: asyncio.Task | None = None
+
+# Timeouts / intervals (seconds)
+MCP_CONNECT_TIMEOUT = 30  # establishing a session
+MCP_DISCOVERY_TIMEOUT = 30  # listing tools of a single server
+MCP_HEALTH_CHECK_INTERVAL = 60  # ping interval of idle sessions
+MCP_REFRESH_INTERVAL = 600  # background refresh of the tools cache
+
 # Default MCP Server configurations (Imported to DB on first run)
 _DEFAULT_MCP_SERVERS = {
     "sequentialthinking": {
@@ -73,9 +92,7 @@ async def load_mcp_servers_from_db() -> None:
             servers = result.scalars().all()
 
             async with _mcp_lock:
-                MCP_SERVERS.clear()
-                for server in servers:
-                    MCP_SERVERS[server.name] = server.to_mcp_config()
+                MCP_SERVERS = {server.name: server.to_mcp_config() for server in servers}
 
             logger.info(f"Loaded {len(MCP_SERVERS)} MCP servers from database: {list(MCP_SERVERS.keys())}")
     except Exception as e:
@@ -93,14 +110,25 @@ async def sync_mcp_server_to_cache(name: str, config: dict[str, Any] | None) ->
 
     async with _mcp_lock:
         if config is None:
-            MCP_SERVERS.pop(name, None)
+            MCP_SERVERS = {k: v for k, v in MCP_SERVERS.items() if k != name}
             logger.info(f"Removed MCP server '{name}' from cache")
         else:
-            MCP_SERVERS[name] = config
+            MCP_SERVERS = MCP_SERVERS | {name: config}
             logger.info(f"Synced MCP server '{name}' to cache")
 
         # Clear tools cache for this server
         _mcp_tools_cache.pop(name, None)
+        clear_tool_result_cache(name)
+
+    # Drop the long-lived session, it is reopened with the new config on demand
+    server_session = _mcp_sessions.pop(name, None)
+    if server_session:
+        await server_session.close()
+
+    # Agent graphs bind the full MCP tool set at build time, rebuild them in the background
+    from src.agents import agent_manager
+
+    await agent_manager.reload_all()
 
 
 async def init_mcp_servers() -> None:
@@ -190,6 +218,112 @@ async def get_mcp_client(
         return None
 
 
+class MCPServerSession:
+    """A long-lived session to one MCP server.
+
+    The session is opened inside a background task (MCP transports use anyio task groups,
+    which must be entered and exited by the same task) and kept alive with periodic pings.
+    When the connection drops, the next call reconnects transparently.
+    """
+
+    def __init__(self, name: str, config: dict[str, Any]):
+        self.name = name
+        self.config = config
+        self.session: Any = None
+        self._task: asyncio.Task | None = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._start_lock = asyncio.Lock()
+        self._error: Exception | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def get_session(self) -> Any:
+        """Return a live session, (re)connecting if necessary."""
+        if self.connected:
+            return self.session
+
+        async with self._start_lock:
+            if not self.connected:
+                self._ready.clear()
+                self._error = None
+                self._task = asyncio.create_task(self._run(), name=f"mcp-session-{self.name}")
+
+        await asyncio.wait_for(self._ready.wait(), MCP_CONNECT_TIMEOUT)
+        if self.session is None:
+            raise ConnectionError(f"Failed to connect to MCP server '{self.name}': {self._error}")
+        return self.session
+
+    async def _run(self) -> None:
+        client = MultiServerMCPClient({self.name: self.config})  # pyright: ignore[reportArgumentType]
+        try:
+            async with client.session(self.name) as session:
+                self.session = session
+                self._ready.set()
+                logger.info(f"Opened persistent session to MCP server '{self.name}'")
+
+                # Health check: ping the server periodically, leave the context on failure
+                while not self._stop.is_set():
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), MCP_HEALTH_CHECK_INTERVAL)
+                    except TimeoutError:
+                        await asyncio.wait_for(session.send_ping(), MCP_CONNECT_TIMEOUT)
+        except Exception as e:
+            self._error = e
+            logger.warning(f"MCP session to '{self.name}' closed: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def call_tool(self, *args, **kwargs) -> Any:
+        session = await self.get_session()
+        return await session.call_tool(*args, **kwargs)
+
+    async def list_tools(self, *args, **kwargs) -> Any:
+        session = await self.get_session()
+        return await session.list_tools(*args, **kwargs)
+
+    async def close(self) -> None:
+        self._stop.set()
+        if self._task and not self._task.done():
+            try:
+                await asyncio.wait_for(self._task, MCP_CONNECT_TIMEOUT)
+            except Exception:
+                self._task.cancel()
+
+
+def get_server_session(server_name: str, config: dict[str, Any]) -> MCPServerSession:
+    """Get (or create) the long-lived session holder for a server."""
+    server_session = _mcp_sessions.get(server_name)
+    if server_session is None or server_session.config != config:
+        if server_session is not None:
+            asyncio.create_task(server_session.close())
+        server_session = MCPServerSession(server_name, config)
+        _mcp_sessions[server_name] = server_session
+    return server_session
+
+
+async def _load_server_tools(server_name: str, client_config: dict[str, Any]) -> list[Any]:
+    """Load the raw tools of a server.
+
+    Tools are bound to the server's MCPServerSession rather than to a concrete session,
+    so they keep working across reconnects. Falls back to a one-off client if the
+    persistent session cannot be established.
+    """
+    server_session = get_server_session(server_name, client_config)
+    try:
+        return cast(list[Any], await load_mcp_tools(server_session))
+    except Exception as e:
+        logger.warning(f"Persistent session to MCP server '{server_name}' unavailable, using one-off client: {e}")
+
+    client = await get_mcp_client({server_name: client_config})
+    if client is None:
+        return []
+    return cast(list[Any], await client.get_tools())
+
+
 def to_camel_case(s: str) -> str:
     """Convert string to lowerCamelCase."""
 
@@ -201,6 +335,77 @@ def to_camel_case(s: str) -> str:
     return s
 
 
+async def _fetch_mcp_tools(server_name: str, server_config: dict[str, Any], cache: bool) -> list[Callable[..., Any]]:
+    """Connect to a server, load ALL tools, render IDs and (optionally) update the cache."""
+    client_config = {k: v for k, v in server_config.items() if k not in ("disabled_tools", "cacheable_tools")}
+    cacheable_tools = set(server_config.get("cacheable_tools") or [])
+
+    # Get ALL tools (Raw)
+    raw_tools = await _load_server_tools(server_name, client_config)
+
+    # Render IDs for ALL tools
+    all_processed_tools = []
+    server_cc = to_camel_case(server_name)
+    for tool in raw_tools:
+        # Render unique ID rule: mcp__[camelCaseServer]__[camelCaseTool]
+        original_name = tool.name
+        tool_cc = to_camel_case(original_name)
+        unique_id = f"mcp__{server_cc}__{tool_cc}"
+
+        # Use metadata to store
+        if tool.metadata is None:
+            tool.metadata = {}
+        tool.metadata["id"] = unique_id
+
+        # Latency / error metrics, and result caching for tools marked cacheable
+        wrap_mcp_tool(tool, server_name, cacheable=original_name in cacheable_tools)
+
+        all_processed_tools.append(tool)
+
+    # Update Cache (Store the FULL list), unless the config changed while we were fetching
+    if cache and MCP_SERVERS.get(server_name) is server_config:
+        _mcp_tools_cache[server_name] = all_processed_tools
+
+        # Update Stats
+        # Stats should reflect the GLOBAL configuration state
+        # (How many are disabled in the stored config, not the transient arg)
+        global_config_disabled = server_config.get("disabled_tools") or []
+        enabled_count = len([t for t in all_processed_tools if t.name not in global_config_disabled])
+
+        _mcp_tools_stats[server_name] = {
+            "total": len(all_processed_tools),
+            "enabled": enabled_count,
+            "disabled": len(all_processed_tools) - enabled_count,
+        }
+
+        logger.info(f"Refreshed MCP tools cache for '{server_name}': {len(all_processed_tools)} tools loaded.")
+
+    return all_processed_tools
+
+
+async def _fetch_mcp_tools_single_flight(
+    server_name: str, server_config: dict[str, Any], cache: bool
+) -> list[Callable[..., Any]]:
+    """Coalesce concurrent discoveries of the same server (same config) into one fetch.
+
+    The shared task is shielded, so a caller timing out does not cancel the fetch for others.
+    """
+    inflight = _mcp_fetch_tasks.get(server_name)
+    if inflight is not None and inflight[0] is server_config and not inflight[1].done():
+        return await asyncio.shield(inflight[1])
+
+    task = asyncio.create_task(_fetch_mcp_tools(server_name, server_config, cache))
+    _mcp_fetch_tasks[server_name] = (server_config, task)
+
+    def _cleanup(_task: asyncio.Task) -> None:
+        current = _mcp_fetch_tasks.get(server_name)
+        if current is not None and current[1] is _task:
+            _mcp_fetch_tasks.pop(server_name, None)
+
+    task.add_done_callback(_cleanup)
+    return await asyncio.shield(task)
+
+
 async def get_mcp_tools(
     server_name: str,
     additional_servers: dict[str, dict] = None,
@@ -211,7 +416,7 @@ async def get_mcp_tools(
     """Get MCP tools for a specific server.
 
     Architecture:
-    1. Fetching: Connects to MCP server to get ALL tools.
+    1. Fetching: Connects to MCP server to get ALL tools (single-flight per server).
     2. Caching: Stores the FULL, UNFILTERED list of tools in `_mcp_tools_cache`.
     3. Filtering: Filters the return value based on `disabled_tools` argument.
 
@@ -222,13 +427,8 @@ async def get_mcp_tools(
         cache: Whether to use/update the cache (default: True)
         force_refresh: Whether to force a refresh from the server (default: False)
     """
-    global _mcp_tools_cache
-
-    # 1. Prepare Server Config
-    async with _mcp_lock:
-        mcp_servers = MCP_SERVERS | (additional_servers or {})
-
-    all_processed_tools = []
+    # 1. Prepare Server Config (lock-free read of the current snapshot)
+    mcp_servers = MCP_SERVERS | (additional_servers or {})
 
     # 2. Check Cache / Fetch Strategy
     # If we have it in cache and don't need to force refresh, use cache.
@@ -238,51 +438,7 @@ async def get_mcp_tools(
         # Need to fetch from server
         try:
             assert server_name in mcp_servers, f"Server {server_name} not found in ({list(mcp_servers.keys())})"
-
-            # Extract connection config
-            server_config = mcp_servers[server_name]
-            client_config = {k: v for k, v in server_config.items() if k not in ("disabled_tools",)}
-
-            client = await get_mcp_client({server_name: client_config})
-            if client is None:
-                return []
-
-            # Get ALL tools (Raw)
-            raw_tools = cast(list[Any], await client.get_tools())
-
-            # Render IDs for ALL tools
-            server_cc = to_camel_case(server_name)
-            for tool in raw_tools:
-                # Render unique ID rule: mcp__[camelCaseServer]__[camelCaseTool]
-                original_name = tool.name
-                tool_cc = to_camel_case(original_name)
-                unique_id = f"mcp__{server_cc}__{tool_cc}"
-
-                # Use metadata to store
-                if tool.metadata is None:
-                    tool.metadata = {}
-                tool.metadata["id"] = unique_id
-
-                all_processed_tools.append(tool)
-
-            # Update Cache (Store the FULL list)
-            if cache:
-                _mcp_tools_cache[server_name] = all_processed_tools
-
-                # Update Stats
-                # Stats should reflect the GLOBAL configuration state
-                # (How many are disabled in the stored config, not the transient arg)
-                global_config_disabled = mcp_servers.get(server_name, {}).get("disabled_tools") or []
-                enabled_count = len([t for t in all_processed_tools if t.name not in global_config_disabled])
-
-                _mcp_tools_stats[server_name] = {
-                    "total": len(all_processed_tools),
-                    "enabled": enabled_count,
-                    "disabled": len(all_processed_tools) - enabled_count,
-                }
-
-                logger.info(f"Refreshed MCP tools cache for '{server_name}': {len(all_processed_tools)} tools loaded.")
-
+            all_processed_tools = await _fetch_mcp_tools_single_flight(server_name, mcp_servers[server_name], cache)
         except AssertionError as e:
             logger.warning(f"[assert] Failed to load tools from MCP server '{server_name}': {e}")
             return []
@@ -304,18 +460,70 @@ async def get_mcp_tools(
     return all_processed_tools
 
 
+async def _get_mcp_tools_with_timeout(server_name: str, **kwargs) -> list[Callable[..., Any]]:
+    try:
+        return await asyncio.wait_for(get_mcp_tools(server_name, **kwargs), MCP_DISCOVERY_TIMEOUT)
+    except TimeoutError:
+        logger.error(f"Timed out loading tools from MCP server '{server_name}' after {MCP_DISCOVERY_TIMEOUT}s")
+        return []
+
+
 async def get_tools_from_all_servers() -> list[Callable[..., Any]]:
-    """Get all tools from all configured MCP servers."""
-    all_tools = []
-    for server_name in MCP_SERVERS.keys():
-        tools = await get_mcp_tools(server_name)
-        all_tools.extend(tools)
-    return all_tools
+    """Get all tools from all configured MCP servers.
+
+    Servers are queried concurrently with a per-server timeout, so a slow or dead
+    server does not delay the others.
+    """
+    results = await asyncio.gather(*[_get_mcp_tools_with_timeout(name) for name in list(MCP_SERVERS.keys())])
+    return [tool for tools in results for tool in tools]
+
+
+async def refresh_all_mcp_tools() -> None:
+    """Refresh the tools cache of all servers; rebuild agents when a tool set changed."""
+    server_names = list(MCP_SERVERS.keys())
+    before = {name: {t.name for t in _mcp_tools_cache.get(name, [])} for name in server_names}
+    await asyncio.gather(*[_get_mcp_tools_with_timeout(name, force_refresh=True) for name in server_names])
+    after = {name: {t.name for t in _mcp_tools_cache.get(name, [])} for name in server_names}
+
+    if before != after:
+        logger.info("MCP tool sets changed, rebuilding agents")
+        from src.agents import agent_manager
+
+        await agent_manager.reload_all()
+
+
+async def _refresh_mcp_tools_loop() -> None:
+    while True:
+        await asyncio.sleep(MCP_REFRESH_INTERVAL)
+        try:
+            await refresh_all_mcp_tools()
+        except Exception as e:
+            logger.error(f"Background MCP tools refresh failed: {e}")
+
+
+def start_mcp_background_refresh() -> None:
+    """Start the background task that keeps `_mcp_tools_cache` warm."""
+    global _mcp_refresh_task
+    if _mcp_refresh_task is None or _mcp_refresh_task.done():
+        _mcp_refresh_task = asyncio.create_task(_refresh_mcp_tools_loop(), name="mcp-tools-refresh")
+
+
+async def shutdown_mcp_sessions() -> None:
+    """Stop background refresh and close all persistent MCP sessions."""
+    global _mcp_refresh_task
+    if _mcp_refresh_task is not None:
+        _mcp_refresh_task.cancel()
+        _mcp_refresh_task = None
+
+    sessions = list(_mcp_sessions.values())
+    _mcp_sessions.clear()
+    await asyncio.gather(*[session.close() for session in sessions], return_exceptions=True)
 
 
 def add_mcp_server(name: str, config: dict[str, Any]) -> None:
     """Add a new MCP server configuration."""
-    MCP_SERVERS[name] = config
+    global MCP_SERVERS
+    MCP_SERVERS = MCP_SERVERS | {name: config}
     # Clear client to force reinitialization with new config
     clear_mcp_cache()
 
@@ -374,6 +582,7 @@ async def create_mcp_server(
     sse_read_timeout: int = None,
     tags: list = None,
     icon: str = None,
+    cacheable_tools: list = None,
     created_by: str = None,
 ) -> MCPServer:
     """Create server."""
@@ -394,6 +603,7 @@ async def create_mcp_server(
         sse_read_timeout=sse_read_timeout,
         tags=tags,
         icon=icon,
+        cacheable_tools=cacheable_tools,
         enabled=1,
         created_by=created_by,
         updated_by=created_by,
@@ -422,6 +632,7 @@ async def update_mcp_server(
     sse_read_timeout: int = None,
     tags: list = None,
     icon: str = None,
+    cacheable_tools: list = None,
     updated_by: str = None,
 ) -> MCPServer:
     """Update server configuration."""
@@ -449,6 +660,8 @@ async def update_mcp_server(
         server.tags = tags
     if icon is not None:
         server.icon = icon
+    if cacheable_tools is not None:
+        server.cacheable_tools = cacheable_tools
     if updated_by is not None:
         server.updated_by = updated_by
 
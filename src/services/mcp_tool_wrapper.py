@@ -0,0 +1,184 @@
+"""MCP tool call instrumentation and result caching.
+
+Wraps the coroutine of LangChain tools loaded from MCP servers to:
+- Record per-server / per-tool latency histograms and error rates
+- Optionally cache results of idempotent, read-only tools (marked via `cacheable_tools`
+  in the MCP server config) for `MCP_TOOL_CACHE_TTL` seconds, keyed by normalized arguments
+"""
+
+import bisect
+import copy
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any
+
+from src.utils import logger
+
+MCP_TOOL_CACHE_TTL = int(os.getenv("MCP_TOOL_CACHE_TTL") or 300)
+MCP_TOOL_CACHE_SIZE = int(os.getenv("MCP_TOOL_CACHE_SIZE") or 1024)
+
+# Latency histogram bucket upper bounds (ms); the last bucket collects everything slower
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class ToolCallStats:
+    """Latency histogram and error counters of a single tool."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.last_error: str | None = None
+
+    def record(self, elapsed_ms: float, error: Exception | None = None) -> None:
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        if error is not None:
+            self.errors += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+
+    def percentile(self, q: float) -> float | None:
+        """Estimate a latency percentile (ms) from the histogram (bucket upper bound)."""
+        if not self.calls:
+            return None
+        threshold = q * self.calls
+        cumulative = 0
+        for i, count in enumerate(self.buckets):
+            cumulative += count
+            if cumulative >= threshold:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict[str, Any]:
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.calls, 4) if self.calls else 0.0,
+            "cache_hits": self.cache_hits,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max_ms, 2),
+            "histogram": dict(zip(labels, self.buckets)),
+            "last_error": self.last_error,
+        }
+
+
+# server_name -> tool_name -> stats
+_tool_stats: dict[str, dict[str, ToolCallStats]] = {}
+
+# (server_name, tool_name, args_key) -> (expires_at, result)
+_tool_result_cache: OrderedDict[tuple[str, str, str], tuple[float, Any]] = OrderedDict()
+
+
+def _get_stats(server_name: str, tool_name: str) -> ToolCallStats:
+    return _tool_stats.setdefault(server_name, {}).setdefault(tool_name, ToolCallStats())
+
+
+def _make_args_key(tool: Any, kwargs: dict[str, Any]) -> str:
+    """Normalize tool arguments into a stable cache key.
+
+    Only arguments declared by the tool schema are used, so injected runtime objects
+    do not leak into the key; `None` values are dropped and keys are sorted.
+    """
+    declared = set(getattr(tool, "args", None) or {})
+    arguments = {k: v for k, v in kwargs.items() if (not declared or k in declared) and v is not None}
+    payload = json.dumps(arguments, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _get_cached_result(key: tuple[str, str, str]) -> tuple[bool, Any]:
+    entry = _tool_result_cache.get(key)
+    if entry is None:
+        return False, None
+    expires_at, result = entry
+    if expires_at < time.monotonic():
+        _tool_result_cache.pop(key, None)
+        return False, None
+    _tool_result_cache.move_to_end(key)
+    return True, copy.deepcopy(result)
+
+
+def _set_cached_result(key: tuple[str, str, str], result: Any) -> None:
+    _tool_result_cache[key] = (time.monotonic() + MCP_TOOL_CACHE_TTL, copy.deepcopy(result))
+    _tool_result_cache.move_to_end(key)
+    while len(_tool_result_cache) > MCP_TOOL_CACHE_SIZE:
+        _tool_result_cache.popitem(last=False)
+
+
+def wrap_mcp_tool(tool: Any, server_name: str, cacheable: bool = False) -> Any:
+    """Instrument an MCP tool in place (idempotent) and return it.
+
+    Args:
+        tool: LangChain tool loaded from an MCP server
+        server_name: Server the tool belongs to
+        cacheable: Whether results may be cached (only for idempotent, read-only tools)
+    """
+    coroutine = getattr(tool, "coroutine", None)
+    if coroutine is None:
+        return tool
+
+    original = getattr(coroutine, "__wrapped_mcp_tool__", coroutine)
+    tool_name = tool.name
+
+    @wraps(original)
+    async def instrumented(*args, **kwargs):
+        stats = _get_stats(server_name, tool_name)
+
+        cache_key = None
+        if cacheable and MCP_TOOL_CACHE_TTL > 0:
+            cache_key = (server_name, tool_name, _make_args_key(tool, kwargs))
+            hit, result = _get_cached_result(cache_key)
+            if hit:
+                stats.cache_hits += 1
+                return result
+
+        start = time.perf_counter()
+        try:
+            result = await original(*args, **kwargs)
+        except Exception as e:
+            stats.record((time.perf_counter() - start) * 1000, e)
+            raise
+
+        stats.record((time.perf_counter() - start) * 1000)
+        if cache_key is not None:
+            _set_cached_result(cache_key, result)
+        return result
+
+    instrumented.__wrapped_mcp_tool__ = original  # type: ignore[attr-defined]
+    tool.coroutine = instrumented
+    return tool
+
+
+def get_tool_call_metrics(server_name: str | None = None) -> dict[str, dict[str, Any]]:
+    """Get call metrics, either of one server ({tool: stats}) or all ({server: {tool: stats}})."""
+    if server_name is not None:
+        return {tool: stats.to_dict() for tool, stats in _tool_stats.get(server_name, {}).items()}
+    return {server: get_tool_call_metrics(server) for server in _tool_stats}
+
+
+def reset_tool_call_metrics(server_name: str | None = None) -> None:
+    if server_name is None:
+        _tool_stats.clear()
+    else:
+        _tool_stats.pop(server_name, None)
+
+
+def clear_tool_result_cache(server_name: str | None = None) -> None:
+    """Drop cached tool results, optionally only for one server."""
+    if server_name is None:
+        _tool_result_cache.clear()
+        return
+    for key in [k for k in _tool_result_cache if k[0] == server_name]:
+        _tool_result_cache.pop(key, None)
+    logger.debug(f"Cleared MCP tool result cache for '{server_name}'")
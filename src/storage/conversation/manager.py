@@ -11,6 +11,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from src.storage.conversation import pagination, rollups
 from src.storage.db.models import Conversation, ConversationStats, Message, ToolCall
 from src.utils import logger
 from src.utils.datetime_utils import utc_now
@@ -128,11 +129,16 @@ class ConversationManager:
         Returns:
             Created Message object
         """
+        # Usage fields are promoted to indexed columns so token analytics avoid JSON parsing
+        model_name, input_tokens, output_tokens = rollups.extract_usage(extra_metadata)
         message = Message(
             conversation_id=conversation_id,
             role=role,
             content=content,
             message_type=message_type,
+            model_name=model_name,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
             extra_metadata=extra_metadata or {},
             image_content=image_content,
         )
@@ -143,6 +149,16 @@ class ConversationManager:
         if conversation:
             conversation.updated_at = utc_now()
 
+        # Dashboard rollups are committed together with the message
+        await rollups.record_message(
+            self.db,
+            role,
+            model_name,
+            input_tokens,
+            output_tokens,
+            user_id=conversation.user_id if conversation else None,
+        )
+
         await self.db.commit()
         await self.db.refresh(message)
 
@@ -225,6 +241,14 @@ class ConversationManager:
         )
 
         self.db.add(tool_call)
+
+        agent_result = await self.db.execute(
+            select(Conversation.agent_id)
+            .join(Message, Message.conversation_id == Conversation.id)
+            .filter(Message.id == message_id)
+        )
+        await rollups.record_tool_call(self.db, tool_name, status, agent_id=agent_result.scalar_one_or_none())
+
         await self.db.commit()
         await self.db.refresh(tool_call)
 
@@ -281,7 +305,12 @@ class ConversationManager:
         return await self.get_messages(conversation.id, limit, offset)
 
     async def list_conversations(
-        self, user_id: str | None = None, agent_id: str | None = None, status: str = "active"
+        self,
+        user_id: str | None = None,
+        agent_id: str | None = None,
+        status: str = "active",
+        limit: int | None = None,
+        cursor: str | None = None,
     ) -> list[Conversation]:
         """
         List conversations for a user or all users
@@ -290,9 +319,11 @@ class ConversationManager:
             user_id: User ID (optional, if None or empty string, returns all users' conversations)
             agent_id: Optional agent ID filter
             status: Conversation status filter
+            limit: Optional page size (all matching conversations when None)
+            cursor: Optional keyset cursor from `pagination.next_cursor` of the previous page
 
         Returns:
-            List of Conversation objects
+            List of Conversation objects, most recently updated first
         """
         query = select(Conversation).filter(Conversation.status == status)
 
@@ -303,7 +334,12 @@ class ConversationManager:
         if agent_id:
             query = query.filter(Conversation.agent_id == agent_id)
 
-        query = query.order_by(Conversation.updated_at.desc())
+        if cursor:
+            query = query.filter(pagination.keyset_before(Conversation.updated_at, Conversation.id, cursor))
+
+        query = query.order_by(Conversation.updated_at.desc(), Conversation.id.desc())
+        if limit:
+            query = query.limit(limit)
         result = await self.db.execute(query)
         return result.scalars().all()
 
@@ -464,6 +500,9 @@ class ConversationManager:
             logger.warning(f"Tool call not found for langgraph_tool_call_id: {langgraph_tool_call_id}")
             return None
 
+        await rollups.record_tool_status_change(
+            self.db, tool_call.tool_name, tool_call.status, status, at=tool_call.created_at
+        )
         tool_call.tool_output = tool_output
         tool_call.status = status
         if error_message:
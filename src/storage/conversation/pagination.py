@@ -0,0 +1,43 @@
+"""
+Keyset Pagination
+
+Opaque cursors for listings ordered by (timestamp DESC, id DESC). A page query
+filters on `(timestamp, id) < cursor` instead of using OFFSET, so it is an
+index range scan and deep pages cost the same as the first one.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Encode the last row of a page as an opaque cursor string."""
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor produced by `encode_cursor`, raising ValueError when it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_before(sort_column, id_column, cursor: str):
+    """Filter clause selecting rows after `cursor` in (sort_column DESC, id_column DESC) order."""
+    sort_value, row_id = decode_cursor(cursor)
+    return tuple_(sort_column, id_column) < (sort_value, row_id)
+
+
+def next_cursor(rows: list, limit: int | None, sort_attr: str = "updated_at") -> str | None:
+    """Cursor for the page following `rows`, or None when this is the last page."""
+    if not limit or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(getattr(last, sort_attr), last.id)
@@ -0,0 +1,151 @@
+"""
+Dashboard Rollups (Async)
+
+Hourly pre-aggregated counters for the dashboard (messages, model calls, tokens,
+tool calls, feedback, active users). Counters are incremented in the same
+transaction that writes the underlying row, so dashboard queries read a bounded
+number of rollup rows instead of scanning the message/tool call tables.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.storage.db.models import DashboardRollup
+from src.utils.datetime_utils import UTC, utc_now
+
+# Metric names (dimension in parentheses)
+MESSAGES = "messages"  # role
+MODEL_CALLS = "model_calls"  # model name of assistant messages
+INPUT_TOKENS = "input_tokens"  # model name
+OUTPUT_TOKENS = "output_tokens"  # model name
+TOOL_CALLS = "tool_calls"  # tool name
+TOOL_SUCCESS = "tool_success"  # tool name
+TOOL_ERROR = "tool_error"  # tool name
+AGENT_TOOL_CALLS = "agent_tool_calls"  # agent id
+FEEDBACKS = "feedbacks"  # agent id
+FEEDBACK_LIKES = "feedback_likes"  # agent id
+ACTIVE_USERS = "active_users"  # conversation user id, value is the message count in that hour
+
+TOOL_STATUS_METRICS = {"success": TOOL_SUCCESS, "error": TOOL_ERROR}
+
+
+def hour_bucket(value: datetime | None = None) -> datetime:
+    """Truncate a datetime to the start of its UTC hour (naive values are treated as UTC)."""
+    value = value or utc_now()
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def extract_usage(extra_metadata: dict | None) -> tuple[str | None, int | None, int | None]:
+    """Extract (model_name, input_tokens, output_tokens) from a message metadata dump."""
+    metadata = extra_metadata or {}
+    model_name = (metadata.get("response_metadata") or {}).get("model_name")
+    usage = metadata.get("usage_metadata")
+    if not isinstance(usage, dict):
+        return model_name, None, None
+    return model_name, int(usage.get("input_tokens") or 0), int(usage.get("output_tokens") or 0)
+
+
+async def increment(
+    db: AsyncSession, metric: str, dimension: str | None = None, value: int = 1, at: datetime | None = None
+) -> None:
+    """Add `value` to a rollup counter within the caller's transaction (committed by the caller)."""
+    if not value:
+        return
+    stmt = insert(DashboardRollup).values(bucket=hour_bucket(at), metric=metric, dimension=dimension or "", value=value)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["bucket", "metric", "dimension"],
+        set_={"value": DashboardRollup.value + stmt.excluded.value},
+    )
+    await db.execute(stmt)
+
+
+async def record_message(
+    db: AsyncSession,
+    role: str,
+    model_name: str | None = None,
+    input_tokens: int | None = None,
+    output_tokens: int | None = None,
+    user_id: str | None = None,
+    at: datetime | None = None,
+) -> None:
+    """Record a newly added message (usage values as returned by `extract_usage`)."""
+    await increment(db, MESSAGES, role, at=at)
+    if role == "assistant":
+        await increment(db, MODEL_CALLS, model_name, at=at)
+    if input_tokens is not None:
+        await increment(db, INPUT_TOKENS, model_name, input_tokens, at=at)
+        await increment(db, OUTPUT_TOKENS, model_name, output_tokens, at=at)
+    if user_id:
+        await increment(db, ACTIVE_USERS, user_id, at=at)
+
+
+async def record_tool_call(
+    db: AsyncSession, tool_name: str, status: str, agent_id: str | None = None, at: datetime | None = None
+) -> None:
+    """Record a newly added tool call."""
+    await increment(db, TOOL_CALLS, tool_name, at=at)
+    if agent_id:
+        await increment(db, AGENT_TOOL_CALLS, agent_id, at=at)
+    if status in TOOL_STATUS_METRICS:
+        await increment(db, TOOL_STATUS_METRICS[status], tool_name, at=at)
+
+
+async def record_tool_status_change(
+    db: AsyncSession, tool_name: str, old_status: str | None, new_status: str, at: datetime | None = None
+) -> None:
+    """Move a tool call between status counters (bucketed by the tool call creation time)."""
+    if old_status == new_status:
+        return
+    if old_status in TOOL_STATUS_METRICS:
+        await increment(db, TOOL_STATUS_METRICS[old_status], tool_name, -1, at=at)
+    if new_status in TOOL_STATUS_METRICS:
+        await increment(db, TOOL_STATUS_METRICS[new_status], tool_name, at=at)
+
+
+async def record_feedback(db: AsyncSession, agent_id: str, rating: str, at: datetime | None = None) -> None:
+    """Record a newly submitted message feedback."""
+    await increment(db, FEEDBACKS, agent_id, at=at)
+    if rating == "like":
+        await increment(db, FEEDBACK_LIKES, agent_id, at=at)
+
+
+def _range_filters(metric: str, start: datetime | None, end: datetime | None) -> list:
+    filters = [DashboardRollup.metric == metric]
+    if start is not None:
+        filters.append(DashboardRollup.bucket >= hour_bucket(start))
+    if end is not None:
+        filters.append(DashboardRollup.bucket < hour_bucket(end))
+    return filters
+
+
+async def sum_metric(db: AsyncSession, metric: str, start: datetime | None = None, end: datetime | None = None) -> int:
+    """Total of a metric over an hour-aligned time range (all time by default)."""
+    result = await db.execute(select(func.sum(DashboardRollup.value)).filter(*_range_filters(metric, start, end)))
+    return int(result.scalar() or 0)
+
+
+async def sum_metric_by_dimension(
+    db: AsyncSession, metric: str, start: datetime | None = None, end: datetime | None = None
+) -> dict[str, int]:
+    """Totals of a metric per dimension value, e.g. {tool_name: count}."""
+    result = await db.execute(
+        select(DashboardRollup.dimension, func.sum(DashboardRollup.value))
+        .filter(*_range_filters(metric, start, end))
+        .group_by(DashboardRollup.dimension)
+    )
+    return {dimension: int(total or 0) for dimension, total in result.all()}
+
+
+async def hourly_totals(db: AsyncSession, metric: str, start: datetime) -> dict[datetime, int]:
+    """Per-hour totals of a metric since `start`, keyed by naive UTC hour."""
+    result = await db.execute(
+        select(DashboardRollup.bucket, func.sum(DashboardRollup.value))
+        .filter(*_range_filters(metric, start, None))
+        .group_by(DashboardRollup.bucket)
+    )
+    return {bucket: int(total or 0) for bucket, total in result.all()}
@@ -1,6 +1,6 @@
 import datetime as dt
 
-from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -47,6 +47,11 @@ class Conversation(Base):
     """Conversation table - new storage system"""
 
     __tablename__ = "conversations"
+    # Listings page by keyset on (updated_at, id), per user (threads) or across users (dashboard)
+    __table_args__ = (
+        Index("ix_conversations_user_status_updated", "user_id", "status", "updated_at"),
+        Index("ix_conversations_status_updated", "status", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment="Primary key")
     thread_id = Column(String(64), unique=True, index=True, nullable=False, comment="Thread ID (UUID)")
@@ -82,6 +87,8 @@ class Message(Base):
     """Message table - stores conversation messages"""
 
     __tablename__ = "messages"
+    # Composite index for paging a conversation's messages by created_at
+    __table_args__ = (Index("ix_messages_conversation_created", "conversation_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment="Primary key")
     conversation_id = Column(
@@ -92,6 +99,9 @@ class Message(Base):
     message_type = Column(String(30), default="text", comment="Message type: text/tool_call/tool_result")
     created_at = Column(DateTime, default=utc_now, comment="Creation time")
     token_count = Column(Integer, nullable=True, comment="Token count (optional)")
+    model_name = Column(String(100), nullable=True, comment="Model name from response metadata")
+    input_tokens = Column(Integer, nullable=True, comment="Input tokens from usage metadata")
+    output_tokens = Column(Integer, nullable=True, comment="Output tokens from usage metadata")
     extra_metadata = Column(JSON, nullable=True, comment="Additional metadata (complete message dump)")
     image_content = Column(Text, nullable=True, comment="Base64 encoded image content for multimodal messages")
 
@@ -108,6 +118,9 @@ class Message(Base):
             "message_type": self.message_type,
             "created_at": _format_utc_datetime(self.created_at),
             "token_count": self.token_count,
+            "model_name": self.model_name,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
             "metadata": self.extra_metadata or {},
             "image_content": self.image_content,
             "tool_calls": [tc.to_dict() for tc in self.tool_calls] if self.tool_calls else [],
@@ -320,7 +333,7 @@ class MessageFeedback(Base):
     user_id = Column(String(64), nullable=False, index=True, comment="User ID who provided feedback")
     rating = Column(String(10), nullable=False, comment="Feedback rating: like or dislike")
     reason = Column(Text, nullable=True, comment="Optional reason for dislike feedback")
-    created_at = Column(DateTime, default=utc_now, comment="Feedback creation time")
+    created_at = Column(DateTime, default=utc_now, index=True, comment="Feedback creation time")
 
     # Relationships
     message = relationship("Message", backref="feedbacks")
@@ -361,6 +374,7 @@ class MCPServer(Base):
     # 状态字段
     enabled = Column(Integer, nullable=False, default=1, comment="是否启用：1=是，0=否")
     disabled_tools = Column(JSON, nullable=True, comment="禁用的工具名称列表")
+    cacheable_tools = Column(JSON, nullable=True, comment="可缓存结果的工具名称列表（幂等、只读工具）")
 
     # 用户追踪
     created_by = Column(String(100), nullable=False, comment="创建人用户名")
@@ -385,6 +399,7 @@ class MCPServer(Base):
             "icon": self.icon,
             "enabled": bool(self.enabled),
             "disabled_tools": self.disabled_tools or [],
+            "cacheable_tools": self.cacheable_tools or [],
             "created_by": self.created_by,
             "updated_by": self.updated_by,
             "created_at": _format_utc_datetime(self.created_at),
@@ -410,4 +425,80 @@ class MCPServer(Base):
             config["sse_read_timeout"] = self.sse_read_timeout
         if self.disabled_tools:
             config["disabled_tools"] = self.disabled_tools
+        if self.cacheable_tools:
+            config["cacheable_tools"] = self.cacheable_tools
         return config
+
+
+class TaskRecord(Base):
+    """后台任务记录（Tasker 按行持久化）"""
+
+    __tablename__ = "tasks"
+
+    id = Column(String(32), primary_key=True)
+    name = Column(String(255), nullable=False)
+    type = Column(String(64), nullable=False, index=True)
+    status = Column(String(32), nullable=False, default="pending", index=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    message = Column(Text, nullable=False, default="")
+    payload = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Integer, nullable=False, default=0)
+    priority = Column(String(16), nullable=False, default="normal")
+    handler = Column(String(255), nullable=True, comment="可导入的任务处理函数 module:function")
+    backend = Column(String(16), nullable=False, default="local", comment="执行后端：local/process")
+    worker_id = Column(String(128), nullable=True, comment="领取任务的 worker 进程")
+    heartbeat_at = Column(DateTime, nullable=True, comment="worker 最近心跳时间")
+    checkpoint = Column(JSON, nullable=True, comment="可恢复任务的断点数据")
+    created_at = Column(DateTime, default=utc_now, index=True)
+    updated_at = Column(DateTime, default=utc_now)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True, index=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "type": self.type,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "created_at": _format_utc_datetime(self.created_at),
+            "updated_at": _format_utc_datetime(self.updated_at),
+            "started_at": _format_utc_datetime(self.started_at),
+            "completed_at": _format_utc_datetime(self.completed_at),
+            "payload": self.payload or {},
+            "result": self.result,
+            "error": self.error,
+            "cancel_requested": bool(self.cancel_requested),
+            "priority": self.priority,
+            "handler": self.handler,
+            "backend": self.backend,
+            "worker_id": self.worker_id,
+            "checkpoint": self.checkpoint,
+        }
+
+
+class DashboardRollup(Base):
+    """仪表板按小时预聚合的统计值（写入消息/工具调用/反馈时增量累加）"""
+
+    __tablename__ = "dashboard_rollups"
+    __table_args__ = (
+        UniqueConstraint("bucket", "metric", "dimension", name="uq_dashboard_rollup"),
+        Index("ix_dashboard_rollup_metric_bucket", "metric", "bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    bucket = Column(DateTime, nullable=False, comment="小时起点（UTC）")
+    metric = Column(String(32), nullable=False, comment="指标名称")
+    dimension = Column(String(128), nullable=False, default="", comment="维度值：模型/工具/智能体/用户等")
+    value = Column(Integer, nullable=False, default=0)
+
+    def to_dict(self) -> dict:
+        return {
+            "bucket": _format_utc_datetime(self.bucket),
+            "metric": self.metric,
+            "dimension": self.dimension,
+            "value": self.value,
+        }
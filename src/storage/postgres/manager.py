@@ -142,6 +142,10 @@ class PostgresManager(metaclass=SingletonMeta):
             "ALTER TABLE IF EXISTS evaluation_result_details ADD COLUMN IF NOT EXISTS generated_answer TEXT",
             "ALTER TABLE IF EXISTS evaluation_result_details ADD COLUMN IF NOT EXISTS retrieved_chunks JSONB",
             "ALTER TABLE IF EXISTS evaluation_result_details ADD COLUMN IF NOT EXISTS metrics JSONB",
+            "ALTER TABLE IF EXISTS mcp_servers ADD COLUMN IF NOT EXISTS cacheable_tools JSON",
+            "ALTER TABLE IF EXISTS messages ADD COLUMN IF NOT EXISTS model_name VARCHAR(100)",
+            "ALTER TABLE IF EXISTS messages ADD COLUMN IF NOT EXISTS input_tokens INTEGER",
+            "ALTER TABLE IF EXISTS messages ADD COLUMN IF NOT EXISTS output_tokens INTEGER",
             # 扩展 db_id 字段长度以支持最长 75 字符的 ID（kb_private_ + 64字符hash）
             "ALTER TABLE IF EXISTS knowledge_bases ALTER COLUMN db_id TYPE VARCHAR(80)",
             "ALTER TABLE IF EXISTS knowledge_files ALTER COLUMN db_id TYPE VARCHAR(80)",
@@ -158,6 +162,11 @@ class PostgresManager(metaclass=SingletonMeta):
             "CREATE INDEX IF NOT EXISTS idx_er_status ON evaluation_results(status)",
             "CREATE INDEX IF NOT EXISTS idx_er_started ON evaluation_results(started_at DESC)",
             "CREATE INDEX IF NOT EXISTS idx_erd_task ON evaluation_result_details(task_id)",
+            "CREATE INDEX IF NOT EXISTS ix_conversations_user_status_updated"
+            " ON conversations(user_id, status, updated_at)",
+            "CREATE INDEX IF NOT EXISTS ix_conversations_status_updated ON conversations(status, updated_at)",
+            "CREATE INDEX IF NOT EXISTS ix_messages_conversation_created ON messages(conversation_id, created_at)",
+            "CREATE INDEX IF NOT EXISTS ix_message_feedbacks_created_at ON message_feedbacks(created_at)",
         ]
 
         async with self.async_engine.begin() as conn:
@@ -175,6 +175,11 @@ class Conversation(Base):
     """Conversation table - 对话表"""
 
     __tablename__ = "conversations"
+    # Listings page by keyset on (updated_at, id), per user (threads) or across users (dashboard)
+    __table_args__ = (
+        Index("ix_conversations_user_status_updated", "user_id", "status", "updated_at"),
+        Index("ix_conversations_status_updated", "status", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment="Primary key")
     thread_id = Column(String(64), unique=True, index=True, nullable=False, comment="Thread ID (UUID)")
@@ -210,6 +215,8 @@ class Message(Base):
     """Message table - 消息表"""
 
     __tablename__ = "messages"
+    # Composite index for paging a conversation's messages by created_at
+    __table_args__ = (Index("ix_messages_conversation_created", "conversation_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment="Primary key")
     conversation_id = Column(
@@ -220,6 +227,9 @@ class Message(Base):
     message_type = Column(String(30), default="text", comment="Message type: text/tool_call/tool_result")
     created_at = Column(DateTime, default=utc_now_naive, comment="Creation time")
     token_count = Column(Integer, nullable=True, comment="Token count (optional)")
+    model_name = Column(String(100), nullable=True, comment="Model name from response metadata")
+    input_tokens = Column(Integer, nullable=True, comment="Input tokens from usage metadata")
+    output_tokens = Column(Integer, nullable=True, comment="Output tokens from usage metadata")
     extra_metadata = Column(JSON, nullable=True, comment="Additional metadata (complete message dump)")
     image_content = Column(Text, nullable=True, comment="Base64 encoded image content for multimodal messages")
 
@@ -237,6 +247,9 @@ class Message(Base):
             "message_type": self.message_type,
             "created_at": format_utc_datetime(self.created_at),
             "token_count": self.token_count,
+            "model_name": self.model_name,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
             "metadata": self.extra_metadata or {},
             "image_content": self.image_content,
             "tool_calls": [tc.to_dict() for tc in self.tool_calls] if self.tool_calls else [],
@@ -351,7 +364,7 @@ class MessageFeedback(Base):
     user_id = Column(String(64), nullable=False, index=True, comment="User ID who provided feedback")
     rating = Column(String(10), nullable=False, comment="Feedback rating: like or dislike")
     reason = Column(Text, nullable=True, comment="Optional reason for dislike feedback")
-    created_at = Column(DateTime, default=utc_now_naive, comment="Feedback creation time")
+    created_at = Column(DateTime, default=utc_now_naive, index=True, comment="Feedback creation time")
 
     # Relationships
     message = relationship("Message", back_populates="feedbacks")
@@ -392,6 +405,7 @@ class MCPServer(Base):
     # 状态字段
     enabled = Column(Integer, nullable=False, default=1, comment="是否启用：1=是，0=否")
     disabled_tools = Column(JSON, nullable=True, comment="禁用的工具名称列表")
+    cacheable_tools = Column(JSON, nullable=True, comment="可缓存结果的工具名称列表（幂等、只读工具）")
 
     # 用户追踪
     created_by = Column(String(100), nullable=False, comment="创建人用户名")
@@ -416,6 +430,7 @@ class MCPServer(Base):
             "icon": self.icon,
             "enabled": bool(self.enabled),
             "disabled_tools": self.disabled_tools or [],
+            "cacheable_tools": self.cacheable_tools or [],
             "created_by": self.created_by,
             "updated_by": self.updated_by,
             "created_at": format_utc_datetime(self.created_at),
@@ -455,6 +470,8 @@ class MCPServer(Base):
             config["sse_read_timeout"] = self.sse_read_timeout
         if self.disabled_tools:
             config["disabled_tools"] = self.disabled_tools
+        if self.cacheable_tools:
+            config["cacheable_tools"] = self.cacheable_tools
         return config
 
 
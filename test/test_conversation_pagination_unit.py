@@ -0,0 +1,87 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone, UTC
+from types import SimpleNamespace
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.storage.conversation import rollups
+from src.storage.conversation.pagination import decode_cursor, encode_cursor, next_cursor
+
+
+def test_cursor_round_trip():
+    value = datetime(2026, 3, 1, 12, 30, 45, 123456)
+    cursor = encode_cursor(value, 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (value, 42)
+
+
+def test_cursor_round_trip_keeps_timezone():
+    value = datetime(2026, 3, 1, 12, 30, tzinfo=UTC)
+    assert decode_cursor(encode_cursor(value, 7)) == (value, 7)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "e30", encode_cursor(datetime(2026, 1, 1), 1)[:-4]])
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_next_cursor_points_at_last_row_of_full_page():
+    base = datetime(2026, 1, 1)
+    rows = [SimpleNamespace(id=10 - i, updated_at=base - timedelta(minutes=i)) for i in range(3)]
+
+    cursor = next_cursor(rows, limit=3)
+    assert decode_cursor(cursor) == (base - timedelta(minutes=2), 8)
+
+
+def test_next_cursor_uses_sort_attr():
+    created_at = datetime(2026, 1, 1, 8)
+    rows = [SimpleNamespace(id=5, created_at=created_at)]
+
+    assert decode_cursor(next_cursor(rows, limit=1, sort_attr="created_at")) == (created_at, 5)
+
+
+def test_next_cursor_none_on_last_page_or_without_limit():
+    rows = [SimpleNamespace(id=1, updated_at=datetime(2026, 1, 1))]
+
+    assert next_cursor(rows, limit=2) is None
+    assert next_cursor([], limit=2) is None
+    assert next_cursor(rows, limit=None) is None
+
+
+def test_hour_bucket_truncates_naive_value():
+    assert rollups.hour_bucket(datetime(2026, 5, 6, 7, 59, 59, 999)) == datetime(2026, 5, 6, 7)
+
+
+def test_hour_bucket_converts_aware_value_to_utc():
+    value = datetime(2026, 5, 6, 1, 15, tzinfo=timezone(timedelta(hours=8)))
+    assert rollups.hour_bucket(value) == datetime(2026, 5, 5, 17)
+
+
+def test_hour_bucket_defaults_to_current_hour():
+    bucket = rollups.hour_bucket()
+    assert bucket.tzinfo is None
+    assert bucket.minute == bucket.second == bucket.microsecond == 0
+
+
+def test_extract_usage_reads_model_and_tokens():
+    metadata = {
+        "response_metadata": {"model_name": "qwen-max"},
+        "usage_metadata": {"input_tokens": 120, "output_tokens": 30, "total_tokens": 150},
+    }
+    assert rollups.extract_usage(metadata) == ("qwen-max", 120, 30)
+
+
+def test_extract_usage_without_usage_metadata():
+    assert rollups.extract_usage({"response_metadata": {"model_name": "gpt"}}) == ("gpt", None, None)
+    assert rollups.extract_usage({"usage_metadata": "n/a"}) == (None, None, None)
+    assert rollups.extract_usage(None) == (None, None, None)
+
+
+def test_extract_usage_defaults_missing_token_counts_to_zero():
+    assert rollups.extract_usage({"usage_metadata": {"input_tokens": None}}) == (None, 0, 0)
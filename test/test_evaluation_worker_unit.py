@@ -0,0 +1,142 @@
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.knowledge.base import KBNotFoundError, KnowledgeBase
+from src.knowledge.factory import KnowledgeBaseFactory
+from src.knowledge.manager import KnowledgeBaseManager
+from src.services import evaluation_service
+
+KB_TYPE = "fake_eval"
+
+
+class FakeKnowledgeBase(KnowledgeBase):
+    """只保存元数据、检索返回固定片段的知识库"""
+
+    @property
+    def kb_type(self) -> str:
+        return KB_TYPE
+
+    async def _create_kb_instance(self, db_id, config):
+        return None
+
+    async def _initialize_kb_instance(self, instance):
+        return None
+
+    async def index_file(self, db_id, file_id, operator_id=None):
+        return {}
+
+    async def update_content(self, db_id, file_ids, params=None):
+        return []
+
+    async def aquery(self, query_text, db_id, **kwargs):
+        return [{"content": f"answer to {query_text}", "chunk_id": "chunk_1"}]
+
+    def get_query_params_config(self, db_id, **kwargs):
+        return {}
+
+    async def delete_file(self, db_id, file_id):
+        return None
+
+    async def get_file_basic_info(self, db_id, file_id):
+        return {}
+
+    async def get_file_content(self, db_id, file_id):
+        return {}
+
+    async def get_file_info(self, db_id, file_id):
+        return {}
+
+
+class FakeContext:
+    def __init__(self, payload: dict):
+        self.task_id = "task_1"
+        self.payload = payload
+
+    async def set_progress(self, progress: float, message: str | None = None) -> None:
+        pass
+
+    async def set_message(self, message: str) -> None:
+        pass
+
+    async def set_result(self, result) -> None:
+        pass
+
+    async def raise_if_cancelled(self) -> None:
+        pass
+
+
+@pytest.fixture
+def work_dir(tmp_path):
+    KnowledgeBaseFactory.register(KB_TYPE, FakeKnowledgeBase)
+    yield str(tmp_path)
+    KnowledgeBaseFactory._kb_types.pop(KB_TYPE, None)
+    KnowledgeBaseFactory._default_configs.pop(KB_TYPE, None)
+
+
+def _create_benchmark_in_api_process(work_dir: str) -> None:
+    """模拟 API 进程：新建知识库并上传基准，元数据写入磁盘"""
+    manager = KnowledgeBaseManager(work_dir)
+    manager.global_databases_meta["kb_1"] = {"name": "demo", "kb_type": KB_TYPE}
+    manager._save_global_metadata()
+
+    kb_instance = manager._get_or_create_kb_instance(KB_TYPE)
+    benchmark_file = os.path.join(kb_instance.work_dir, "bm_1.jsonl")
+    with open(benchmark_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(json.dumps({"query": q}) for q in ["q1", "q2"]) + "\n")
+    kb_instance.databases_meta["kb_1"] = {"name": "demo"}
+    kb_instance.benchmarks_meta["kb_1"] = {
+        "bm_1": {"name": "bm", "benchmark_file": benchmark_file, "question_count": 2},
+    }
+    kb_instance._save_metadata()
+
+
+def _payload() -> dict:
+    return {"task_id": "eval_1", "db_id": "kb_1", "benchmark_id": "bm_1", "retrieval_config": {}}
+
+
+def _tasker_config(backend: str):
+    return patch("server.services.tasker.config", MagicMock(tasker_backend=backend))
+
+
+async def test_handler_in_worker_sees_benchmark_created_after_start(work_dir):
+    # worker 进程启动时知识库和基准都还不存在
+    worker_kb = KnowledgeBaseManager(work_dir)
+    _create_benchmark_in_api_process(work_dir)
+
+    with patch.object(evaluation_service, "knowledge_base", worker_kb), _tasker_config("process"):
+        await evaluation_service.run_evaluation_handler(FakeContext(_payload()))
+
+    result_file = os.path.join(work_dir, f"{KB_TYPE}_data", "kb_1", "results", "eval_1.json")
+    with open(result_file, encoding="utf-8") as f:
+        summary = json.load(f)
+    assert summary["status"] == "completed"
+    assert summary["completed_questions"] == 2
+
+
+async def test_handler_in_process_does_not_reload_metadata(work_dir):
+    # local 后端下评估在 API 进程内执行，内存中的元数据就是最新状态，不从磁盘覆盖
+    api_kb = KnowledgeBaseManager(work_dir)
+    _create_benchmark_in_api_process(work_dir)
+
+    with patch.object(evaluation_service, "knowledge_base", api_kb), _tasker_config("local"):
+        with pytest.raises(KBNotFoundError):
+            await evaluation_service.run_evaluation_handler(FakeContext(_payload()))
+
+
+def test_reload_metadata_picks_up_new_databases(work_dir):
+    worker_kb = KnowledgeBaseManager(work_dir)
+    version = worker_kb.access_version
+    _create_benchmark_in_api_process(work_dir)
+
+    worker_kb.reload_metadata()
+
+    kb_instance = worker_kb.get_kb("kb_1")
+    assert kb_instance.benchmarks_meta["kb_1"]["bm_1"]["name"] == "bm"
+    assert worker_kb.access_version == version + 1
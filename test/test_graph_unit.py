@@ -77,10 +77,11 @@ async def test_txt_add_vector_entity_parsing():
                     args, kwargs = call
                     query = args[0] if args else kwargs.get("query", "")
                     if "MERGE (h:Entity:Upload" in query:
-                        # The args are passed as kwargs to run: h_name=..., etc.
-                        merge_calls.append(kwargs)
+                        # Triples are sent as UNWIND rows: rows=[{h_name: ..., ...}]
+                        assert "UNWIND $rows" in query
+                        merge_calls.extend(kwargs["rows"])
 
-                assert len(merge_calls) == 2, f"Expected 2 merge calls, got {len(merge_calls)}"
+                assert len(merge_calls) == 2, f"Expected 2 merge rows, got {len(merge_calls)}"
 
                 # Call 1 (Legacy)
                 call1 = merge_calls[0]
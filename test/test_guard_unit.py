@@ -0,0 +1,82 @@
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.plugins.guard import KeywordAutomaton, StreamingKeywordMatcher
+
+
+def _stream(keywords, chunks):
+    matcher = StreamingKeywordMatcher(KeywordAutomaton(keywords))
+    results = [matcher.feed(chunk) for chunk in chunks]
+    return matcher, results
+
+
+def test_search_finds_keyword_case_insensitive():
+    automaton = KeywordAutomaton(["Bad Word"])
+    assert automaton.search("this has a BAD WORD inside") == "bad word"
+    assert automaton.search("this is fine") is None
+
+
+def test_stream_match_across_chunk_boundary():
+    matcher, results = _stream(["敏感词"], ["这是一段包含敏", "感", "词的内容"])
+    assert results == [False, False, True]
+    assert matcher.matched_keyword == "敏感词"
+
+
+def test_stream_no_false_positive_across_chunks():
+    matcher, results = _stream(["abc"], ["ab", "xc", "a", "b"])
+    assert results == [False, False, False, False]
+    assert matcher.matched_keyword is None
+
+
+def test_stream_stays_matched_after_hit():
+    matcher, results = _stream(["abc"], ["abc", "harmless"])
+    assert results == [True, True]
+    assert matcher.matched_keyword == "abc"
+
+
+def test_overlapping_keywords_suffix_of_longer_keyword():
+    # "bc" 是 "abcd" 路径上的后缀，未走完长关键词时也要命中短关键词
+    automaton = KeywordAutomaton(["abcd", "bc"])
+    assert automaton.search("xabcx") == "bc"
+    assert automaton.search("abcd") == "bc"
+
+
+def test_overlapping_keywords_shared_prefix():
+    automaton = KeywordAutomaton(["he", "she", "hers"])
+    assert automaton.search("ushers") == "she"
+    assert automaton.search("xhex") == "he"
+
+    matcher, results = _stream(["he", "she", "hers"], ["us", "h", "ers"])
+    assert results == [False, False, True]
+    assert matcher.matched_keyword == "she"
+
+
+def test_failure_transition_keeps_partial_match():
+    # "aab" 中第一个 a 失配后，第二个 a 仍是 "ab" 的前缀
+    matcher, results = _stream(["ab"], ["a", "a", "b"])
+    assert results == [False, False, True]
+
+
+def test_empty_keyword_set_never_matches():
+    automaton = KeywordAutomaton([])
+    assert automaton.search("anything at all") is None
+
+    matcher, results = _stream([], ["anything", " at all"])
+    assert results == [False, False]
+    assert matcher.matched_keyword is None
+
+
+def test_blank_keywords_are_ignored():
+    automaton = KeywordAutomaton(["", "abc"])
+    assert automaton.search("xyz") is None
+    assert automaton.search("xabc") == "abc"
+
+
+def test_stream_multimodal_content_blocks():
+    matcher = StreamingKeywordMatcher(KeywordAutomaton(["secret"]))
+    assert matcher.feed([{"type": "text", "text": "sec"}, {"type": "image_url", "image_url": "x"}]) is False
+    assert matcher.feed([{"type": "text", "text": "ret"}]) is True
+    assert matcher.feed(None) is True
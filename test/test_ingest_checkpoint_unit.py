@@ -0,0 +1,182 @@
+import asyncio
+import os
+import sys
+from collections import Counter
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from server.routers import knowledge_router
+from src.knowledge.base import FileStatus
+from src.utils.datetime_utils import utc_isoformat
+
+
+class FakeKnowledgeBase:
+    """内存中的知识库，记录每个文件被添加、解析、入库的次数"""
+
+    def __init__(self, bad_items: set[str] | None = None):
+        self.files_meta: dict[str, dict] = {}
+        self.bad_items = bad_items or set()
+        self.added = Counter()
+        self.parsed = Counter()
+        self.indexed = Counter()
+        self._next_id = 0
+
+    def get_kb(self, db_id):
+        return self
+
+    def get_database_info(self, db_id):
+        return {"db_id": db_id}
+
+    async def add_file_record(self, db_id, item, params=None, operator_id=None, task_id=None):
+        self._next_id += 1
+        file_id = f"file_{self._next_id}"
+        self.added[item] += 1
+        self.files_meta[file_id] = {
+            "file_id": file_id,
+            "database_id": db_id,
+            "path": item,
+            "status": FileStatus.UPLOADED,
+            "created_at": utc_isoformat(),
+            "created_by": operator_id,
+            "task_id": task_id,
+        }
+        return self.files_meta[file_id]
+
+    async def delete_file(self, db_id, file_id):
+        self.files_meta.pop(file_id, None)
+
+    async def parse_file(self, db_id, file_id, operator_id=None):
+        meta = self.files_meta[file_id]
+        self.parsed[meta["path"]] += 1
+        if meta["path"] in self.bad_items:
+            meta["status"] = FileStatus.ERROR_PARSING
+            meta["error"] = "broken file"
+            raise ValueError("broken file")
+        meta["status"] = FileStatus.PARSED
+        return meta
+
+    async def update_file_params(self, db_id, file_id, params, operator_id=None):
+        return None
+
+    async def index_files(self, db_id, file_ids, operator_id=None):
+        for file_id in file_ids:
+            meta = self.files_meta[file_id]
+            self.indexed[meta["path"]] += 1
+            meta["status"] = FileStatus.INDEXED
+        return [self.files_meta[file_id] for file_id in file_ids]
+
+
+class FakeContext:
+    """TaskContext 替身；cancel_after 指定第几次检查取消时模拟进程中断"""
+
+    def __init__(self, payload: dict, checkpoint: dict | None = None, cancel_after: int | None = None):
+        self.task_id = "task_1"
+        self.payload = payload
+        self._checkpoint = checkpoint
+        self.saved: list[dict] = []
+        self.result = None
+        self._cancel_after = cancel_after
+        self._cancel_checks = 0
+
+    @property
+    def checkpoint(self) -> dict:
+        return self._checkpoint or {}
+
+    async def save_checkpoint(self, checkpoint: dict) -> None:
+        self._checkpoint = checkpoint
+        self.saved.append(checkpoint)
+
+    async def set_message(self, message: str) -> None:
+        pass
+
+    async def set_progress(self, progress: float, message: str | None = None) -> None:
+        pass
+
+    async def set_result(self, result) -> None:
+        self.result = result
+
+    async def raise_if_cancelled(self) -> None:
+        self._cancel_checks += 1
+        if self._cancel_after is not None and self._cancel_checks >= self._cancel_after:
+            raise asyncio.CancelledError()
+
+
+def _payload(items: list[str], auto_index: bool = True) -> dict:
+    return {
+        "db_id": "kb_1",
+        "items": items,
+        "params": {"auto_index": auto_index},
+        "content_type": "file",
+        "operator_id": "user_1",
+    }
+
+
+async def _run_until_interrupted(context: FakeContext) -> None:
+    with pytest.raises(asyncio.CancelledError):
+        await knowledge_router.run_ingest_task(context)
+
+
+@pytest.fixture
+def fake_kb():
+    kb = FakeKnowledgeBase(bad_items={"bad.pdf"})
+    with (
+        patch.object(knowledge_router, "knowledge_base", kb),
+        patch.object(knowledge_router, "INGEST_CHECKPOINT_INTERVAL", 2),
+        patch.object(knowledge_router, "_auto_generate_mindmap", AsyncMock()),
+    ):
+        yield kb
+
+
+async def test_ingest_resumes_after_interruption_in_add_phase(fake_kb):
+    items = ["a.pdf", "b.pdf", "c.pdf", "bad.pdf", "d.pdf"]
+    # 添加第 3 个文件之后、下一次断点之前中断：第 3 个文件记录成为孤儿，恢复时删除并重新添加
+    first = FakeContext(_payload(items), cancel_after=4)
+    await _run_until_interrupted(first)
+    assert first.checkpoint["phase"] == 1
+    assert first.checkpoint["cursor"] == 2
+    assert sum(fake_kb.added.values()) == 3
+
+    resumed = FakeContext(_payload(items), checkpoint=first.checkpoint)
+    result = await knowledge_router.run_ingest_task(resumed)
+
+    assert sorted(meta["path"] for meta in fake_kb.files_meta.values()) == sorted(items)
+    assert fake_kb.parsed == Counter(items)
+    assert result["submitted"] == len(items)
+    assert result["failed"] == 1
+    failed = [entry for entry in result["items"] if entry.get("status") == "failed"]
+    assert failed == [
+        {"item": "bad.pdf", "status": "failed", "error": "解析失败: broken file", "error_type": "parse_failed"}
+    ]
+
+
+async def test_ingest_resume_does_not_repeat_finished_work(fake_kb):
+    items = [f"doc_{index}.pdf" for index in range(6)]
+    # 6 次添加 + 4 次解析检查后中断：前 3 个文件已解析，只保存到游标 2 的断点
+    first = FakeContext(_payload(items), cancel_after=10)
+    await _run_until_interrupted(first)
+    assert first.checkpoint["phase"] == 2
+
+    resumed = FakeContext(_payload(items), checkpoint=first.checkpoint)
+    result = await knowledge_router.run_ingest_task(resumed)
+
+    assert fake_kb.added == Counter(items)
+    assert fake_kb.parsed == Counter(items)
+    assert fake_kb.indexed == Counter(items)
+    assert result["failed"] == 0
+    assert all(meta["status"] == FileStatus.INDEXED for meta in fake_kb.files_meta.values())
+
+
+async def test_ingest_checkpoint_holds_only_phase_and_cursor(fake_kb):
+    items = [f"doc_{index}.pdf" for index in range(5)] + ["bad.pdf"]
+    context = FakeContext(_payload(items))
+    await knowledge_router.run_ingest_task(context)
+
+    assert context.saved
+    for checkpoint in context.saved:
+        assert set(checkpoint) == {"phase", "cursor", "failed_items"}
+        assert checkpoint["failed_items"] == []
+    assert [(c["phase"], c["cursor"]) for c in context.saved][-1] == (3, 5)
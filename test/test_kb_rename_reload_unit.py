@@ -0,0 +1,63 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from server.routers import knowledge_router
+from src.agents import agent_manager
+from src.agents.common import BaseAgent
+
+
+class FakeKnowledgeBase:
+    def __init__(self):
+        self.names = {"kb_1": "old_name"}
+
+    async def update_database(self, db_id, name, description, llm_info=None, additional_params=None):
+        self.names[db_id] = name
+        return {"db_id": db_id, "name": name}
+
+
+class RecordingAgent(BaseAgent):
+    """graph 中记录构建时可用的知识库检索工具名"""
+
+    name = "recording_agent"
+    kb: FakeKnowledgeBase | None = None
+    module_name = "recording_agent"
+
+    async def get_graph(self, **kwargs):
+        if self.graph and not kwargs.get("force_rebuild"):
+            return self.graph
+        self.graph = {"tools": sorted(self.kb.names.values())}
+        return self.graph
+
+
+@pytest.fixture
+def fake_kb(tmp_path):
+    kb = FakeKnowledgeBase()
+    with (
+        patch("src.agents.common.base.sys_config", MagicMock(save_dir=str(tmp_path))),
+        patch.object(knowledge_router, "knowledge_base", kb),
+        patch.object(RecordingAgent, "kb", kb),
+        patch.dict(agent_manager._classes, {"RecordingAgent": RecordingAgent}, clear=True),
+        patch.dict(agent_manager._instances, clear=True),
+    ):
+        yield kb
+
+
+async def test_rename_database_rebuilds_agent_graphs(fake_kb):
+    agent = agent_manager.get_agent("RecordingAgent")
+    old_graph = await agent.get_graph()
+    assert old_graph["tools"] == ["old_name"]
+
+    await knowledge_router.update_database_info(
+        "kb_1", name="new_name", description="renamed", llm_info=None, additional_params={}, current_user=None
+    )
+    await agent._rebuild_task
+
+    graph = await agent.get_graph()
+    assert graph is not old_graph
+    assert graph["tools"] == ["new_name"]
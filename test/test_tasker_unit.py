@@ -0,0 +1,91 @@
+import os
+import sys
+from collections import deque
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from server.services.tasker import Tasker, _QueuedTask
+
+
+def _push(tasker: Tasker, priority: str, task_id: str, task_type: str = "general", fair_key: str = "u1/kb1") -> None:
+    item = _QueuedTask(task_id=task_id, task_type=task_type, fair_key=fair_key, coroutine=MagicMock())
+    tasker._lanes[priority].setdefault(fair_key, deque()).append(item)
+
+
+def _drain(tasker: Tasker) -> list[str]:
+    order = []
+    while (item := tasker._pop_runnable()) is not None:
+        order.append(item.task_id)
+    return order
+
+
+@pytest.fixture
+def tasker(tmp_path):
+    with patch("server.services.tasker.config", MagicMock(tasker_type_concurrency={}, save_dir=str(tmp_path))):
+        yield Tasker(worker_count=1)
+
+
+def test_pop_runnable_respects_priority_lanes(tasker):
+    _push(tasker, "low", "low-1")
+    _push(tasker, "normal", "normal-1")
+    _push(tasker, "high", "high-1")
+    _push(tasker, "normal", "normal-2")
+
+    assert _drain(tasker) == ["high-1", "normal-1", "normal-2", "low-1"]
+
+
+def test_pop_runnable_round_robins_fair_keys(tasker):
+    for index in range(3):
+        _push(tasker, "normal", f"alice-{index}", fair_key="alice/kb")
+    _push(tasker, "normal", "bob-0", fair_key="bob/kb")
+    _push(tasker, "normal", "carol-0", fair_key="carol/kb")
+
+    # 一个用户连续提交多个任务时，其他用户的任务不必排在其全部任务之后
+    assert _drain(tasker) == ["alice-0", "bob-0", "carol-0", "alice-1", "alice-2"]
+
+
+def test_pop_runnable_keeps_fifo_within_fair_key(tasker):
+    for index in range(3):
+        _push(tasker, "normal", f"task-{index}")
+
+    assert _drain(tasker) == ["task-0", "task-1", "task-2"]
+
+
+def test_pop_runnable_skips_capped_task_type(tasker):
+    _push(tasker, "high", "ingest-1", task_type="knowledge_ingest", fair_key="alice/kb")
+    _push(tasker, "high", "ingest-2", task_type="knowledge_ingest", fair_key="bob/kb")
+    _push(tasker, "normal", "eval-1", task_type="evaluation", fair_key="alice/kb")
+    tasker._running_by_type["knowledge_ingest"] = 1
+
+    with patch("server.services.tasker.config", MagicMock(tasker_type_concurrency={"knowledge_ingest": 1})):
+        # 达到上限的类型被跳过，低优先级通道中其他类型的任务可以执行
+        assert _drain(tasker) == ["eval-1"]
+
+        tasker._running_by_type["knowledge_ingest"] = 0
+        assert tasker._pop_runnable().task_id == "ingest-1"
+        tasker._running_by_type["knowledge_ingest"] = 1
+        assert tasker._pop_runnable() is None
+
+
+def test_pop_runnable_skips_capped_item_within_same_queue(tasker):
+    _push(tasker, "normal", "ingest-1", task_type="knowledge_ingest")
+    _push(tasker, "normal", "query-1", task_type="query")
+    tasker._running_by_type["knowledge_ingest"] = 2
+
+    with patch("server.services.tasker.config", MagicMock(tasker_type_concurrency={"knowledge_ingest": 2})):
+        assert tasker._pop_runnable().task_id == "query-1"
+        assert tasker._pop_runnable() is None
+
+    assert [item.task_id for item in tasker._lanes["normal"]["u1/kb1"]] == ["ingest-1"]
+
+
+def test_pop_runnable_removes_empty_fair_key_queues(tasker):
+    _push(tasker, "normal", "task-1", fair_key="alice/kb")
+
+    assert tasker._pop_runnable().task_id == "task-1"
+    assert "alice/kb" not in tasker._lanes["normal"]
+    assert tasker._pop_runnable() is None